@@ -1,48 +1,225 @@
-from typing import Any, AnyStr, List
+from typing import Any, AnyStr, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-from transformers import pipeline
 from transformers import AutoModel
+from transformers import TextClassificationPipeline
 
+from rebyu.util.backend import BACKEND_TORCH
+from rebyu.util.mapreduce import mapreduce, combine_rows
+from rebyu.util.registry import load_pretrained, load_pipeline
+from rebyu.util.tokens import is_token_series
 
+
+@mapreduce(combine=combine_rows)
 def transformers_model(
         series: Any,
         model: Any = AutoModel,
-        model_name: AnyStr = None):
-    """ Predict a given series by construct a transformers model with a set of specifications
+        model_name: AnyStr = None,
+        batch_size: int = 32,
+        max_tokens: Optional[int] = None,
+        backend: AnyStr = BACKEND_TORCH):
+    """ Predict a given series by construct a transformers model with a set of specifications. The model is
+    loaded once per process (see ModelRegistry).
+
+    Token ids (`transformers_tokenize` with returns='ids', read from its TokenArray buffer) are predicted in padded
+    mini-batches of similar length under `torch.inference_mode()`, and the output is a single array (n, ...) of
+    the logits, or of the first (CLS) hidden state for models without logits. Other encodings are predicted one
+    at a time.
 
     :param series: Any series of data
     :param model: The transformers model (from transformers)
     :param model_name: The pretrained model name
-    :return: List of Prediction Object
+    :param batch_size: Maximum number of items per mini-batch (for token ids)
+    :param max_tokens: (Optional) Maximum number of padded tokens per mini-batch (for token ids)
+    :param backend: The model backend, 'torch', 'torch-int8' (dynamic int8 quantization) or 'onnx' (ONNX Runtime)
+    :return: np.ndarray (for token ids) or List of Prediction Object
     """
+    import torch
+
     outputs = []
-    _model = model.from_pretrained(model_name)
+    _model = load_pretrained(model, model_name, backend=backend)
 
-    for data in series:
-        outputs.append(_model(**data))
+    ids = _id_rows(series)
+    if not ids:
+        with torch.inference_mode():
+            for data in series:
+                outputs.append(_model(**data))
+        return outputs
 
-    return outputs
+    pad_id = getattr(_model.config, 'pad_token_id', None) or 0
+    order = []
+    with torch.inference_mode():
+        for bucket in length_buckets([len(x) for x in ids], batch_size=batch_size, max_tokens=max_tokens):
+            input_ids, attention_mask = pad_ids([ids[idx] for idx in bucket], pad_id=pad_id)
+            output = _model(input_ids=torch.from_numpy(input_ids), attention_mask=torch.from_numpy(attention_mask))
+
+            logits = getattr(output, 'logits', None)
+            states = logits if logits is not None else output.last_hidden_state[:, 0]
+            outputs.append(states.float().cpu().numpy())
+            order.extend(bucket)
+
+    stacked = np.concatenate(outputs)
+    result = np.empty_like(stacked)
+    result[order] = stacked
+    return result
+
+
+def _id_rows(series: Any) -> Optional[List[np.ndarray]]:
+    # Token ids of every row (a compact TokenArray of ids, or rows of id arrays/tuples), None for other encodings
+    if is_token_series(series) and not series.hasnans:
+        array = series.array
+        lookup = np.asarray(array.vocab, dtype=np.int64)
+        return [lookup[array.row_ids(idx)] for idx in range(len(array))]
 
+    rows = list(series)
+    if not all(isinstance(x, np.ndarray) or (isinstance(x, tuple) and all(isinstance(i, int) for i in x))
+               for x in rows):
+        return None
+    return [np.asarray(x, dtype=np.int64) for x in rows]
 
+
+def pad_ids(ids: List[np.ndarray], pad_id: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """ Pad token id arrays to the longest of them.
+
+    :param ids: List of token id arrays
+    :param pad_id: The padding token id
+    :return: (input_ids, attention_mask) as np.int64 arrays (n, longest)
+    """
+    longest = max((len(x) for x in ids), default=0)
+    input_ids = np.full((len(ids), longest), pad_id, dtype=np.int64)
+    attention_mask = np.zeros((len(ids), longest), dtype=np.int64)
+    for row, x in enumerate(ids):
+        input_ids[row, :len(x)] = x
+        attention_mask[row, :len(x)] = 1
+    return input_ids, attention_mask
+
+
+@mapreduce(combine=combine_rows)
 def transformers_pipeline(
         series: Any,
         task: AnyStr = 'sentiment-analysis',
         model: AnyStr = None,
+        batch_size: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        backend: AnyStr = BACKEND_TORCH,
+        columnar: bool = False,
         **kwargs):
-    """ Predict a given series by constructing a transformers pipeline with a set of specifications
+    """ Predict a given series by constructing a transformers pipeline with a set of specifications. The pipeline
+    is loaded once per process (see ModelRegistry).
+
+    With a `batch_size` (or `max_tokens`), the data is sorted by its estimated token length (the number of
+    whitespace-separated words, the texts are only tokenized by the pipeline) and predicted in batches of similar
+    length (padded to the longest of the batch), each holding at most `batch_size` items and `max_tokens` padded
+    (estimated) tokens. The predictions are returned in the original order.
 
     :param series: Any series of data
     :param task: The name of the task for the pretrained model
     :param model: The pretrained model name
+    :param batch_size: (Optional) Maximum number of items per batch (predicts one item at a time when not given)
+    :param max_tokens: (Optional) Maximum number of padded (estimated) tokens per batch
+    :param backend: The model backend, 'torch', 'torch-int8' (dynamic int8 quantization) or 'onnx' (ONNX Runtime).
+        The converted model is cached (see rebyu.util.backend), the output format is the same.
+    :param columnar: Determines whether the predictions are returned as typed columns (see to_columnar)
     :param kwargs: Additional arguments to the pipeline
-    :return: List of Prediction Object
+    :return: List of Prediction Object | pd.DataFrame
     """
-    pipe_task = pipeline(task=task, model=model, **kwargs)
+    pipe_task = load_pipeline(task=task, model=model, backend=backend, **kwargs)
 
-    outputs = []
-    for data in series:
-        outputs.append(pipe_task(data)[0])
+    if batch_size is None and max_tokens is None:
+        outputs = []
+        for data in series:
+            outputs.append(pipe_task(data)[0])
+    else:
+        texts = list(series)
+        outputs = [None] * len(texts)
+        buckets = length_buckets(_estimate_lengths(texts), batch_size=batch_size, max_tokens=max_tokens)
+        for bucket in buckets:
+            results = pipe_task([texts[idx] for idx in bucket], batch_size=len(bucket))
+            for idx, result in zip(bucket, results):
+                outputs[idx] = _single_output(pipe_task, result)
+
+    if columnar:
+        return to_columnar(outputs, labels=_model_labels(pipe_task))
     return outputs
 
 
+def to_columnar(outputs: List[Any], labels: Optional[List[AnyStr]] = None) -> pd.DataFrame:
+    """ Convert classification predictions into typed columns.
+
+    - Single predictions ({'label', 'score'}): a 'label' column (categorical codes) and a 'score' column
+      (np.float32).
+    - Multi-label predictions (lists of {'label', 'score'}, e.g. with top_k): an (n x labels) np.float32 score
+      matrix, one column per label (0 for labels missing from a prediction).
+
+    :param outputs: List of predictions
+    :param labels: (Optional) All the labels of the model in order (labels are added in order of occurrence
+        otherwise)
+    :return: pd.DataFrame
+    """
+    labels = list(labels or [])
+    known = set(labels)
+    for output in outputs:
+        for item in output if isinstance(output, list) else [output]:
+            if item['label'] not in known:
+                known.add(item['label'])
+                labels.append(item['label'])
+
+    if not any(isinstance(output, list) for output in outputs):
+        return pd.DataFrame({
+            'label': pd.Categorical([output['label'] for output in outputs], categories=labels),
+            'score': np.fromiter((output['score'] for output in outputs), dtype=np.float32, count=len(outputs))
+        })
+
+    index = {label: idx for idx, label in enumerate(labels)}
+    scores = np.zeros((len(outputs), len(labels)), dtype=np.float32)
+    for row, output in enumerate(outputs):
+        for item in output if isinstance(output, list) else [output]:
+            scores[row, index[item['label']]] = item['score']
+    return pd.DataFrame(scores, columns=labels)
+
+
+def _model_labels(pipe_task: Any) -> List[AnyStr]:
+    config = getattr(getattr(pipe_task, 'model', None), 'config', None)
+    id2label = getattr(config, 'id2label', None) or {}
+    return [id2label[idx] for idx in sorted(id2label)]
+
+
+def length_buckets(
+        lengths: List[int],
+        batch_size: Optional[int] = None,
+        max_tokens: Optional[int] = None) -> List[List[int]]:
+    """ Group items into batches of similar length. Items are sorted by length, and a batch is closed once it
+    holds `batch_size` items or once padding it to its longest item would exceed `max_tokens`.
+
+    :param lengths: Token length of every item
+    :param batch_size: (Optional) Maximum number of items per batch
+    :param max_tokens: (Optional) Maximum number of padded tokens per batch (batch size x longest item)
+    :return: List of batches (List of item indices)
+    """
+    buckets, bucket = [], []
+    for idx in np.argsort(np.asarray(lengths, dtype=np.int64), kind='stable'):
+        # Sorted by length, so the newest item is the longest of the batch
+        full = batch_size is not None and len(bucket) >= batch_size
+        over = max_tokens is not None and (len(bucket) + 1) * lengths[idx] > max_tokens
+        if bucket and (full or over):
+            buckets.append(bucket)
+            bucket = []
+        bucket.append(int(idx))
+
+    if bucket:
+        buckets.append(bucket)
+    return buckets
+
+
+def _estimate_lengths(texts: List[Any]) -> List[int]:
+    # Number of whitespace-separated words, a cheap estimate of the token length (the pipeline tokenizes anyway)
+    return [len(str(text).split()) for text in texts]
+
+
+def _single_output(pipe_task: Any, result: Any) -> Any:
+    # Match `pipe_task(data)[0]`: a text classification pipeline wraps a single text in a list, other
+    # pipelines return the same output for a single item as in a batch
+    if isinstance(pipe_task, TextClassificationPipeline):
+        return result
+    return result[0] if isinstance(result, list) else result
@@ -1,16 +1,25 @@
 from typing import Any
 
-from rebyu.util.dependency import nltk_dependency_mgt
+import numpy as np
+import pandas as pd
+
+from rebyu.util.dependency import nltk_dependency_mgt, nltk_requires
+from rebyu.util.mapreduce import mapreduce, combine_rows
 
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
 from textblob import TextBlob
 
+VADER_SCORES = ('neg', 'neu', 'pos', 'compound')
+
 
-def textblob_polarity(series: Any):
+@mapreduce(combine=combine_rows)
+@nltk_requires('punkt')
+def textblob_polarity(series: Any, columnar: bool = False):
     """ Predict the polarity of a given text data using TextBlob
 
     :param series: Any series of data
-    :return: List of Dict (TextBlob Polarity)
+    :param columnar: Determines whether the polarities are returned as a np.float32 array
+    :return: List of Dict (TextBlob Polarity) | np.ndarray (float32)
     """
     nltk_dependency_mgt(required=['punkt'])
 
@@ -20,15 +29,24 @@ def textblob_polarity(series: Any):
             polarities.append(text.polarity)
         else:
             polarities.append(TextBlob(text).polarity)
+
+    if columnar:
+        return np.asarray(polarities, dtype=np.float32)
     return polarities
 
 
-def vader_polarity(series: Any):
+@mapreduce(combine=combine_rows)
+@nltk_requires('vader_lexicon')
+def vader_polarity(series: Any, columnar: bool = False):
     """ Predict the polarity of a given text data using VADER
 
     :param series: Any series of data
-    :return: List of Dict (Vader Polarity)
+    :param columnar: Determines whether the polarities are returned as a pd.DataFrame of np.float32 columns
+        (neg, neu, pos, compound)
+    :return: List of Dict (Vader Polarity) | pd.DataFrame
     """
+    nltk_dependency_mgt(required=['vader_lexicon'])
+
     polarities = []
     analyzer = SentimentIntensityAnalyzer()
     for text in series:
@@ -36,5 +54,9 @@ def vader_polarity(series: Any):
             polarities.append(analyzer.polarity_scores(text.raw))
         else:
             polarities.append(analyzer.polarity_scores(text))
+
+    if columnar:
+        scores = np.array([[p[key] for key in VADER_SCORES] for p in polarities], dtype=np.float32)
+        return pd.DataFrame(scores.reshape(len(polarities), len(VADER_SCORES)), columns=list(VADER_SCORES))
     return polarities
 
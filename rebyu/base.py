@@ -1,9 +1,19 @@
 import pathlib
-from typing import Any, Dict, AnyStr
+from typing import Any, Dict, AnyStr, List, Optional, Union
 
+import numpy as np
 import pandas as pd
 
 from rebyu.pipeline.pipeline import BasePipeline
+from rebyu.pipeline.base import BaseStep
+from rebyu.pipeline.cache import StepCache
+from rebyu.pipeline.profile import StepProfiler, sizeof
+from rebyu.util.dedupe import row_aligned
+from rebyu.util.mapreduce import get_mapreduce, combine_rows
+from rebyu.util.reader import load_data, read_chunks
+
+COLUMNS_PIPELINE = 'pipeline'
+PROFILE_MEMORY = 'memory'
 
 
 class BaseRebyu(object):
@@ -20,37 +30,61 @@ class BaseRebyu(object):
         pipeline (BasePipeline): A customizable pipeline for data preprocessing, composition,
             and analysis.
         verbose (bool): Determines whether verbose output is enabled.
+        string_storage (str): (Optional) Storage of the string columns of data ('pyarrow' for Arrow-backed
+            string[pyarrow] columns, 'python' for string[python]), None keeps NumPy object columns.
+        columns (List[str] | str): (Optional) Only load these columns of data, 'pipeline' loads the columns
+            the steps of the pipeline read (see BasePipeline.input_columns).
+        dtype (Dict): (Optional) Dtypes of the columns of data (Dict of column -> dtype).
+        copy (bool): Determines whether an input DataFrame is deep-copied. Without copy, data shares the columns
+            of the input frame and only the columns the steps write are materialised (the input frame is never
+            modified, see rebyu.util.reader.load_data).
     """
 
     def __init__(self,
                  data: Any,
                  pipeline: BasePipeline,
-                 verbose: bool = True):
-        self.data = data
+                 verbose: bool = True,
+                 string_storage: Optional[AnyStr] = None,
+                 columns: Optional[Union[List[AnyStr], AnyStr]] = None,
+                 dtype: Optional[Dict] = None,
+                 copy: bool = True):
+        self.string_storage = string_storage
+        self.columns = _resolve_columns(columns, pipeline)
+        self.dtype = dtype
+        self.copy_input = copy
+        self._appended = []
+        self.data = _load_data(data, string_storage=string_storage, columns=self.columns, dtype=dtype, copy=copy)
         self.pipeline = None
         self._composition = {}
         self._analysis = {}
+        self._partials = {}
+        self._profiler = StepProfiler()
 
         self.verbose = verbose
 
-        if isinstance(data, pd.DataFrame):
-            self.data = data.copy()
-
-        if isinstance(data, pd.Series):
-            self.data = self.data.to_frame().copy()
-
-        if isinstance(data, str):
-            _suffix = pathlib.Path(data).suffix
-
-            if _suffix == '.csv':
-                self.data = pd.read_csv(data)
-            if _suffix == '.json':
-                self.data = pd.read_json(data)
-
         if isinstance(pipeline, BasePipeline):
             self.pipeline = pipeline
             self.pipeline.reset()
 
+    @property
+    def data(self) -> pd.DataFrame:
+        """ The input dataset, the rows of Rebyu.append are concatenated on first access.
+
+        :return: pd.DataFrame
+        """
+        if self._appended:
+            self._data = pd.concat(
+                [self._data] + self._appended,
+                ignore_index=isinstance(self._data.index, pd.RangeIndex)
+            )
+            self._appended = []
+        return self._data
+
+    @data.setter
+    def data(self, data: pd.DataFrame):
+        self._data = data
+        self._appended = []
+
     def step(self, verbose: bool = False):
         """ Take a step of a series of process within the pipeline.
 
@@ -67,22 +101,241 @@ class BaseRebyu(object):
             verbose=verbose
         )
 
-    def run(self, verbose: bool = False):
+    def run(self,
+            verbose: bool = False,
+            fuse: bool = True,
+            workers: int = 1,
+            chunksize: Optional[int] = None,
+            schedule: Optional[AnyStr] = None,
+            max_workers: Optional[int] = None,
+            cache: Optional[StepCache] = None,
+            profile: Union[bool, AnyStr] = False,
+            dedupe: bool = False,
+            keep_partials: bool = False):
         """ Run through all the steps within the pipeline.
 
         :param verbose: Determines whether verbose output is enabled.
+        :param fuse: Determines whether consecutive in-place PREPROCESS steps are fused into a single pass.
+        :param workers: Number of worker processes for PREPROCESS and map/reduce capable steps (1 is serial).
+        :param chunksize: (Optional) Number of rows per chunk sent to a worker.
+        :param schedule: (Optional) Run independent steps concurrently on a 'thread' or 'process' pool.
+        :param max_workers: (Optional) Size of the scheduler pool.
+        :param cache: (Optional) StepCache to reuse step outputs from previous runs.
+        :param profile: Determines whether every step is profiled (see Rebyu.profile), 'memory' traces the peak
+            memory of every step with tracemalloc (which inflates the timings) instead of the peak RSS growth.
+        :param dedupe: Determines whether steps run on the distinct values of their source column only, and the
+            outputs are broadcast back to every row (COMPOSE steps need to accept multiplicity weights).
+        :param keep_partials: Determines whether the un-finalized partial results of map/reduce capable steps are
+            kept for Rebyu.append (otherwise they are computed over the whole data on the first append).
         :return:
         """
         if self.pipeline is None:
             return
 
+        self._profiler.clear()
+        self._profiler.trace_memory = profile == PROFILE_MEMORY
+        partials = {}
         self.pipeline.run(
             data=self.data,
             composition=self._composition,
             analysis=self._analysis,
-            verbose=verbose
+            verbose=verbose,
+            partials=partials,
+            fuse=fuse,
+            workers=workers,
+            chunksize=chunksize,
+            schedule=schedule,
+            max_workers=max_workers,
+            cache=cache,
+            profiler=self._profiler if profile else None,
+            dedupe=dedupe
+        )
+        for key, partial in partials.items():
+            if keep_partials:
+                self._partials[key] = partial
+            else:
+                self._partials.pop(key, None)
+        self._finalize(partials)
+
+        if profile:
+            # Map/reduce capable steps are measured on their partial result, report the finalized output
+            steps = self._steps_by_key()
+            for (store, target) in partials:
+                result = (self._composition if store == 'composition' else self._analysis)[target]
+                self._profiler.update(steps[(store, target)].sid, output_size=sizeof(result))
+
+    def append(self, data: Any, verbose: bool = False, **kwargs):
+        """ Append new rows and run the pipeline on them only.
+
+        - PREPROCESS outputs of the new rows are concatenated to Rebyu.data.
+        - Map/reduce capable COMPOSE and ANALYZE outputs are merged into the existing stores (e.g. Counters are
+          added together in place and the cutoff is re-applied), so the work scales with the size of the new rows
+          (the new rows are concatenated to Rebyu.data on its next access). Their
+          partial results are kept from the first append on (or from run(keep_partials=True)), the first
+          append computes them over the whole data.
+        - Other COMPOSE and ANALYZE steps are recomputed over the whole data.
+
+        :param data: The new rows (pd.DataFrame, pd.Series or path to a file).
+        :param verbose: Determines whether verbose output is enabled.
+        :param kwargs: Additional arguments to BasePipeline.run
+        :return:
+        """
+        if self.pipeline is None:
+            return
+
+        new_data = _load_data(
+            data, string_storage=self.string_storage, columns=self.columns, dtype=self.dtype, copy=self.copy_input
+        )
+        composition, analysis, partials = {}, {}, {}
+
+        self.pipeline.reset()
+        self.pipeline.run(
+            data=new_data,
+            composition=composition,
+            analysis=analysis,
+            verbose=verbose,
+            partials=partials,
+            **kwargs
         )
 
+        self._appended.append(new_data)
+
+        steps = self._steps_by_key()
+        for key, partial in partials.items():
+            if key not in self._partials:
+                self._recompute(steps[key])
+                continue
+            self._partials[key] = get_mapreduce(steps[key].func).combine(self._partials[key], partial)
+            self._finalize({key: self._partials[key]})
+
+        for store, results in (('composition', composition), ('analysis', analysis)):
+            for target in results:
+                self.pipeline.pipeline_logger.warning(
+                    f'[{steps[(store, target)].sid}] - No map/reduce contract, recomputing over the whole data'
+                )
+                self._recompute(steps[(store, target)])
+
+    def _recompute(self, step: BaseStep):
+        partials = {}
+        step.run(self.data, self._composition, self._analysis, partials=partials)
+        self._partials.update(partials)
+        self._finalize(partials)
+
+    def _finalize(self, partials: Dict):
+        steps = self._steps_by_key()
+        for (store, target), merged in partials.items():
+            step = steps[(store, target)]
+            result = get_mapreduce(step.func).output(merged, step.func_args)
+            if result is merged and isinstance(result, (list, set, dict)) and (store, target) in self._partials:
+                # kept partials are combined in place by Rebyu.append, the output must not share the container
+                result = type(result)(result)
+            if store == 'composition':
+                self._composition[target] = result
+            else:
+                self._analysis[target] = result
+
+    def _steps_by_key(self) -> Dict:
+        return {step.key(): step for step in self.pipeline.steps_info()}
+
+    @classmethod
+    def stream(cls,
+               data: AnyStr,
+               pipeline: BasePipeline,
+               chunksize: int = 10000,
+               output: Optional[AnyStr] = None,
+               verbose: bool = False,
+               string_storage: Optional[AnyStr] = None,
+               columns: Optional[Union[List[AnyStr], AnyStr]] = None,
+               dtype: Optional[Dict] = None,
+               **kwargs):
+        """ Run the pipeline over a CSV/JSON Lines/Parquet file (CSV and JSON Lines may be gzip or zstd
+        compressed) chunk by chunk, keeping peak memory bounded.
+
+        - PREPROCESS outputs are written to `output` (CSV or JSON Lines) chunk by chunk, together with the
+          row-aligned ANALYZE outputs. Without an `output`, ANALYZE outputs are concatenated in memory instead.
+          Columnar ANALYZE outputs are written as typed columns (a DataFrame output as one `<target>_<column>`
+          column per column).
+        - COMPOSE outputs are merged across chunks through their map/reduce contract, so every COMPOSE step
+          of the pipeline needs one.
+
+        The returned Rebyu holds the merged composition (and analysis) stores, and an empty `data` frame
+        with the columns of the processed chunks.
+
+        :param data: Path to a CSV, JSON Lines or Parquet file.
+        :param pipeline: BasePipeline
+        :param chunksize: Number of rows per chunk.
+        :param output: (Optional) Path to write the processed chunks to (.csv or .jsonl).
+        :param verbose: Determines whether verbose output is enabled.
+        :param string_storage: (Optional) Storage of the string columns of every chunk (see BaseRebyu).
+        :param columns: (Optional) Only read these columns, 'pipeline' reads the columns the pipeline reads.
+        :param dtype: (Optional) Dtypes of the columns (Dict of column -> dtype).
+        :param kwargs: Additional arguments to BasePipeline.run
+        :return: Rebyu
+        """
+        rb = cls(pd.DataFrame(), pipeline, string_storage=string_storage)
+        rb.columns, rb.dtype = _resolve_columns(columns, pipeline), dtype
+        rb._stream(data, chunksize=chunksize, output=output, verbose=verbose, **kwargs)
+        return rb
+
+    def _stream(self,
+                path: AnyStr,
+                chunksize: int,
+                output: Optional[AnyStr] = None,
+                verbose: bool = False,
+                **kwargs):
+        steps = self._steps_by_key()
+        for step in steps.values():
+            if step.stype == BaseStep.STEP_COMPOSE and not step.mergeable():
+                raise ValueError(f'Step {step.sid} cannot be merged across chunks (no map/reduce contract)')
+
+        partials = {}
+        for idx, chunk in enumerate(read_chunks(path, chunksize, columns=self.columns, dtype=self.dtype)):
+            chunk = _cast_strings(chunk, self.string_storage)
+            chunk_partials, chunk_analysis = {}, {}
+
+            self.pipeline.reset()
+            self.pipeline.run(
+                data=chunk,
+                composition=self._composition,
+                analysis=chunk_analysis,
+                verbose=verbose,
+                partials=chunk_partials,
+                **kwargs
+            )
+
+            for (store, target), partial in chunk_partials.items():
+                if store == 'analysis' and output is not None and row_aligned(partial, len(chunk)):
+                    _assign_rows(chunk, target, partial)
+                    continue
+                key = (store, target)
+                partials[key] = get_mapreduce(steps[key].func).combine(partials[key], partial) \
+                    if key in partials else partial
+
+            for target, result in chunk_analysis.items():
+                if output is not None and row_aligned(result, len(chunk)):
+                    _assign_rows(chunk, target, result)
+                elif target in self._analysis:
+                    self._analysis[target] = combine_rows(self._analysis[target], _rows(result))
+                else:
+                    self._analysis[target] = _rows(result)
+
+            if output is not None:
+                _write_chunk(chunk, output, append=idx > 0)
+            self.data = chunk.iloc[0:0]
+
+        self._partials.update(partials)
+        self._finalize(partials)
+
+    def profile(self) -> pd.DataFrame:
+        """ Get the profile of the last run (with profile=True). One row per step (steps are not fused while
+        profiling) with its wall time, CPU time, rows per second, peak memory delta (growth of the peak RSS of the
+        process, the tracemalloc peak with profile='memory') and output size (bytes, shallow estimate for
+        containers, NaN for other outputs without nbytes or memory_usage).
+
+        :return: pd.DataFrame
+        """
+        return self._profiler.to_frame()
+
     def composition(self, key: AnyStr, default: Any = None) -> Any:
         """ Get values from 'composition' step results
 
@@ -108,6 +361,7 @@ class BaseRebyu(object):
         """
         self._composition.clear()
         self._analysis.clear()
+        self._partials.clear()
         self.pipeline.reset()
 
     def info(self):
@@ -144,3 +398,58 @@ class BaseRebyu(object):
             out_text += f' -{step}\n'
 
         return out_text
+
+
+def _load_data(data: Any,
+               string_storage: Optional[AnyStr] = None,
+               columns: Optional[List[AnyStr]] = None,
+               dtype: Optional[Dict] = None,
+               copy: bool = True) -> Any:
+    data = load_data(data, columns=columns, dtype=dtype, copy=copy)
+    if isinstance(data, pd.DataFrame):
+        return _cast_strings(data, string_storage)
+    return data
+
+
+def _resolve_columns(columns: Optional[Union[List[AnyStr], AnyStr]], pipeline: Any) -> Optional[List[AnyStr]]:
+    if columns == COLUMNS_PIPELINE:
+        return pipeline.input_columns() if isinstance(pipeline, BasePipeline) else None
+    return columns
+
+
+def _cast_strings(data: pd.DataFrame, string_storage: Optional[AnyStr] = None) -> pd.DataFrame:
+    if string_storage is None:
+        return data
+
+    dtype = pd.StringDtype(string_storage)
+    for col in data.columns:
+        if data[col].dtype == object and pd.api.types.infer_dtype(data[col], skipna=True) == 'string':
+            data[col] = data[col].astype(dtype)
+    return data
+
+
+def _rows(result: Any) -> Any:
+    if isinstance(result, (np.ndarray, pd.DataFrame)):
+        return result
+    return list(result)
+
+
+def _assign_rows(chunk: pd.DataFrame, target: AnyStr, result: Any):
+    if isinstance(result, pd.DataFrame):
+        for col in result.columns:
+            chunk[f'{target}_{col}'] = result[col].array
+    elif isinstance(result, np.ndarray) and result.ndim == 1:
+        chunk[target] = result
+    else:
+        chunk[target] = list(result)
+
+
+def _write_chunk(chunk: pd.DataFrame, path: AnyStr, append: bool = False):
+    suffix = pathlib.Path(path).suffix
+
+    if suffix == '.csv':
+        chunk.to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+    elif suffix in ('.json', '.jsonl'):
+        chunk.to_json(path, mode='a' if append else 'w', orient='records', lines=True)
+    else:
+        raise ValueError(f'Unsupported file for streaming output: {path}')
@@ -0,0 +1,140 @@
+from typing import Any, AnyStr, Tuple
+
+import numpy as np
+
+from rebyu.compose.idvocab import IdVocabulary
+from rebyu.util.mapreduce import mapreduce
+
+WEIGHTING_COUNT = 'count'
+WEIGHTING_TF = 'tf'
+WEIGHTING_TFIDF = 'tfidf'
+
+
+class DocumentTermMatrix(object):
+    """
+    Document-Term Matrix
+
+    A sparse (CSR) matrix of the term counts (or weights) of every row: the terms of row i are
+    `indices[indptr[i]:indptr[i + 1]]` (ids of `vocab`) with the values `data[indptr[i]:indptr[i + 1]]`.
+    Memory is proportional to the number of non-zeros (rows are counted block by block, see IdVocabulary.encode).
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, vocab: IdVocabulary):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.vocab = vocab
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.indptr) - 1, len(self.vocab)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    def row(self, idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        """ Get the term ids and values of a row.
+
+        :param idx: Row index
+        :return: (indices, data)
+        """
+        start, end = self.indptr[idx], self.indptr[idx + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def vstack(self, other: 'DocumentTermMatrix') -> 'DocumentTermMatrix':
+        """ Append the rows of another matrix (its vocabulary is merged into this one).
+
+        :param other: DocumentTermMatrix
+        :return: DocumentTermMatrix (self)
+        """
+        self.vocab.merge(other.vocab)
+        remap = self.vocab.lookup_ids(other.vocab.tokens)
+
+        self.indptr = np.concatenate([self.indptr, other.indptr[1:] + self.indptr[-1]])
+        self.indices = np.concatenate([self.indices, remap[other.indices]])
+        self.data = np.concatenate([self.data, other.data])
+        return self
+
+    def toarray(self) -> np.ndarray:
+        """ Get the matrix as a dense array (rows, terms).
+
+        :return: np.ndarray
+        """
+        dense = np.zeros(self.shape, dtype=self.data.dtype)
+        dense[np.repeat(np.arange(self.shape[0]), np.diff(self.indptr)), self.indices] = self.data
+        return dense
+
+    def to_scipy(self) -> Any:
+        """ Get the matrix as a scipy.sparse.csr_matrix (requires scipy).
+
+        :return: scipy.sparse.csr_matrix
+        """
+        from scipy.sparse import csr_matrix
+
+        return csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return f'DocumentTermMatrix(shape={self.shape}, nnz={self.nnz})'
+
+
+def _count_terms(series: Any, **kwargs):
+    vocab = IdVocabulary()
+    indptr, indices, data = [np.zeros(1, dtype=np.int64)], [], []
+    for ids, lengths in vocab.encode(series):
+        n_rows, n_terms = len(lengths), max(len(vocab), 1)
+        rows = np.repeat(np.arange(n_rows, dtype=np.int64), lengths)
+        keys, counts = np.unique(rows * n_terms + ids, return_counts=True)
+
+        indptr.append(np.cumsum(np.bincount(keys // n_terms, minlength=n_rows)) + indptr[-1][-1])
+        indices.append(keys % n_terms)
+        data.append(counts.astype(np.int64))
+
+    if not indices:
+        return DocumentTermMatrix(indptr[0], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), vocab)
+    return DocumentTermMatrix(np.concatenate(indptr), np.concatenate(indices), np.concatenate(data), vocab)
+
+
+def _combine_terms(a: DocumentTermMatrix, b: DocumentTermMatrix):
+    return a.vstack(b)
+
+
+def _weight_terms(matrix: DocumentTermMatrix, cutoff: int = 2, weighting: AnyStr = WEIGHTING_COUNT):
+    if weighting not in (WEIGHTING_COUNT, WEIGHTING_TF, WEIGHTING_TFIDF):
+        raise ValueError(f'Unknown weighting: {weighting}')
+
+    keep = matrix.vocab.counts >= cutoff
+    new_ids = np.cumsum(keep) - 1
+    kept = keep[matrix.indices]
+
+    rows = np.repeat(np.arange(len(matrix), dtype=np.int64), np.diff(matrix.indptr))[kept]
+    indptr = np.zeros(len(matrix) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(matrix)), out=indptr[1:])
+    indices, data = new_ids[matrix.indices[kept]], matrix.data[kept]
+
+    vocab = matrix.vocab.prune(cutoff).freeze()
+    if weighting == WEIGHTING_COUNT:
+        return DocumentTermMatrix(indptr, indices, data.copy(), vocab)
+
+    totals = np.bincount(rows, weights=data, minlength=len(matrix))
+    data = data / totals[rows]
+    if weighting == WEIGHTING_TFIDF:
+        df = np.bincount(indices, minlength=len(vocab))
+        data = data * (np.log((1 + len(matrix)) / (1 + df)) + 1)[indices]
+    return DocumentTermMatrix(indptr, indices, data, vocab)
+
+
+@mapreduce(combine=_combine_terms, finalize=_weight_terms, partial=_count_terms)
+def doc_term_matrix(series: Any, cutoff: int = 2, weighting: AnyStr = WEIGHTING_COUNT):
+    """ Create a sparse (CSR) Document-Term Matrix of the tokens of every row
+
+    :param series: Any series of data
+    :param cutoff: Minimum occurrence (in the whole series) for a term to enter the matrix
+    :param weighting: The values of the matrix: 'count' (term counts), 'tf' (term frequency of the row) or
+        'tfidf' (term frequency x smoothed inverse document frequency, log((1 + n) / (1 + df)) + 1)
+    :return: DocumentTermMatrix
+    """
+    return _weight_terms(_count_terms(series), cutoff, weighting)
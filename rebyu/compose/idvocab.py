@@ -0,0 +1,254 @@
+from array import array
+from collections import Counter
+from itertools import islice
+from typing import Any, AnyStr, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from rebyu.util.dedupe import weighted
+from rebyu.util.mapreduce import mapreduce
+
+UNK_ID = -1
+BLOCK_ROWS = 4096
+
+
+class IdVocabulary(object):
+    """
+    Integer-id Vocabulary
+
+    A vocabulary that interns every token to an integer id (in order of first occurrence) and keeps the counts
+    in a growable NumPy array. Partial vocabularies (e.g. of separate chunks) are merged with `merge`, pruned
+    with `prune` and frozen for lookups (token -> id, id -> token) with `freeze`.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._ids: Dict[AnyStr, int] = {}
+        self._tokens: List[AnyStr] = []
+        self._counts = np.zeros(capacity, dtype=np.int64)
+        self.frozen = False
+
+    def _grow(self, size: int):
+        if size > len(self._counts):
+            counts = np.zeros(max(size, 2 * len(self._counts)), dtype=np.int64)
+            counts[:len(self._counts)] = self._counts
+            self._counts = counts
+
+    def _intern(self, token: AnyStr) -> int:
+        idx = self._ids.get(token)
+        if idx is None:
+            idx = self._ids[token] = len(self._tokens)
+            self._tokens.append(token)
+        return idx
+
+    def _check_frozen(self):
+        if self.frozen:
+            raise ValueError('The vocabulary is frozen')
+
+    def update(self, series: Iterable[Any], weights: Any = None) -> 'IdVocabulary':
+        """ Count the tokens of every row.
+
+        :param series: Any series of tokens
+        :param weights: (Optional) Number of occurrences of every row
+        :return: IdVocabulary (self)
+        """
+        for _ in self.encode(series, weights):
+            pass
+        return self
+
+    def encode(self,
+               series: Iterable[Any],
+               weights: Any = None,
+               block_rows: Optional[int] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """ Count the tokens of every row and get their ids, block by block of rows (only the ids of one block
+        are held at a time). The tokens of a block are counted before it is yielded.
+
+        :param series: Any series of tokens
+        :param weights: (Optional) Number of occurrences of every row
+        :param block_rows: (Optional) Number of rows per block (defaults to BLOCK_ROWS)
+        :return: Iterator of (ids, lengths), the ids of every token of the rows of a block (flat) and the number
+            of tokens of every row
+        """
+        self._check_frozen()
+
+        weights = None if weights is None else np.asarray(weights, dtype=np.int64)
+        rows, start, intern = iter(series), 0, self._intern
+        while True:
+            block = list(islice(rows, block_rows or BLOCK_ROWS))
+            if not block:
+                return
+
+            ids, lengths = array('q'), array('q')
+            for data in block:
+                offset = len(ids)
+                ids.extend(intern(token) for token in data)
+                lengths.append(len(ids) - offset)
+            ids, lengths = np.frombuffer(ids, dtype=np.int64), np.frombuffer(lengths, dtype=np.int64)
+
+            if weights is None:
+                unique, counts = np.unique(ids, return_counts=True)
+            else:
+                unique, inverse = np.unique(ids, return_inverse=True)
+                repeats = np.repeat(weights[start:start + len(block)], lengths)
+                counts = np.bincount(inverse, weights=repeats, minlength=len(unique)).astype(np.int64)
+
+            self._grow(len(self))
+            self._counts[unique] += counts
+            start += len(block)
+            yield ids, lengths
+
+    def merge(self, other: 'IdVocabulary') -> 'IdVocabulary':
+        """ Add the counts of another vocabulary (its new tokens get the next ids).
+
+        :param other: IdVocabulary
+        :return: IdVocabulary (self)
+        """
+        self._check_frozen()
+
+        remap = np.fromiter((self._intern(token) for token in other._tokens), dtype=np.int64, count=len(other))
+        self._grow(len(self))
+        self._counts[remap] += other.counts
+        return self
+
+    def prune(self, cutoff: int = 2) -> 'IdVocabulary':
+        """ Get a new vocabulary of the tokens occurring at least `cutoff` times (ids are re-assigned in order).
+
+        :param cutoff: Minimum occurrence to enter the vocab
+        :return: IdVocabulary
+        """
+        keep = np.flatnonzero(self.counts >= cutoff)
+        vocab = IdVocabulary(capacity=max(len(keep), 1))
+        vocab._tokens = [self._tokens[idx] for idx in keep]
+        vocab._ids = {token: idx for idx, token in enumerate(vocab._tokens)}
+        vocab._counts[:len(keep)] = self._counts[keep]
+        return vocab
+
+    def freeze(self) -> 'IdVocabulary':
+        """ Freeze the vocabulary for lookups, it can not be updated or merged into anymore.
+
+        :return: IdVocabulary (self)
+        """
+        self._counts = self.counts.copy()
+        self._counts.flags.writeable = False
+        self.frozen = True
+        return self
+
+    @property
+    def counts(self) -> np.ndarray:
+        """ Counts of the tokens, indexed by id.
+
+        :return: np.ndarray
+        """
+        return self._counts[:len(self)]
+
+    @property
+    def tokens(self) -> List[AnyStr]:
+        """ Tokens, indexed by id.
+
+        :return: List of Strings
+        """
+        return list(self._tokens)
+
+    def lookup(self, token: AnyStr) -> int:
+        """ Get the id of a token (UNK_ID if it is not in the vocabulary).
+
+        :param token: Any string object
+        :return: int
+        """
+        return self._ids.get(token, UNK_ID)
+
+    def lookup_ids(self, tokens: Iterable[AnyStr]) -> np.ndarray:
+        """ Get the ids of a list of tokens (UNK_ID for tokens not in the vocabulary).
+
+        :param tokens: List of Strings
+        :return: np.ndarray (int64)
+        """
+        get = self._ids.get
+        return np.fromiter((get(token, UNK_ID) for token in tokens), dtype=np.int64)
+
+    def token(self, idx: int) -> AnyStr:
+        """ Get the token of an id.
+
+        :param idx: Token id
+        :return: str
+        """
+        return self._tokens[idx]
+
+    def to_counter(self) -> Counter:
+        """ Get the counts as a Counter (token -> count).
+
+        :return: collections.Counter
+        """
+        return Counter(dict(zip(self._tokens, self.counts.tolist())))
+
+    def save(self, path: AnyStr):
+        """ Save the vocabulary in a binary (NumPy .npz) file.
+
+        :param path: Path of the file
+        :return:
+        """
+        encoded = [str(token).encode('utf-8') for token in self._tokens]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(x) for x in encoded], out=offsets[1:])
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                buffer=np.frombuffer(b''.join(encoded), dtype=np.uint8),
+                offsets=offsets,
+                counts=self.counts,
+                frozen=np.array(self.frozen)
+            )
+
+    @classmethod
+    def load(cls, path: AnyStr) -> 'IdVocabulary':
+        """ Load a vocabulary saved with `save`.
+
+        :param path: Path of the file
+        :return: IdVocabulary
+        """
+        with np.load(path, allow_pickle=False) as f:
+            buffer, offsets, counts, frozen = f['buffer'].tobytes(), f['offsets'], f['counts'], bool(f['frozen'])
+
+        vocab = cls(capacity=max(len(counts), 1))
+        vocab._tokens = [buffer[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+        vocab._ids = {token: idx for idx, token in enumerate(vocab._tokens)}
+        vocab._counts[:len(counts)] = counts
+        return vocab.freeze() if frozen else vocab
+
+    def __getitem__(self, token: AnyStr) -> int:
+        idx = self._ids.get(token)
+        return 0 if idx is None else int(self._counts[idx])
+
+    def __contains__(self, token: AnyStr):
+        return token in self._ids
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def __repr__(self):
+        return f'IdVocabulary(tokens={len(self)}, frozen={self.frozen})'
+
+
+def _count_ids(series: Any, weights: Any = None, **kwargs):
+    return IdVocabulary().update(series, weights)
+
+
+def _prune_id_vocab(vocab: IdVocabulary, cutoff: int = 2):
+    return vocab.prune(cutoff).freeze()
+
+
+def combine_id_vocab(a: IdVocabulary, b: IdVocabulary) -> IdVocabulary:
+    """ Merge two partial integer-id vocabularies. """
+    return a.merge(b)
+
+
+@weighted
+@mapreduce(combine=combine_id_vocab, finalize=_prune_id_vocab, partial=_count_ids)
+def id_vocab(series: Any, cutoff: int = 2, weights: Any = None):
+    """ Create a Vocabulary of integer ids with NumPy counts (see IdVocabulary)
+
+    :param series: Any series of data
+    :param cutoff: Minimum occurrence to enter the Vocab
+    :param weights: (Optional) Number of occurrences of every row
+    :return: IdVocabulary (frozen)
+    """
+    return _prune_id_vocab(_count_ids(series, weights), cutoff)
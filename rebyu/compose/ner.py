@@ -1,12 +1,15 @@
 from typing import Any
 
-from rebyu.util.dependency import nltk_dependency_mgt
+from rebyu.util.dependency import nltk_dependency_mgt, nltk_requires
+from rebyu.util.mapreduce import mapreduce, combine_list
 
 import nltk
 from nltk import pos_tag
 from nltk.chunk import ne_chunk
 
 
+@mapreduce(combine=combine_list)
+@nltk_requires('punkt', 'maxent_ne_chunker', 'words', 'averaged_perceptron_tagger')
 def nltk_extract_ner(series: Any):
     """ Extract Named-Entities from a given text data using NLTK (ne_chunk)
 
@@ -1,11 +1,14 @@
 from typing import Any
 
-from rebyu.util.dependency import nltk_dependency_mgt
+from rebyu.util.dependency import nltk_dependency_mgt, nltk_requires
+from rebyu.util.mapreduce import mapreduce, combine_list
 
 import nltk
 from nltk import pos_tag
 
 
+@mapreduce(combine=combine_list)
+@nltk_requires('punkt', 'averaged_perceptron_tagger')
 def nltk_extract_pos_tags(series: Any):
     """ Extract Part-of-Speech Tags from a given text data using NLTK (pos_tag)
 
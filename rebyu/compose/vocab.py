@@ -1,52 +1,104 @@
-from typing import Any
+from typing import Any, Dict, Iterable
 from collections import Counter
+from itertools import islice
 
-from rebyu.util.dependency import nltk_dependency_mgt
+import numpy as np
+
+from rebyu.compose.idvocab import BLOCK_ROWS
+from rebyu.util.dedupe import weighted
+from rebyu.util.dependency import nltk_dependency_mgt, nltk_requires
+from rebyu.util.mapreduce import mapreduce, combine_counter, combine_set
 
 from nltk.lm import Vocabulary
 
 
-def counter_vocab(series: Any, cutoff: int = 2):
+def _count_tokens(series: Any, weights: Any = None, **kwargs):
+    vocab = Counter()
+    if weights is None:
+        for data in series:
+            vocab.update(data)
+        return vocab
+
+    for data, weight in zip(series, weights):
+        for unit, count in Counter(data).items():
+            vocab[unit] += count * int(weight)
+    return vocab
+
+
+def _count_codepoints(strings: Iterable[str], weights: Any = None):
+    # Codepoints counted block by block of rows, only the UTF-32 buffer of one block is held at a time
+    vocab = Counter()
+    strings, start = iter(strings), 0
+    weights = None if weights is None else np.asarray(weights, dtype=np.int64)
+    while True:
+        block = list(islice(strings, BLOCK_ROWS))
+        if not block:
+            return vocab
+
+        text = ''.join(block)
+        if text:
+            codepoints = np.frombuffer(text.encode('utf-32-le', errors='surrogatepass'), dtype=np.uint32)
+            if weights is None:
+                codes, counts = np.unique(codepoints, return_counts=True)
+            else:
+                codes, inverse = np.unique(codepoints, return_inverse=True)
+                repeats = np.repeat(weights[start:start + len(block)], [len(x) for x in block])
+                counts = np.bincount(inverse, weights=repeats, minlength=len(codes))
+            for code, count in zip(codes.tolist(), counts.tolist()):
+                vocab[chr(code)] += int(count)
+        start += len(block)
+
+
+def _count_characters(series: Any, weights: Any = None, **kwargs):
+    # Characters of every token of a row, counted from their codepoints
+    return _count_codepoints((''.join(data) for data in series), weights)
+
+
+def _prune_counter(vocab: Counter, cutoff: int):
+    return Counter({unit: count for unit, count in vocab.items() if count >= cutoff})
+
+
+def _prune_vocab(vocab: Counter, cutoff: int = 2):
+    return _prune_counter(vocab, cutoff)
+
+
+def _prune_character_vocab(vocab: Counter, cutoff: int = 0):
+    return _prune_counter(vocab, cutoff)
+
+
+@weighted
+@mapreduce(combine=combine_counter, finalize=_prune_vocab, partial=_count_tokens)
+def counter_vocab(series: Any, cutoff: int = 2, weights: Any = None):
     """ Create a Vocabulary using the Counter class
 
     :param series: Any series of data
     :param cutoff: Minimum occurrence to enter the Vocab
+    :param weights: (Optional) Number of occurrences of every row
     :return: collections.Counter
     """
-    vocab = Counter()
-    for data in series:
-        vocab.update(data)
-
-    for word in list(vocab):
-        if vocab[word] < cutoff:
-            del vocab[word]
-
-    return vocab
+    return _prune_vocab(_count_tokens(series, weights), cutoff)
 
 
-def counter_character_vocab(series: Any, cutoff: int = 0):
+@weighted
+@mapreduce(combine=combine_counter, finalize=_prune_character_vocab, partial=_count_characters)
+def counter_character_vocab(series: Any, cutoff: int = 0, weights: Any = None):
     """ Create a Character Vocabulary using the Counter class
 
     :param series: Any series of data
     :param cutoff: Minimum occurrence to enter the Vocab
+    :param weights: (Optional) Number of occurrences of every row
     :return: collections.Counter
     """
-    vocab = Counter()
-    for data in series:         # Per Row
-        for unit in data:       # Per Token
-            vocab.update(unit)  # Individual Token
-
-    for char in list(vocab):
-        if vocab[char] < cutoff:
-            del vocab[char]
+    return _prune_character_vocab(_count_characters(series, weights), cutoff)
 
-    return vocab
 
-
-def set_character_vocab(series: Any):
+@weighted
+@mapreduce(combine=combine_set)
+def set_character_vocab(series: Any, weights: Any = None):
     """ Create a Character Vocabulary using a Set
 
     :param series: Any series of data
+    :param weights: (Optional) Number of occurrences of every row (not used by a set)
     :return: set
     """
     vocab = set()
@@ -57,14 +109,64 @@ def set_character_vocab(series: Any):
     return vocab
 
 
-def nltk_vocab(tokens: Any, cutoff: int = 2):
+def _to_nltk_vocab(vocab: Counter, cutoff: int = 2):
+    return Vocabulary(vocab, unk_cutoff=cutoff)
+
+
+@weighted
+@mapreduce(combine=combine_counter, finalize=_to_nltk_vocab, partial=_count_tokens)
+@nltk_requires('punkt')
+def nltk_vocab(tokens: Any, cutoff: int = 2, weights: Any = None):
     """ Create a Vocabulary using NLTK Vocabulary class
 
     :param tokens: List of Tokens
     :param cutoff: Minimum occurrence to enter the vocab
+    :param weights: (Optional) Number of occurrences of every row
     :return: nltk.lm.Vocabulary
     """
     nltk_dependency_mgt(required=['punkt'])
 
-    tokenized_soup = [x for token in tokens for x in token]
-    return Vocabulary(tokenized_soup, unk_cutoff=cutoff)
+    return _to_nltk_vocab(_count_tokens(tokens, weights), cutoff)
+
+
+def _count_multi(series: Any, **kwargs):
+    word_count, vocab = [], Counter()
+
+    def strings():
+        for data in series:
+            word_count.append(len(data))
+            vocab.update(data)
+            yield ''.join(data)
+
+    char_vocab = _count_codepoints(strings())
+    return {'word_count': word_count, 'vocab': vocab, 'char_vocab': char_vocab, 'char_set': set(char_vocab)}
+
+
+def _combine_multi(a: Dict, b: Dict):
+    a['word_count'].extend(b['word_count'])
+    a['vocab'].update(b['vocab'])
+    a['char_vocab'].update(b['char_vocab'])
+    a['char_set'].update(b['char_set'])
+    return a
+
+
+def _finalize_multi(result: Dict, cutoff: int = 2, char_cutoff: int = 0):
+    return {
+        'word_count': list(result['word_count']),
+        'vocab': _prune_vocab(result['vocab'], cutoff),
+        'char_vocab': _prune_character_vocab(result['char_vocab'], char_cutoff),
+        'char_set': set(result['char_set'])
+    }
+
+
+@mapreduce(combine=_combine_multi, finalize=_finalize_multi, partial=_count_multi)
+def multi_vocab(series: Any, cutoff: int = 2, char_cutoff: int = 0):
+    """ Compose the word count of every row, a Vocabulary, a Character Vocabulary and a Character Set in a
+    single pass over the series
+
+    :param series: Any series of data
+    :param cutoff: Minimum occurrence to enter the Vocab
+    :param char_cutoff: Minimum occurrence to enter the Character Vocab
+    :return: Dict of 'word_count' (List), 'vocab' (Counter), 'char_vocab' (Counter) and 'char_set' (set)
+    """
+    return _finalize_multi(_count_multi(series), cutoff, char_cutoff)
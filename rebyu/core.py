@@ -1,6 +1,6 @@
 import time
 
-from typing import Any, Dict, List
+from typing import Any, AnyStr, Dict, List, Optional, Union
 
 from rebyu.base import BaseRebyu
 from rebyu.pipeline.base import BasePipeline
@@ -20,5 +20,11 @@ class Rebyu(BaseRebyu):
 
     def __init__(self,
                  data: Any,
-                 pipeline: BasePipeline = BLANK_PIPELINE):
-        super(Rebyu, self).__init__(data, pipeline)
+                 pipeline: BasePipeline = BLANK_PIPELINE,
+                 string_storage: Optional[AnyStr] = None,
+                 columns: Optional[Union[List[AnyStr], AnyStr]] = None,
+                 dtype: Optional[Dict] = None,
+                 copy: bool = True):
+        super(Rebyu, self).__init__(
+            data, pipeline, string_storage=string_storage, columns=columns, dtype=dtype, copy=copy
+        )
@@ -1,4 +1,5 @@
-from rebyu.pipeline.base import BaseStep, BasePipeline
+from rebyu.pipeline.base import BaseStep, BasePipeline, FusedStep
+from rebyu.pipeline.cache import StepCache
 from rebyu.pipeline.step import (
     RebyuStep,
     PREP_CAST_NAN,
@@ -10,16 +11,22 @@ from rebyu.pipeline.step import (
     PREP_REMOVE_WHITESPACES,
     PREP_REMOVE_SPECIFICS,
     PREP_REMOVE_EMOJIS,
+    PREP_REMOVE_MULTI_PATTERNS,
     PREP_REMOVE_STOPWORDS,
+    PREP_FILTER_STOPWORDS,
     PREP_REPLACE_WORD,
     PREP_CENSOR_USERNAME,
     PREP_CENSOR_URLS,
     PREP_EXPAND_CONTRACTIONS,
     PREP_SENTENCE_LENGTH,
     PREP_WORD_COUNT,
+    PREP_COMPACT_TOKENS,
     COMPOSE_COUNTER_VOCAB,
+    COMPOSE_ID_VOCAB,
+    COMPOSE_DOC_TERM_MATRIX,
     COMPOSE_COUNTER_CHARVOCAB,
     COMPOSE_SET_CHARVOCAB,
+    COMPOSE_MULTI_VOCAB,
 
     # TextBlob
     PREP_TEXTBLOB,
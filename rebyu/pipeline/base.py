@@ -1,10 +1,19 @@
 import copy
 
+import numpy as np
 import pandas as pd
 
-from typing import Any, AnyStr, List, Dict, Optional
+from typing import Any, AnyStr, List, Dict, Optional, Tuple
 
+from rebyu.pipeline.cache import StepCache
+from rebyu.pipeline.executor import ParallelExecutor, apply_series
+from rebyu.pipeline.profile import StepProfiler
+from rebyu.pipeline.scheduler import DAGScheduler
+from rebyu.util.batch import Batch, get_batch
+from rebyu.util.dedupe import factorize, broadcast, row_aligned, is_weighted
+from rebyu.util.dependency import nltk_dependency_mgt, get_nltk_resources
 from rebyu.util.logger import Logger
+from rebyu.util.mapreduce import get_mapreduce, combine_rows, combine_list
 
 
 class BaseStep(object):
@@ -35,7 +44,15 @@ class BaseStep(object):
 
         self.next = None
 
-    def run(self, data: pd.DataFrame, composition: Dict, analysis: Dict):
+    def run(self,
+            data: pd.DataFrame,
+            composition: Dict,
+            analysis: Dict,
+            executor: Optional[ParallelExecutor] = None,
+            partials: Optional[Dict] = None,
+            cache: Optional[StepCache] = None,
+            profiler: Optional[StepProfiler] = None,
+            dedupe: bool = False):
         """ Run the step according to it's type.
 
         - PREPROCESS: Takes data from Rebyu.data as source to operate and output to the target column.
@@ -45,19 +62,198 @@ class BaseStep(object):
         :param data: The input dataset (pd.DataFrame).
         :param composition: The composition store (Dict).
         :param analysis: The analysis store (Dict).
+        :param executor: (Optional) ParallelExecutor to run PREPROCESS and map/reduce capable steps in chunks.
+        :param partials: (Optional) Partial store. Map/reduce capable COMPOSE and ANALYZE steps output their
+            un-finalized partial result into it (keyed by BaseStep.key) instead of the composition/analysis store.
+        :param cache: (Optional) StepCache to load the output from (or store it into).
+        :param profiler: (Optional) StepProfiler to record the computation of the step.
+        :param dedupe: Determines whether the step runs on the distinct values of its source column only.
         :return: data, composition, analysis.
         """
+        series = data[self.source]
+        kwargs = {'executor': executor, 'partial': partials is not None, 'cache': cache, 'dedupe': dedupe}
+        if profiler is not None:
+            result = profiler.call(self, len(series), self.compute, series, **kwargs)
+        else:
+            result = self.compute(series, **kwargs)
+        return self.store(result, data=data, composition=composition, analysis=analysis, partials=partials)
+
+    def mergeable(self) -> bool:
+        """ Check whether the output of the step can be merged across chunks (map/reduce contract).
+
+        :return: bool
+        """
+        return self.stype != self.STEP_PREPROCESS and get_mapreduce(self.func) is not None
+
+    def row_wise(self) -> bool:
+        """ Check whether the step outputs one value per row: PREPROCESS steps, and ANALYZE steps whose
+        map/reduce contract concatenates the rows of its chunks.
+
+        :return: bool
+        """
         if self.stype == self.STEP_PREPROCESS:
-            data[self.target] = data[self.source].apply(self.func, **self.func_args)
+            return True
+        contract = get_mapreduce(self.func)
+        return self.stype == self.STEP_ANALYZE and contract is not None and \
+            contract.combine in (combine_rows, combine_list)
+
+    def compute(self,
+                series: pd.Series,
+                executor: Optional[ParallelExecutor] = None,
+                partial: bool = False,
+                cache: Optional[StepCache] = None,
+                dedupe: bool = False) -> Any:
+        """ Compute the output of the step from its source column, without storing it.
+
+        :param series: The source column (pd.Series).
+        :param executor: (Optional) ParallelExecutor to run PREPROCESS and map/reduce capable steps in chunks.
+        :param partial: Determines whether map/reduce capable steps return their un-finalized partial result.
+        :param cache: (Optional) StepCache to load the output from (or store it into).
+        :param dedupe: Determines whether the step runs on the distinct values of the column only (see
+            compute_deduped).
+        :return: Output of the step.
+        """
+        partial = partial and self.mergeable()
+        if dedupe:
+            return self.compute_deduped(series, executor=executor, partial=partial, cache=cache)
+
+        if cache is not None:
+            hit, result = cache.load(self, series, partial=partial)
+            if hit:
+                return result
+
+        result = self._compute(series, executor=executor, partial=partial)
+        if cache is not None:
+            cache.save(self, series, result, partial=partial)
+        return result
+
+    def compute_deduped(self,
+                        series: pd.Series,
+                        executor: Optional[ParallelExecutor] = None,
+                        partial: bool = False,
+                        cache: Optional[StepCache] = None) -> Any:
+        """ Compute the output of the step on the distinct values of its source column only.
+
+        - PREPROCESS and row-wise ANALYZE (see row_wise): the output of the distinct values is broadcast back to
+          every row. Other ANALYZE steps run on the whole column.
+        - COMPOSE: the function gets the distinct values with their multiplicity as `weights` (see
+          rebyu.util.dedupe.weighted). Functions without weights run on the whole column.
+
+        Columns without duplicates (or with unhashable values) are computed as a whole.
+
+        :param series: The source column (pd.Series).
+        :param executor: (Optional) ParallelExecutor to run PREPROCESS and map/reduce capable steps in chunks.
+        :param partial: Determines whether map/reduce capable steps return their un-finalized partial result.
+        :param cache: (Optional) StepCache to load the output from (or store it into).
+        :return: Output of the step.
+        """
+        kwargs = {'executor': executor, 'partial': partial, 'cache': cache}
+        if self.stype == self.STEP_ANALYZE and not self.row_wise():
+            return self.compute(series, **kwargs)
+
+        try:
+            codes, uniques = factorize(series)
+        except TypeError:
+            return self.compute(series, **kwargs)
+
+        if len(uniques) == len(series):
+            return self.compute(series, **kwargs)
 
         if self.stype == self.STEP_COMPOSE:
-            composition[self.target] = self.func(data[self.source], **self.func_args)
+            if not is_weighted(self.func):
+                return self.compute(series, **kwargs)
+
+            func_args = dict(self.func_args, weights=np.bincount(codes))
+            if partial:
+                return get_mapreduce(self.func).map(self.func, uniques, func_args)
+            return self.func(uniques, **func_args)
+
+        result = self.compute(uniques, **kwargs)
+        if self.stype == self.STEP_PREPROCESS:
+            return broadcast(result, codes, index=series.index)
+        if not row_aligned(result, len(uniques)):
+            raise ValueError(f'Step {self.sid} does not output one value per row ({type(result).__name__}).')
+        return broadcast(result, codes)
+
+    def _compute(self, series: pd.Series, executor: Optional[ParallelExecutor] = None, partial: bool = False) -> Any:
+        if self.stype == self.STEP_PREPROCESS:
+            if executor is not None:
+                return executor.apply(series, self.func, self.func_args)
+            return apply_series(series, self.func, self.func_args)
+
+        if self.mergeable() and (partial or executor is not None):
+            contract = get_mapreduce(self.func)
+            if executor is not None:
+                merged = executor.map_partial(series, self.func, self.func_args)
+            else:
+                merged = contract.map(self.func, series, self.func_args)
+            return merged if partial else contract.output(merged, self.func_args)
+
+        return self.func(series, **self.func_args)
+
+    def store(self,
+              result: Any,
+              data: pd.DataFrame,
+              composition: Dict,
+              analysis: Dict,
+              partials: Optional[Dict] = None):
+        """ Store the output of the step according to it's type.
+
+        :param result: Output of the step.
+        :param data: The input dataset (pd.DataFrame).
+        :param composition: The composition store (Dict).
+        :param analysis: The analysis store (Dict).
+        :param partials: (Optional) Partial store, for the partial results of map/reduce capable steps.
+        :return: data, composition, analysis.
+        """
+        if partials is not None and self.mergeable():
+            partials[self.key()] = result
+            return data, composition, analysis
+
+        if self.stype == self.STEP_PREPROCESS:
+            data[self.target] = result
+
+        if self.stype == self.STEP_COMPOSE:
+            composition[self.target] = result
 
         if self.stype == self.STEP_ANALYZE:
-            analysis[self.target] = self.func(data[self.source], **self.func_args)
+            analysis[self.target] = result
 
         return data, composition, analysis
 
+    def key(self) -> Tuple[AnyStr, Any]:
+        """ Get the key the step writes to, as a (store, key) pair.
+
+        :return: ('data' | 'composition' | 'analysis', target)
+        """
+        store = {
+            self.STEP_PREPROCESS: 'data',
+            self.STEP_COMPOSE: 'composition',
+            self.STEP_ANALYZE: 'analysis'
+        }.get(self.stype)
+        return store, self.target
+
+    def reads(self) -> set:
+        """ Get the keys the step reads from, as (store, key) pairs.
+
+        :return: set
+        """
+        return {('data', self.source)}
+
+    def writes(self) -> set:
+        """ Get the keys the step writes to, as (store, key) pairs.
+
+        :return: set
+        """
+        return {self.key()}
+
+    def resources(self) -> List[AnyStr]:
+        """ Get the NLTK resources the step function declares (see nltk_requires).
+
+        :return: List of String (packages)
+        """
+        return get_nltk_resources(self.func)
+
     def copy(self, deep: bool = True):
         """ Copy the instance of this class.
 
@@ -122,10 +318,106 @@ class BaseStep(object):
         self.func = func
         return self
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['next'] = None
+        return state
+
+    def __len__(self):
+        return 1
+
     def __repr__(self):
         return f'Step(sid={self.sid}, stype={self.stype}, source={self.source}, target={self.target})'
 
 
+class FusedFunction(object):
+    """
+    Fused Function
+
+    A per-row composition of several PREPROCESS functions, applied in order with their own arguments.
+    """
+
+    def __init__(self, funcs: List[Tuple[Any, Dict[AnyStr, Any]]]):
+        self.funcs = funcs
+
+    def __call__(self, value: Any):
+        for func, func_args in self.funcs:
+            value = func(value, **func_args)
+        return value
+
+    @property
+    def batch(self) -> Optional[Batch]:
+        """ Batch version of the fused function, available when any of its functions has one (see Batch).
+
+        Functions with an accepting batch version run over the whole series, the others run as fused
+        per-row passes in between.
+
+        :return: Batch | None
+        """
+        if any(get_batch(func) is not None for func, _ in self.funcs):
+            return Batch(func=self._batch, accepts=_accepts_any)
+        return None
+
+    def _batch(self, series: pd.Series) -> pd.Series:
+        pending = []
+        for func, func_args in self.funcs:
+            contract = get_batch(func)
+            if contract is None:
+                pending.append((func, func_args))
+                continue
+
+            if pending:
+                series = series.apply(FusedFunction(pending))
+                pending = []
+
+            if contract.accepts(series):
+                series = contract(series, **func_args)
+            else:
+                pending.append((func, func_args))
+
+        if pending:
+            series = series.apply(FusedFunction(pending))
+        return series
+
+
+def _accepts_any(series: Any) -> bool:
+    return True
+
+
+class FusedStep(BaseStep):
+    """
+    Fused Step
+
+    A run of consecutive in-place PREPROCESS steps (same source and target column) executed as a single
+    pass over the column, producing the same result as running the steps one at a time.
+    """
+
+    def __init__(self, steps: List[BaseStep]):
+        super(FusedStep, self).__init__(
+            sid='+'.join(step.sid for step in steps),
+            stype=BaseStep.STEP_PREPROCESS,
+            source=steps[0].source,
+            target=steps[-1].target,
+            func=FusedFunction([(step.func, step.func_args) for step in steps])
+        )
+        self.steps = steps
+
+    @staticmethod
+    def fusable(step: BaseStep) -> bool:
+        """ Check whether a step can take part in a fused run (in-place PREPROCESS).
+
+        :param step: BaseStep
+        :return: bool
+        """
+        return step.stype == BaseStep.STEP_PREPROCESS and step.source == step.target
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __repr__(self):
+        return f'FusedStep(sid={self.sid}, source={self.source}, target={self.target}, steps={len(self.steps)})'
+
+
 class BasePipeline(object):
 
     def __init__(self, pid: AnyStr, steps: List[BaseStep]):
@@ -166,6 +458,8 @@ class BasePipeline(object):
         if self.curr is None:
             return False
 
+        nltk_dependency_mgt(required=self.curr.resources())
+
         if verbose:
             self.pipeline_logger.info(f'[{self.curr.stype}] - Running step {self.curr.sid}')
 
@@ -179,26 +473,227 @@ class BasePipeline(object):
 
         return True
 
-    def run(self, data: pd.DataFrame, composition: Dict, analysis: Dict, verbose: bool = False):
+    def run(self,
+            data: pd.DataFrame,
+            composition: Dict,
+            analysis: Dict,
+            verbose: bool = False,
+            fuse: bool = True,
+            workers: int = 1,
+            chunksize: Optional[int] = None,
+            schedule: Optional[AnyStr] = None,
+            max_workers: Optional[int] = None,
+            partials: Optional[Dict] = None,
+            cache: Optional[StepCache] = None,
+            profiler: Optional[StepProfiler] = None,
+            dedupe: bool = False):
         """ Run through the steps in the pipeline. Processing all the steps to operate.
 
         :param data: The input dataset (pd.DataFrame).
         :param composition: The composition store (Dict).
         :param analysis: The analysis store (Dict).
         :param verbose: Determines whether verbose output is enabled.
+        :param fuse: Determines whether consecutive in-place PREPROCESS steps are fused into a single pass.
+        :param workers: Number of worker processes for PREPROCESS and map/reduce capable steps (1 is serial).
+        :param chunksize: (Optional) Number of rows per chunk sent to a worker.
+        :param schedule: (Optional) Run independent steps concurrently on a 'thread' or 'process' pool.
+        :param max_workers: (Optional) Size of the scheduler pool.
+        :param partials: (Optional) Partial store for map/reduce capable COMPOSE and ANALYZE steps (see BaseStep.run).
+        :param cache: (Optional) StepCache to reuse step outputs from previous runs.
+        :param profiler: (Optional) StepProfiler to record every step of the run. Steps are not fused while
+            profiling, so every step gets its own record.
+        :param dedupe: Determines whether steps run on the distinct values of their source column only
+            (see BaseStep.compute_deduped).
         :return:
         """
+        executor = ParallelExecutor(workers=workers, chunksize=chunksize) if workers > 1 else None
+        if profiler is not None:
+            profiler.start()
+
         self.pipeline_logger.info(f'[{self.pid}] - Running pipeline')
-        out = True
-        while out:
-            out = self.step(
-                data=data,
-                composition=composition,
-                analysis=analysis,
-                verbose=verbose
-            )
+        self.prepare()
+        try:
+            units = self.plan(fuse=fuse and profiler is None)
+            if schedule is not None:
+                self._run_scheduled(
+                    units=units,
+                    data=data,
+                    composition=composition,
+                    analysis=analysis,
+                    verbose=verbose,
+                    executor=executor,
+                    partials=partials,
+                    cache=cache,
+                    profiler=profiler,
+                    schedule=schedule,
+                    max_workers=max_workers,
+                    dedupe=dedupe
+                )
+            else:
+                for unit in units:
+                    self._run_unit(
+                        unit=unit,
+                        data=data,
+                        composition=composition,
+                        analysis=analysis,
+                        verbose=verbose,
+                        executor=executor,
+                        partials=partials,
+                        cache=cache,
+                        profiler=profiler,
+                        dedupe=dedupe
+                    )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if profiler is not None:
+                profiler.stop()
         self.pipeline_logger.info(f'[{self.pid}] - Finished pipeline')
 
+    def prepare(self) -> List[AnyStr]:
+        """ Check (and download) the NLTK resources declared by the steps of the pipeline, once before running
+        them, so the step functions do not look them up for every row.
+
+        :return: List of String (packages)
+        """
+        resources = list(dict.fromkeys(
+            resource for step in self.steps_info() for resource in step.resources()
+        ))
+        nltk_dependency_mgt(required=resources)
+        return resources
+
+    def plan(self, fuse: bool = True) -> List[BaseStep]:
+        """ Plan the remaining steps (from the current step) into execution units.
+
+        Consecutive PREPROCESS steps that read and write the same column are grouped into a FusedStep.
+
+        :param fuse: Determines whether consecutive in-place PREPROCESS steps are fused.
+        :return: List of BaseStep (or FusedStep)
+        """
+        units = []
+        group = []
+
+        current = self.curr
+        while current:
+            if fuse and FusedStep.fusable(current) and (not group or group[-1].target == current.source):
+                group.append(current)
+            else:
+                units.extend(self._close_group(group))
+                group = [current] if fuse and FusedStep.fusable(current) else []
+                if not group:
+                    units.append(current)
+            current = current.next
+
+        units.extend(self._close_group(group))
+        return units
+
+    @staticmethod
+    def _close_group(group: List[BaseStep]) -> List[BaseStep]:
+        if len(group) > 1:
+            return [FusedStep(group)]
+        return list(group)
+
+    def _run_unit(self,
+                  unit: BaseStep,
+                  data: pd.DataFrame,
+                  composition: Dict,
+                  analysis: Dict,
+                  verbose: bool = False,
+                  executor: Optional[ParallelExecutor] = None,
+                  partials: Optional[Dict] = None,
+                  cache: Optional[StepCache] = None,
+                  profiler: Optional[StepProfiler] = None,
+                  dedupe: bool = False):
+        """ Run a single execution unit (step or fused step) and advance the pipeline state.
+
+        :param unit: BaseStep (or FusedStep)
+        :param data: The input dataset (pd.DataFrame).
+        :param composition: The composition store (Dict).
+        :param analysis: The analysis store (Dict).
+        :param verbose: Determines whether verbose output is enabled.
+        :param executor: (Optional) ParallelExecutor
+        :param partials: (Optional) Partial store
+        :param cache: (Optional) StepCache
+        :param profiler: (Optional) StepProfiler
+        :param dedupe: Determines whether the unit runs on the distinct values of its source column only.
+        :return:
+        """
+        if verbose:
+            self.pipeline_logger.info(f'[{unit.stype}] - Running step {unit.sid}')
+
+        unit.run(
+            data=data,
+            composition=composition,
+            analysis=analysis,
+            executor=executor,
+            partials=partials,
+            cache=cache,
+            profiler=profiler,
+            dedupe=dedupe
+        )
+
+        if verbose:
+            self.pipeline_logger.info(f'[{unit.stype}] - Finished step {unit.sid}')
+
+        self._advance(len(unit))
+
+    def _run_scheduled(self,
+                       units: List[BaseStep],
+                       data: pd.DataFrame,
+                       composition: Dict,
+                       analysis: Dict,
+                       verbose: bool = False,
+                       executor: Optional[ParallelExecutor] = None,
+                       partials: Optional[Dict] = None,
+                       cache: Optional[StepCache] = None,
+                       profiler: Optional[StepProfiler] = None,
+                       schedule: AnyStr = DAGScheduler.MODE_THREAD,
+                       max_workers: Optional[int] = None,
+                       dedupe: bool = False):
+        """ Run execution units concurrently following their dependency graph (see DAGScheduler).
+
+        :param units: List of BaseStep (or FusedStep)
+        :param data: The input dataset (pd.DataFrame).
+        :param composition: The composition store (Dict).
+        :param analysis: The analysis store (Dict).
+        :param verbose: Determines whether verbose output is enabled.
+        :param executor: (Optional) ParallelExecutor
+        :param partials: (Optional) Partial store
+        :param cache: (Optional) StepCache
+        :param profiler: (Optional) StepProfiler
+        :param schedule: Scheduler pool ('thread' or 'process')
+        :param max_workers: (Optional) Size of the scheduler pool.
+        :param dedupe: Determines whether the units run on the distinct values of their source column only.
+        :return:
+        """
+        def on_start(unit: BaseStep):
+            if verbose:
+                self.pipeline_logger.info(f'[{unit.stype}] - Running step {unit.sid}')
+
+        def on_finish(unit: BaseStep):
+            if verbose:
+                self.pipeline_logger.info(f'[{unit.stype}] - Finished step {unit.sid}')
+
+        scheduler = DAGScheduler(units, mode=schedule, max_workers=max_workers)
+        scheduler.run(
+            data=data,
+            composition=composition,
+            analysis=analysis,
+            executor=executor,
+            partials=partials,
+            cache=cache,
+            profiler=profiler,
+            on_start=on_start,
+            on_finish=on_finish,
+            dedupe=dedupe
+        )
+        self._advance(sum(len(unit) for unit in units))
+
+    def _advance(self, n: int):
+        for _ in range(n):
+            self.curr = self.curr.next
+            self.curr_idx += 1
+
     def add(self, step: BaseStep) -> BaseStep:
         """ Add a new step to the pipeline.
 
@@ -283,6 +778,20 @@ class BasePipeline(object):
             current = current.next
         return out
 
+    def input_columns(self) -> List[AnyStr]:
+        """ Get the data columns the pipeline reads before any of its steps writes them, i.e. the columns
+        to load from the input.
+
+        :return: List of Strings
+        """
+        columns, written = [], set()
+        for step in self.steps_info():
+            for store, key in step.reads():
+                if store == 'data' and key not in written and key not in columns:
+                    columns.append(key)
+            written |= {key for store, key in step.writes() if store == 'data'}
+        return columns
+
     def state(self) -> (Optional[int], Optional[BaseStep]):
         """ Get the current state of the pipeline progress.
 
@@ -0,0 +1,224 @@
+import hashlib
+import inspect
+import os
+import pathlib
+import pickle
+import shutil
+import tempfile
+import threading
+import types
+
+from typing import Any, AnyStr, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from rebyu.util.logger import Logger
+from rebyu.util.mapreduce import get_mapreduce
+from rebyu.version import VERSION
+
+
+def _code_digest(code: types.CodeType) -> AnyStr:
+    # repr() of a nested code object (comprehension, lambda, ...) holds its memory address, hash it recursively
+    digest = hashlib.sha256(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        digest.update(_code_digest(const).encode() if isinstance(const, types.CodeType) else repr(const).encode())
+    return digest.hexdigest()
+
+
+def func_fingerprint(func: Any) -> AnyStr:
+    """ Identify a function by its qualified name and bytecode (composed functions by their members, map/reduce
+    capable functions together with the partial, combine and finalize functions of their contract).
+
+    :param func: Any function
+    :return: str
+    """
+    if hasattr(func, 'funcs'):
+        return '|'.join(f'{func_fingerprint(f)}{_args_key(args)}' for f, args in func.funcs)
+
+    name = f'{getattr(func, "__module__", "")}.{getattr(func, "__qualname__", repr(func))}'
+    # decorated functions (e.g. nltk_requires) are identified by the code of the function they wrap
+    code = getattr(inspect.unwrap(func), '__code__', None)
+    fingerprint = name if code is None else f'{name}:{_code_digest(code)}'
+
+    contract = get_mapreduce(func)
+    if contract is not None:
+        members = (contract.partial, contract.combine, contract.finalize)
+        fingerprint += '|mapreduce(' + ','.join(func_fingerprint(f) if f else '' for f in members) + ')'
+    return fingerprint
+
+
+def step_fingerprint(step: Any, partial: bool = False) -> AnyStr:
+    """ Fingerprint a step from its sid, type, function identity and function arguments (and the version of
+    rebyu).
+
+    :param step: BaseStep
+    :param partial: Whether the output is the un-finalized partial result
+    :return: str (hex digest)
+    """
+    key = f'{VERSION}|{step.sid}|{step.stype}|{func_fingerprint(step.func)}|{_args_key(step.func_args)}|{partial}'
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _args_key(func_args: dict) -> AnyStr:
+    # sets have no stable order (repr), arguments are normalised first
+    return repr(sorted((key, _hashable(value)) for key, value in func_args.items()))
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(x) for x in value)
+    if isinstance(value, dict):
+        return tuple((key, _hashable(x)) for key, x in value.items())
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(repr(x) for x in value))
+    if isinstance(value, np.ndarray):
+        return _hashable(value.tolist())
+    return value
+
+
+def series_fingerprint(series: pd.Series) -> AnyStr:
+    """ Fingerprint the content (values, index and dtype) of a column.
+
+    :param series: pd.Series
+    :return: str (hex digest)
+    """
+    digest = hashlib.sha256(str(series.dtype).encode())
+    try:
+        digest.update(pd.util.hash_pandas_object(series, index=True).values.tobytes())
+    except TypeError:
+        # Unhashable cells (e.g. lists of tokens) are hashed as tuples
+        digest.update(pd.util.hash_pandas_object(series.map(_hashable), index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+class StepCache(object):
+    """
+    Step Cache
+
+    An on-disk, content-addressed cache of step outputs. An entry is keyed by the fingerprint of the step
+    (sid, function identity and arguments) and the fingerprint of its input column, so a step is only
+    recomputed when either of them changes. Entries are evicted least-recently-used first once the cache
+    grows over `max_bytes`.
+    """
+
+    def __init__(self, path: AnyStr = '.rebyu_cache', max_bytes: Optional[int] = 2 * 1024 ** 3):
+        self.path = pathlib.Path(path)
+        self.max_bytes = max_bytes
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.cache_logger = Logger(self.__class__.__name__)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def entry(self, step: Any, series: pd.Series, partial: bool = False) -> pathlib.Path:
+        """ Get the path of the cache entry of a step and its input column.
+
+        :param step: BaseStep
+        :param series: The source column (pd.Series).
+        :param partial: Whether the output is the un-finalized partial result
+        :return: pathlib.Path
+        """
+        return self.path / step_fingerprint(step, partial) / f'{series_fingerprint(series)}.pkl'
+
+    def load(self, step: Any, series: pd.Series, partial: bool = False) -> Tuple[bool, Any]:
+        """ Load the stored output of a step, if there is one.
+
+        :param step: BaseStep
+        :param series: The source column (pd.Series).
+        :param partial: Whether the output is the un-finalized partial result
+        :return: (hit, output)
+        """
+        entry = self.entry(step, series, partial)
+        try:
+            with open(entry, 'rb') as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            return False, None
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # corrupt entry, or one referring to code that does not exist anymore (e.g. a renamed class)
+            self.cache_logger.warning(f'Cache entry of {step.sid} can not be loaded, evicting it')
+            entry.unlink(missing_ok=True)
+            return False, None
+
+        os.utime(entry)
+        return True, result
+
+    def save(self, step: Any, series: pd.Series, result: Any, partial: bool = False):
+        """ Store the output of a step.
+
+        :param step: BaseStep
+        :param series: The source column (pd.Series).
+        :param result: Output of the step.
+        :param partial: Whether the output is the un-finalized partial result
+        :return:
+        """
+        entry = self.entry(step, series, partial)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            self.cache_logger.warning(f'Output of {step.sid} is not picklable, skipping cache')
+            return
+
+        fd, tmp = tempfile.mkstemp(dir=entry.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, entry)
+
+        self.evict()
+
+    def size(self) -> int:
+        """ Get the total size of the cache entries in bytes.
+
+        :return: int
+        """
+        return sum(entry.stat().st_size for entry in self.path.glob('*/*.pkl'))
+
+    def evict(self):
+        """ Evict least-recently-used entries until the cache fits in `max_bytes`.
+
+        :return:
+        """
+        if self.max_bytes is None:
+            return
+
+        with self._lock:
+            entries = sorted(
+                ((entry.stat().st_mtime, entry.stat().st_size, entry) for entry in self.path.glob('*/*.pkl')),
+                key=lambda x: x[0]
+            )
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in entries:
+                if total <= self.max_bytes:
+                    break
+                entry.unlink(missing_ok=True)
+                total -= size
+
+    def invalidate(self, step: Any = None):
+        """ Invalidate the stored outputs of a step, or the whole cache.
+
+        :param step: (Optional) BaseStep, invalidates every entry when not given
+        :return:
+        """
+        with self._lock:
+            if step is None:
+                targets = [x for x in self.path.iterdir() if x.is_dir()]
+            else:
+                targets = [self.path / step_fingerprint(step, partial) for partial in (False, True)]
+
+            for target in targets:
+                shutil.rmtree(target, ignore_errors=True)
+
+    def __repr__(self):
+        return f'StepCache(path={self.path}, max_bytes={self.max_bytes})'
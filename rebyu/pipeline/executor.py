@@ -0,0 +1,147 @@
+import math
+import pickle
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, AnyStr, Dict, List, Optional
+
+import pandas as pd
+
+from rebyu.util.batch import get_batch, keep_string_dtype
+from rebyu.util.logger import Logger
+from rebyu.util.mapreduce import get_mapreduce
+
+
+def apply_series(series: pd.Series, func: Any, func_args: Dict[AnyStr, Any]) -> pd.Series:
+    """ Apply a row-wise (PREPROCESS) function to a series. The batch version of the function is used instead
+    when it has one that accepts the series (see rebyu.util.batch). String columns keep their string dtype
+    (e.g. string[pyarrow]).
+
+    :param series: The source column (pd.Series).
+    :param func: Row-wise function.
+    :param func_args: Function arguments (Dict).
+    :return: pd.Series
+    """
+    contract = get_batch(func)
+    if contract is not None and contract.accepts(series):
+        return keep_string_dtype(contract(series, **func_args), series)
+    return keep_string_dtype(series.apply(func, **func_args), series)
+
+
+def _apply_chunk(func: Any, func_args: Dict[AnyStr, Any], chunk: pd.Series) -> pd.Series:
+    return apply_series(chunk, func, func_args)
+
+
+def _map_chunk(func: Any, func_args: Dict[AnyStr, Any], chunk: pd.Series) -> Any:
+    return get_mapreduce(func).map(func, chunk, func_args)
+
+
+class ParallelExecutor(object):
+    """
+    Parallel Executor
+
+    Runs row-wise (PREPROCESS) functions and map/reduce capable (COMPOSE, ANALYZE) functions over chunks of
+    a column in a process pool. Results are put back in the original row order.
+
+    Functions (and their arguments) have to be picklable to be sent to the workers, otherwise the step
+    falls back to running in the current process.
+    """
+
+    def __init__(self, workers: int = 2, chunksize: Optional[int] = None):
+        self.workers = workers
+        self.chunksize = chunksize
+
+        self.pool = None
+        self.executor_logger = Logger(self.__class__.__name__)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def start(self):
+        """ Start the process pool.
+
+        :return:
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def shutdown(self):
+        """ Shutdown the process pool.
+
+        :return:
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def chunks(self, series: pd.Series) -> List[pd.Series]:
+        """ Split a series into contiguous chunks.
+
+        :param series: pd.Series
+        :return: List of pd.Series
+        """
+        chunksize = self.chunksize or max(1, math.ceil(len(series) / (self.workers * 4)))
+        return [series.iloc[idx:idx + chunksize] for idx in range(0, len(series), chunksize)]
+
+    def supports(self, func: Any, func_args: Dict[AnyStr, Any]) -> bool:
+        """ Check whether a function and its arguments can be sent to the worker processes.
+
+        :param func: Any function
+        :param func_args: Function arguments (Dict)
+        :return: bool
+        """
+        try:
+            pickle.dumps((func, func_args))
+        except (pickle.PicklingError, AttributeError, TypeError):
+            self.executor_logger.warning(f'{func} is not picklable, running in the current process')
+            return False
+        return True
+
+    def apply(self, series: pd.Series, func: Any, func_args: Dict[AnyStr, Any]) -> pd.Series:
+        """ Apply a row-wise function over the chunks of a series in parallel.
+
+        :param series: The source column (pd.Series).
+        :param func: Row-wise function.
+        :param func_args: Function arguments (Dict).
+        :return: pd.Series (same index and order as the source)
+        """
+        if len(series) == 0 or not self.supports(func, func_args):
+            return apply_series(series, func, func_args)
+
+        self.start()
+        results = list(self.pool.map(_apply_chunk, repeat(func), repeat(func_args), self.chunks(series)))
+        return pd.concat(results)
+
+    def map_partial(self, series: pd.Series, func: Any, func_args: Dict[AnyStr, Any]) -> Any:
+        """ Compute the partial results of a map/reduce capable function over the chunks of a series in parallel,
+        and combine them (without finalizing).
+
+        :param series: The source column (pd.Series).
+        :param func: Function with a MapReduce contract.
+        :param func_args: Function arguments (Dict).
+        :return: Merged partial result
+        """
+        contract = get_mapreduce(func)
+        if len(series) == 0 or not self.supports(func, func_args):
+            return contract.map(func, series, func_args)
+
+        self.start()
+        partials = self.pool.map(_map_chunk, repeat(func), repeat(func_args), self.chunks(series))
+        return contract.merge(partials)
+
+    def map_reduce(self, series: pd.Series, func: Any, func_args: Dict[AnyStr, Any]) -> Any:
+        """ Run a map/reduce capable function over the chunks of a series in parallel.
+
+        :param series: The source column (pd.Series).
+        :param func: Function with a MapReduce contract.
+        :param func_args: Function arguments (Dict).
+        :return: Merged result
+        """
+        contract = get_mapreduce(func)
+        if contract is None:
+            return func(series, **func_args)
+        return contract.output(self.map_partial(series, func, func_args), func_args)
@@ -0,0 +1,200 @@
+import sys
+import threading
+import time
+import tracemalloc
+
+from collections import Counter
+from typing import Any, Callable, Dict, List, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import numpy as np
+import pandas as pd
+
+PROFILE_COLUMNS = [
+    'sid', 'stype', 'source', 'target', 'rows', 'wall_time', 'cpu_time', 'rows_per_sec', 'peak_memory', 'output_size'
+]
+
+
+def sizeof(value: Any) -> float:
+    """ Get the size of a step output in bytes, from its memory_usage (pandas) or nbytes (NumPy and array-like
+    objects). Containers (lists, tuples, sets, dicts and Counters, or the counts of an NLTK Vocabulary) are
+    estimated shallowly, from sys.getsizeof of the container and of its items (keys and values). Other outputs
+    are not measured (NaN), they are not serialized to estimate it.
+
+    :param value: Any output (column, composition or analysis object)
+    :return: float (NaN when unknown)
+    """
+    if isinstance(value, pd.Series):
+        return float(value.memory_usage(deep=True))
+    if isinstance(value, pd.DataFrame):
+        return float(value.memory_usage(deep=True).sum())
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, (int, np.integer)):
+        return float(nbytes)
+    if isinstance(getattr(value, 'counts', None), Counter):
+        # nltk.lm.Vocabulary
+        return float(sys.getsizeof(value) + sizeof(value.counts))
+    if isinstance(value, dict):
+        return float(sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return float(sys.getsizeof(value) + sum(sys.getsizeof(x) for x in value))
+    return np.nan
+
+
+def _max_rss() -> float:
+    # Peak resident set size of the process in bytes (kilobytes on Linux, bytes on macOS)
+    if resource is None:
+        return np.nan
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return float(max_rss if sys.platform == 'darwin' else max_rss * 1024)
+
+
+def profile_call(step: Any,
+                 rows: int,
+                 func: Callable,
+                 *args,
+                 trace_memory: bool = False,
+                 **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """ Call a function and measure it as the computation of a step.
+
+    Peak memory is the growth of the peak resident set size of the process during the call (NaN where
+    resource is not available), it is 0 when the call stays below an earlier peak. With trace_memory, it is
+    measured with tracemalloc instead (started for the call if it is not tracing already). Tracing slows the
+    call down, so wall and CPU times are inflated. Both are approximate when several steps run at the same time.
+
+    :param step: BaseStep
+    :param rows: Number of rows of the source column
+    :param func: Function to call
+    :param trace_memory: Determines whether peak memory is measured
+    :return: (result, record)
+    """
+    started = trace_memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    if trace_memory:
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        base_memory, _ = tracemalloc.get_traced_memory()
+    else:
+        base_memory = _max_rss()
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    result = func(*args, **kwargs)
+    wall_time, cpu_time = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        peak_memory = max(0, peak - base_memory)
+    else:
+        peak_memory = max(0.0, _max_rss() - base_memory) if resource is not None else np.nan
+    if started:
+        tracemalloc.stop()
+
+    record = {
+        'sid': step.sid,
+        'stype': step.stype,
+        'source': step.source,
+        'target': step.target,
+        'rows': rows,
+        'wall_time': wall_time,
+        'cpu_time': cpu_time,
+        'rows_per_sec': rows / wall_time if wall_time > 0 else np.nan,
+        'peak_memory': peak_memory,
+        'output_size': sizeof(result)
+    }
+    return result, record
+
+
+class StepProfiler(object):
+    """
+    Step Profiler
+
+    Records, for every step of a run, the wall time, CPU time, throughput (rows per second), the size of the
+    output and the peak memory delta (growth of the peak RSS, or with trace_memory, the tracemalloc peak, which
+    inflates the timings).
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.records: List[Dict[str, Any]] = []
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+        self._tracing = False
+
+    def start(self):
+        """ Start tracing memory allocations for the run (with trace_memory).
+
+        :return:
+        """
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+
+    def stop(self):
+        """ Stop tracing memory allocations (if started by the profiler).
+
+        :return:
+        """
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def call(self, step: Any, rows: int, func: Callable, *args, **kwargs) -> Any:
+        """ Call a function, measure it as the computation of a step and record it.
+
+        :param step: BaseStep
+        :param rows: Number of rows of the source column
+        :param func: Function to call
+        :return: Result of the function
+        """
+        result, record = profile_call(step, rows, func, *args, trace_memory=self.trace_memory, **kwargs)
+        self.add(record)
+        return result
+
+    def add(self, record: Dict[str, Any]):
+        """ Add a measurement record.
+
+        :param record: Dict
+        :return:
+        """
+        with self._lock:
+            self.records.append(record)
+
+    def update(self, sid: str, **values):
+        """ Update the records of a step (e.g. the output size of a finalized map/reduce output).
+
+        :param sid: Step id
+        :param values: Values of the record (column -> value)
+        :return:
+        """
+        with self._lock:
+            for record in self.records:
+                if record['sid'] == sid:
+                    record.update(values)
+
+    def clear(self):
+        """ Clear the records.
+
+        :return:
+        """
+        with self._lock:
+            self.records.clear()
+
+    def to_frame(self) -> pd.DataFrame:
+        """ Get the records as a DataFrame (one row per step).
+
+        :return: pd.DataFrame
+        """
+        return pd.DataFrame(self.records, columns=PROFILE_COLUMNS)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
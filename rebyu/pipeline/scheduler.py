@@ -0,0 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, AnyStr, Callable, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from rebyu.pipeline.profile import profile_call
+
+
+def _compute(step: Any,
+             series: pd.Series,
+             executor: Any = None,
+             partial: bool = False,
+             cache: Any = None,
+             profile: Optional[bool] = None,
+             dedupe: bool = False) -> Tuple[Any, Optional[Dict]]:
+    # profile: None (not profiled) or whether memory is traced
+    kwargs = {'executor': executor, 'partial': partial, 'cache': cache, 'dedupe': dedupe}
+    if profile is not None:
+        return profile_call(step, len(series), step.compute, series, trace_memory=profile, **kwargs)
+    return step.compute(series, **kwargs), None
+
+
+class DAGScheduler(object):
+    """
+    DAG Scheduler
+
+    Builds a dependency graph of steps from their source and target keys, and runs independent steps at the
+    same time on a thread or process pool. A step waits for an earlier step only when they conflict:
+
+    - read-after-write: it reads a column an earlier step writes.
+    - write-after-write: it writes the same key (column, composition or analysis) as an earlier step.
+    - write-after-read: it overwrites a column an earlier step reads.
+
+    Step outputs are computed on the pool and stored in the current thread.
+    """
+    MODE_THREAD = 'thread'
+    MODE_PROCESS = 'process'
+
+    def __init__(self, steps: List[Any], mode: AnyStr = MODE_THREAD, max_workers: Optional[int] = None):
+        if mode not in (self.MODE_THREAD, self.MODE_PROCESS):
+            raise ValueError(f'Unknown scheduler mode: {mode}')
+
+        self.steps = steps
+        self.mode = mode
+        self.max_workers = max_workers
+        self.dependencies = self.graph(steps)
+
+    @staticmethod
+    def graph(steps: List[Any]) -> List[Set[int]]:
+        """ Build the dependency graph of a list of steps.
+
+        :param steps: List of BaseStep
+        :return: For each step, the set of indexes of the earlier steps it depends on
+        """
+        dependencies = []
+        for idx, step in enumerate(steps):
+            reads, writes = step.reads(), step.writes()
+            dependencies.append({
+                prev_idx for prev_idx, prev in enumerate(steps[:idx])
+                if prev.writes() & reads or prev.writes() & writes or prev.reads() & writes
+            })
+        return dependencies
+
+    def levels(self) -> List[List[int]]:
+        """ Group the steps into levels, where every step of a level only depends on earlier levels.
+
+        :return: List of levels (List of step indexes)
+        """
+        depth = []
+        for deps in self.dependencies:
+            depth.append(max((depth[dep] + 1 for dep in deps), default=0))
+        return [
+            [idx for idx, lvl in enumerate(depth) if lvl == level]
+            for level in range(max(depth, default=-1) + 1)
+        ]
+
+    def run(self,
+            data: pd.DataFrame,
+            composition: Dict,
+            analysis: Dict,
+            executor: Any = None,
+            partials: Optional[Dict] = None,
+            cache: Any = None,
+            profiler: Any = None,
+            on_start: Callable = None,
+            on_finish: Callable = None,
+            dedupe: bool = False):
+        """ Run the steps following the dependency graph.
+
+        :param data: The input dataset (pd.DataFrame).
+        :param composition: The composition store (Dict).
+        :param analysis: The analysis store (Dict).
+        :param executor: (Optional) ParallelExecutor used by the steps (thread mode only).
+        :param partials: (Optional) Partial store for map/reduce capable steps (see BaseStep.run).
+        :param cache: (Optional) StepCache to reuse step outputs from previous runs.
+        :param profiler: (Optional) StepProfiler to record every step of the run.
+        :param on_start: (Optional) Callback with the step, before it is submitted.
+        :param on_finish: (Optional) Callback with the step, after its output is stored.
+        :param dedupe: Determines whether steps run on the distinct values of their source column only.
+        :return:
+        """
+        pool_class = ThreadPoolExecutor if self.mode == self.MODE_THREAD else ProcessPoolExecutor
+        remaining = {idx: set(deps) for idx, deps in enumerate(self.dependencies)}
+        running = {}
+        executor = executor if self.mode == self.MODE_THREAD else None
+
+        with pool_class(max_workers=self.max_workers) as pool:
+            while remaining or running:
+                ready = [idx for idx, deps in remaining.items() if not deps]
+                for idx in ready:
+                    step = self.steps[idx]
+                    del remaining[idx]
+                    if on_start:
+                        on_start(step)
+                    future = pool.submit(
+                        _compute, step, data[step.source], executor, partials is not None, cache,
+                        profiler.trace_memory if profiler is not None else None, dedupe
+                    )
+                    running[future] = idx
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx = running.pop(future)
+                    step = self.steps[idx]
+                    result, record = future.result()
+                    if record is not None:
+                        profiler.add(record)
+                    step.store(
+                        result, data=data, composition=composition, analysis=analysis, partials=partials
+                    )
+                    if on_finish:
+                        on_finish(step)
+
+                    for deps in remaining.values():
+                        deps.discard(idx)
@@ -9,13 +9,18 @@ from rebyu.preprocess.remove import (
     remove_specifics,
     remove_urls,
     remove_emojis,
+    remove_multi_patterns,
     remove_stopwords,
+    filter_stopwords,
     trim_text
 )
 from rebyu.preprocess.transform import (
     cast_nan_str,
     cast_case,
     sub_replace,
+    sentence_length,
+    word_count,
+    compact_tokens,
     expand_contractions,
     censor_username,
     censor_urls,
@@ -38,10 +43,13 @@ from rebyu.compose.vocab import (
     counter_vocab,
     counter_character_vocab,
     set_character_vocab,
+    multi_vocab,
 
     # NLTK
     nltk_vocab
 )
+from rebyu.compose.dtm import doc_term_matrix
+from rebyu.compose.idvocab import id_vocab
 from rebyu.compose.ner import nltk_extract_ner
 from rebyu.compose.pos import nltk_extract_pos_tags
 from rebyu.analysis.sentiment import (
@@ -174,6 +182,15 @@ PREP_REMOVE_EMOJIS = RebyuStep(
 )
 """Remove emojis in 'text' (Rebyu.data)"""
 
+PREP_REMOVE_MULTI_PATTERNS = RebyuStep(
+    sid='rb-remove_multi_patterns',
+    stype=RebyuStep.STEP_PREPROCESS,
+    source='text',
+    target='text',
+    func=remove_multi_patterns
+)
+"""Remove urls, emojis and numerical data in 'text' (Rebyu.data) in a single scan"""
+
 PREP_REMOVE_STOPWORDS = RebyuStep(
     sid='rb-remove_stopwords',
     stype=RebyuStep.STEP_PREPROCESS,
@@ -183,6 +200,15 @@ PREP_REMOVE_STOPWORDS = RebyuStep(
 )
 """Remove stopwords in 'text' (Rebyu.data)"""
 
+PREP_FILTER_STOPWORDS = RebyuStep(
+    sid='rb-filter_stopwords',
+    stype=RebyuStep.STEP_PREPROCESS,
+    source='tokens',
+    target='tokens',
+    func=filter_stopwords
+)
+"""Remove stopwords in 'tokens' (Rebyu.data) without re-tokenizing"""
+
 PREP_REPLACE_WORD = RebyuStep(
     sid='rb-sub_replace',
     stype=BaseStep.STEP_PREPROCESS,
@@ -224,7 +250,7 @@ PREP_SENTENCE_LENGTH = RebyuStep(
     stype=BaseStep.STEP_PREPROCESS,
     source='text',
     target='length',
-    func=lambda x: len(x) if type(x) is str else ''
+    func=sentence_length
 )
 """Return the sentence length of 'text' (Rebyu.data) to 'length'"""
 
@@ -233,10 +259,19 @@ PREP_WORD_COUNT = RebyuStep(
     stype=BaseStep.STEP_PREPROCESS,
     source='tokens',
     target='word_counts',
-    func=lambda x: len(x)
+    func=word_count
 )
 """Return the word count of 'text' (Rebyu.data) to 'word_counts'"""
 
+PREP_COMPACT_TOKENS = RebyuStep(
+    sid='rb-compact_tokens',
+    stype=BaseStep.STEP_PREPROCESS,
+    source='tokens',
+    target='tokens',
+    func=compact_tokens
+)
+"""Compact 'tokens' (Rebyu.data) into a TokenArray (flat token ids and row offsets)"""
+
 COMPOSE_COUNTER_VOCAB = RebyuStep(
     sid='rb-counter_vocab',
     stype=BaseStep.STEP_COMPOSE,
@@ -246,6 +281,24 @@ COMPOSE_COUNTER_VOCAB = RebyuStep(
 )
 """Compose a vocabulary from 'tokens' (Rebyu.data) to 'vocab' using Counter from collections"""
 
+COMPOSE_ID_VOCAB = RebyuStep(
+    sid='rb-id_vocab',
+    stype=BaseStep.STEP_COMPOSE,
+    source='tokens',
+    target='vocab',
+    func=id_vocab
+)
+"""Compose a vocabulary of integer ids from 'tokens' (Rebyu.data) to 'vocab' using IdVocabulary (NumPy counts)"""
+
+COMPOSE_DOC_TERM_MATRIX = RebyuStep(
+    sid='rb-doc_term_matrix',
+    stype=BaseStep.STEP_COMPOSE,
+    source='tokens',
+    target='dtm',
+    func=doc_term_matrix
+)
+"""Compose a sparse (CSR) document-term matrix from 'tokens' (Rebyu.data) to 'dtm'"""
+
 COMPOSE_COUNTER_CHARVOCAB = RebyuStep(
     sid='rb-counter_charvocab',
     stype=BaseStep.STEP_COMPOSE,
@@ -264,6 +317,16 @@ COMPOSE_SET_CHARVOCAB = RebyuStep(
 )
 """Compose a character set from 'tokens' (Rebyu.data) to 'char_vocab' using a built-in set"""
 
+COMPOSE_MULTI_VOCAB = RebyuStep(
+    sid='rb-multi_vocab',
+    stype=BaseStep.STEP_COMPOSE,
+    source='tokens',
+    target='multi_vocab',
+    func=multi_vocab
+)
+"""Compose the word counts, a vocabulary, a character vocabulary and a character set from 'tokens' (Rebyu.data) to
+'multi_vocab' in a single pass"""
+
 
 # -- TextBlob -- #
 
@@ -384,9 +447,10 @@ PREP_TRANSFORMERS_TOKENIZE = RebyuStep(
     stype=BaseStep.STEP_PREPROCESS,
     source='text',
     target='tokens',
-    func=transformers_tokenize
+    func=transformers_tokenize,
+    func_args={'returns': 'ids'}
 )
-"""Tokenize 'text' (Rebyu.data) into 'tokens' using transformers module tokenizers
+"""Tokenize 'text' (Rebyu.data) into 'tokens' (token id arrays) using transformers module tokenizers
 
 See the `transformers_tokenize` documentation."""
 
@@ -397,8 +461,8 @@ ANALYZE_TRANSFORMERS_MODEL = RebyuStep(
     target='transformers_analysis',
     func=transformers_model
 )
-"""Predict values from 'tokens' (Rebyu.data) into an analysis in 'transformers_analysis'. It uses models from the 
-transformers module. 
+"""Predict values from 'tokens' (Rebyu.data) into an analysis in 'transformers_analysis' (stacked logits or hidden
+states). It uses models from the transformers module.
 
 See the `transformers_model` documentation."""
 
@@ -422,11 +486,13 @@ ANALYZE_CARDIFFNLP_SENTIMENT = RebyuStep(
     func=transformers_pipeline,
     func_args={
         'task': 'text-classification',
-        'model': 'cardiffnlp/twitter-roberta-base-sentiment-latest'
+        'model': 'cardiffnlp/twitter-roberta-base-sentiment-latest',
+        'batch_size': 32,
+        'max_tokens': 8192
     }
 )
 """Construct a pipeline from the transformers module specific for Cardiff NLP Sentiment Analysis Tasks.
-Taking 'text' (Rebyu.data) into an analysis in 'sentiment' 
+Taking 'text' (Rebyu.data) into an analysis in 'sentiment', predicted in length-bucketed batches
 
 See the `transformers_pipeline` documentation."""
 
@@ -439,11 +505,13 @@ ANALYZE_CARDIFFNLP_EMOTION = RebyuStep(
     func_args={
         'task': 'text-classification',
         'model': 'cardiffnlp/twitter-roberta-base-emotion-multilabel-latest',
-        'top_k': 10
+        'top_k': 10,
+        'batch_size': 32,
+        'max_tokens': 8192
     }
 )
 """Construct a pipeline from the transformers module specific for Cardiff NLP Emotion Analysis Tasks.
-Taking 'text' (Rebyu.data) into an analysis in 'emotion' 
+Taking 'text' (Rebyu.data) into an analysis in 'emotion', predicted in length-bucketed batches
 
 See the `transformers_pipeline` documentation."""
 
@@ -455,11 +523,13 @@ ANALYZE_FINITEAUTOMATA_SENTIMENT = RebyuStep(
     func=transformers_pipeline,
     func_args={
         'task': 'text-classification',
-        'model': 'finiteautomata/bertweet-base-sentiment-analysis'
+        'model': 'finiteautomata/bertweet-base-sentiment-analysis',
+        'batch_size': 32,
+        'max_tokens': 8192
     }
 )
 """Construct a pipeline from the transformers module specific for @finiteautomata Sentiment Analysis Tasks.
-Taking 'text' (Rebyu.data) into an analysis in 'sentiment' 
+Taking 'text' (Rebyu.data) into an analysis in 'sentiment', predicted in length-bucketed batches
 
 See the `transformers_pipeline` documentation."""
 
@@ -472,10 +542,12 @@ ANALYZE_FINITEAUTOMATA_EMOTION = RebyuStep(
     func_args={
         'task': 'text-classification',
         'model': 'finiteautomata/bertweet-base-emotion-analysis',
-        'top_k': 5
+        'top_k': 5,
+        'batch_size': 32,
+        'max_tokens': 8192
     }
 )
 """Construct a pipeline from the transformers module specific for @finiteautomata Emotion Analysis Tasks.
-Taking 'text' (Rebyu.data) into an analysis in 'emotion' 
+Taking 'text' (Rebyu.data) into an analysis in 'emotion', predicted in length-bucketed batches
 
 See the `transformers_pipeline` documentation."""
\ No newline at end of file
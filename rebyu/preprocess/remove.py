@@ -1,11 +1,16 @@
 import re
 import string
-from typing import List, Any, AnyStr
+from functools import lru_cache
+from typing import List, Any, AnyStr, Optional
 
 import nltk
+import numpy as np
+import pandas as pd
 from nltk.corpus import stopwords
 
-from rebyu.util.dependency import nltk_dependency_mgt
+from rebyu.util.batch import batch, is_arrow_string_series, is_list_series
+from rebyu.util.dependency import nltk_dependency_mgt, nltk_requires
+from rebyu.util.tokens import is_token_series
 
 NUMBERS_REGEX = r'\d+'
 URLS_REGEX = r'(https:\/\/www\.|http:\/\/www\.|https:\/\/|http:\/\/)?[a-zA-Z]{2,}(\.[a-zA-Z]{2,})(\.[a-zA-Z]{2,' \
@@ -27,7 +32,129 @@ EMOJI_REGEX = re.compile("["
                            u"\U00002702-\U000027B0"  # Dingbats
                            "]+", flags=re.UNICODE)
 
+PUNCTUATIONS_TABLE = str.maketrans('', '', string.punctuation)
+PUNCTUATIONS_REGEX = '[' + ''.join(f'\\{char}' for char in string.punctuation) + ']'
 
+# Escapes whose meaning differs between Python's re and RE2 (Arrow), \d is translated to the Unicode class instead
+RE2_UNSAFE_ESCAPES = frozenset('wWsSbBAZ123456789')
+
+MULTI_PATTERNS = (URLS_REGEX, EMOJI_REGEX, NUMBERS_REGEX)
+
+# Flags of a compiled pattern that can be scoped to a group, (?i:...) (re.UNICODE is the default of str patterns)
+SCOPED_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'), (re.ASCII, 'a'))
+
+
+@lru_cache(maxsize=128)
+def compile_pattern(pattern: Any) -> re.Pattern:
+    """ Compile a regex pattern once (cached)
+
+    :param pattern: Any string object or compiled pattern
+    :return: re.Pattern
+    """
+    return re.compile(pattern)
+
+
+@lru_cache(maxsize=128)
+def compile_multi_pattern(patterns: tuple = MULTI_PATTERNS, specifics: tuple = ()) -> re.Pattern:
+    """ Compile regex patterns and literal substrings once (cached) into a single alternation. The flags of a
+    compiled pattern only apply to its own branch (scoped inline flags, e.g. (?i:...)).
+
+    :param patterns: Tuple of string objects or compiled patterns (tried in order)
+    :param specifics: Tuple of literal substrings (tried after the patterns)
+    :return: re.Pattern
+    """
+    branches = []
+    for pattern in patterns:
+        letters = ''
+        if isinstance(pattern, re.Pattern):
+            letters = ''.join(letter for flag, letter in SCOPED_FLAGS if pattern.flags & flag)
+            # a trailing comment of a verbose pattern would swallow the closing parenthesis
+            pattern = pattern.pattern + ('\n' if pattern.flags & re.VERBOSE else '')
+        branches.append(f'(?{letters}:{pattern})')
+    branches.extend(re.escape(sub) for sub in specifics if sub)
+    return re.compile('|'.join(branches))
+
+
+@lru_cache(maxsize=128)
+def arrow_pattern(pattern: Any) -> Optional[AnyStr]:
+    """ Translate a regex pattern for the RE2 kernels of Arrow (cached), so a string[pyarrow] column is replaced
+    natively. Only patterns that match the same with Python's re are translated: no (global or scoped) flags, no $
+    and none of the escapes of RE2_UNSAFE_ESCAPES (\\d and \\D become \\p{Nd} and \\P{Nd}, the Unicode digits of
+    Python).
+
+    :param pattern: Any string object or compiled pattern
+    :return: str, None when the pattern needs Python's re
+    """
+    if isinstance(pattern, re.Pattern):
+        if pattern.flags & ~re.UNICODE:
+            return None
+        pattern = pattern.pattern
+    if not isinstance(pattern, str):
+        return None
+
+    unsafe = False
+
+    def translate(match: re.Match) -> AnyStr:
+        nonlocal unsafe
+        token = match.group(0)
+        if token == '$' or token[1:] in RE2_UNSAFE_ESCAPES or token.startswith('(?'):
+            unsafe = True
+        return {'\\d': '\\p{Nd}', '\\D': '\\P{Nd}'}.get(token, token)
+
+    translated = re.sub(r'\\.|\$|\(\?[aiLmsux-]+[:)]', translate, pattern, flags=re.DOTALL)
+    return None if unsafe else translated
+
+
+def _replace_patterns(series: pd.Series, pattern: Any, compiled: re.Pattern):
+    if is_arrow_string_series(series):
+        native = arrow_pattern(pattern)
+        if native is not None:
+            try:
+                return series.str.replace(native, '', regex=True)
+            except ValueError:
+                # pyarrow.ArrowInvalid, a pattern RE2 does not support (e.g. lookarounds)
+                pass
+    return series.str.replace(compiled, '', regex=True)
+
+
+def _remove_patterns_batch(series: pd.Series, pattern: AnyStr):
+    return _replace_patterns(series, pattern, compile_pattern(pattern))
+
+
+def _remove_numbers_batch(series: pd.Series, pattern: AnyStr = NUMBERS_REGEX):
+    return _remove_patterns_batch(series, pattern)
+
+
+def _remove_urls_batch(series: pd.Series, pattern: AnyStr = URLS_REGEX):
+    return _remove_patterns_batch(series, pattern)
+
+
+def _remove_emojis_batch(series: pd.Series, pattern: AnyStr = EMOJI_REGEX):
+    return _remove_patterns_batch(series, pattern)
+
+
+def _remove_punctuations_batch(series: pd.Series):
+    if is_arrow_string_series(series):
+        return series.str.replace(PUNCTUATIONS_REGEX, '', regex=True)
+    return series.str.translate(PUNCTUATIONS_TABLE)
+
+
+def _remove_whitespaces_batch(series: pd.Series):
+    return series.str.strip()
+
+
+def _remove_specifics_batch(series: pd.Series, sub: Any):
+    if type(sub) is str:
+        return series.str.replace(sub, '', regex=False)
+    return series
+
+
+def _remove_multi_patterns_batch(series: pd.Series, patterns: Any = MULTI_PATTERNS, specifics: Any = None):
+    compiled = compile_multi_pattern(tuple(patterns), tuple(specifics or ()))
+    return _replace_patterns(series, compiled, compiled)
+
+
+@batch(_remove_patterns_batch)
 def remove_patterns(text: Any, pattern: AnyStr):
     """ Remove patterns (regex) from a text
 
@@ -36,10 +163,11 @@ def remove_patterns(text: Any, pattern: AnyStr):
     :return: text
     """
     if type(text) is str:
-        return re.sub(pattern, '', text)
+        return compile_pattern(pattern).sub('', text)
     return text
 
 
+@batch(_remove_numbers_batch)
 def remove_numbers(text: Any, pattern: AnyStr = NUMBERS_REGEX):
     """ Remove numerical data from text (using a regex pattern)
 
@@ -50,6 +178,7 @@ def remove_numbers(text: Any, pattern: AnyStr = NUMBERS_REGEX):
     return remove_patterns(text, pattern)
 
 
+@batch(_remove_urls_batch)
 def remove_urls(text: Any, pattern: AnyStr = URLS_REGEX):
     """ Remove urls from text (using a regex pattern)
 
@@ -60,6 +189,7 @@ def remove_urls(text: Any, pattern: AnyStr = URLS_REGEX):
     return remove_patterns(text, pattern)
 
 
+@batch(_remove_emojis_batch)
 def remove_emojis(text: Any, pattern: AnyStr = EMOJI_REGEX):
     """ Remove emojis from text
     (Emoticons, Symbols & Pictograms, Transport & Map Symbols, Alchemical Symbols,
@@ -73,6 +203,7 @@ def remove_emojis(text: Any, pattern: AnyStr = EMOJI_REGEX):
     return remove_patterns(text, pattern)
 
 
+@batch(_remove_punctuations_batch)
 def remove_punctuations(text: Any):
     """ Remove punctuations from text (from string.punctuation)
 
@@ -80,10 +211,11 @@ def remove_punctuations(text: Any):
     :return: text
     """
     if type(text) is str:
-        return text.translate(str.maketrans('', '', string.punctuation))
+        return text.translate(PUNCTUATIONS_TABLE)
     return text
 
 
+@batch(_remove_whitespaces_batch)
 def remove_whitespaces(text: Any):
     """ Strip any whitespaces from text
 
@@ -95,6 +227,7 @@ def remove_whitespaces(text: Any):
     return text
 
 
+@batch(_remove_specifics_batch)
 def remove_specifics(text: Any, sub: Any):
     """ Remove specific substring from text
 
@@ -107,6 +240,30 @@ def remove_specifics(text: Any, sub: Any):
     return text
 
 
+@batch(_remove_multi_patterns_batch)
+def remove_multi_patterns(text: Any, patterns: Any = MULTI_PATTERNS, specifics: Any = None):
+    """ Remove several patterns (regex) and specific substrings from text in a single scan. The patterns are
+    compiled once into a single alternation, matched leftmost-first (ties go to the earlier pattern).
+
+    Unlike chaining the removals, text that would only match after another removal is not removed again.
+
+    :param text: Any string object
+    :param patterns: List of string objects or compiled patterns (URLS_REGEX, EMOJI_REGEX and NUMBERS_REGEX)
+    :param specifics: (Optional) List of literal substrings
+    :return: text
+    """
+    if type(text) is str:
+        return compile_multi_pattern(tuple(patterns), tuple(specifics or ())).sub('', text)
+    return text
+
+
+def _trim_text_batch(series: pd.Series, length: int = 500, pos: AnyStr = 'LEFT'):
+    if pos == 'LEFT':
+        return series.str.slice(stop=length)
+    return series.str.slice(start=length)
+
+
+@batch(_trim_text_batch)
 def trim_text(text: Any, length: int = 500, pos: AnyStr = 'LEFT'):
     """ Trim the Text by Length
 
@@ -122,6 +279,19 @@ def trim_text(text: Any, length: int = 500, pos: AnyStr = 'LEFT'):
 
 # -- NLTK -- #
 
+@lru_cache(maxsize=None)
+def stopword_set(language: str = 'english', extra: tuple = ()) -> frozenset:
+    """ Get the (cached) set of NLTK stopwords of a language, built once per process
+
+    :param language: The language of the stopwords
+    :param extra: Tuple of additional stopwords
+    :return: frozenset
+    """
+    nltk_dependency_mgt(required=['stopwords'])
+    return frozenset(stopwords.words(language)).union(extra)
+
+
+@nltk_requires('punkt', 'stopwords')
 def remove_stopwords(text: Any, extra: List[Any] = None, language: str = 'english'):
     """ Remove stopwords from text (using NLTK Stopwords)
 
@@ -130,13 +300,40 @@ def remove_stopwords(text: Any, extra: List[Any] = None, language: str = 'englis
     :param language: The language of the text
     :return: text
     """
-
-    nltk_dependency_mgt(required=['punkt', 'stopwords'])
-
-    stop_words = set(stopwords.words(language) + (extra or []))
+    stop_words = stopword_set(language, tuple(extra or ()))
     tokens = nltk.word_tokenize(text)
     filtered_tokens = filter(lambda x: x.lower() not in stop_words, tokens)
 
     if type(text) is str:
         return ' '.join(filtered_tokens)
     return filtered_tokens
+
+
+def _filter_stopwords_batch(series: pd.Series, extra: List[Any] = None, language: str = 'english'):
+    stop_words = stopword_set(language, tuple(extra or ()))
+    if is_token_series(series):
+        keep = np.fromiter((token.lower() not in stop_words for token in series.array.vocab), dtype=bool,
+                           count=len(series.array.vocab))
+        return pd.Series(series.array.select(keep), index=series.index, name=series.name)
+
+    return pd.Series(
+        [[token for token in tokens if token.lower() not in stop_words] for tokens in series],
+        index=series.index,
+        name=series.name
+    )
+
+
+@batch(_filter_stopwords_batch, accepts=is_list_series)
+@nltk_requires('stopwords')
+def filter_stopwords(tokens: Any, extra: List[Any] = None, language: str = 'english'):
+    """ Remove stopwords from already tokenized text (using cached NLTK Stopwords)
+
+    :param tokens: List of string objects
+    :param extra: List of Any string objects
+    :param language: The language of the tokens
+    :return: tokens
+    """
+    if isinstance(tokens, (list, tuple)):
+        stop_words = stopword_set(language, tuple(extra or ()))
+        return [token for token in tokens if token.lower() not in stop_words]
+    return tokens
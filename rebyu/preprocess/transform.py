@@ -1,5 +1,11 @@
 from typing import List, Any, AnyStr
-from rebyu.util.dependency import nltk_dependency_mgt
+from rebyu.util.batch import batch, is_series
+from rebyu.util.dependency import nltk_requires
+from rebyu.util.registry import load_pretrained
+from rebyu.util.tokens import TokenArray, is_token_series
+
+import numpy as np
+import pandas as pd
 
 import nltk
 from nltk.stem import PorterStemmer
@@ -12,6 +18,25 @@ from transformers import AutoTokenizer
 import contractions
 
 
+def _cast_nan_str_batch(series: pd.Series):
+    return series
+
+
+def _cast_case_batch(series: pd.Series, case: AnyStr = 'LOWER'):
+    if case.upper() == 'LOWER':
+        return series.str.lower()
+    if case.upper() == 'UPPER':
+        return series.str.upper()
+    return series
+
+
+def _sub_replace_batch(series: pd.Series, sub: Any = None, rep: Any = None):
+    if sub is rep:
+        return series
+    return series.str.replace(sub, rep, regex=False)
+
+
+@batch(_cast_nan_str_batch)
 def cast_nan_str(text: Any):
     """ Cast non-string objects into empty strings
 
@@ -21,6 +46,7 @@ def cast_nan_str(text: Any):
     return text if type(text) is str else ''
 
 
+@batch(_cast_case_batch)
 def cast_case(text: Any, case: AnyStr = 'LOWER'):
     """ Cast the case into a string object (upper or lowercase)
 
@@ -47,6 +73,7 @@ def cast_case(text: Any, case: AnyStr = 'LOWER'):
     return new_token
 
 
+@batch(_sub_replace_batch)
 def sub_replace(text: Any, sub: Any = None, rep: Any = None):
     """ Replace a substring with another string (sub -> rep)
 
@@ -64,14 +91,68 @@ def sub_replace(text: Any, sub: Any = None, rep: Any = None):
     return [x if x != sub else rep for x in text]
 
 
+def _sentence_length_batch(series: pd.Series):
+    return series.str.len().astype(np.int64)
+
+
+@batch(_sentence_length_batch)
+def sentence_length(text: Any):
+    """ Get the length of the text
+
+    :param text: Any string object
+    :return: Length of the text (empty string for non-string objects)
+    """
+    return len(text) if type(text) is str else ''
+
+
+def _is_token_column(series: Any):
+    return is_token_series(series) and not series.hasnans
+
+
+def _word_count_batch(series: pd.Series):
+    return pd.Series(series.array.lengths(), index=series.index, name=series.name)
+
+
+@batch(_word_count_batch, accepts=_is_token_column)
+def word_count(tokens: Any):
+    """ Get the number of tokens
+
+    :param tokens: List of tokens
+    :return: Number of tokens
+    """
+    return len(tokens)
+
+
+def _compact_tokens_batch(series: pd.Series):
+    return pd.Series(TokenArray._from_sequence(series.array), index=series.index, name=series.name)
+
+
+def _is_tokens_series(series: Any):
+    # Rows of tokens (lists or tuples, missing rows included) or a compact token column, not a column of strings
+    if is_token_series(series):
+        return True
+    return is_series(series) and len(series) > 0 and \
+        all(isinstance(x, (list, tuple)) or x is None or (isinstance(x, float) and np.isnan(x)) for x in series)
+
+
+@batch(_compact_tokens_batch, accepts=_is_tokens_series)
+def compact_tokens(tokens: Any):
+    """ Compact a column of tokens into a TokenArray (one flat buffer of token ids and the row offsets, with every
+    distinct token kept once), its rows read as tuples of tokens. Runs over the whole column.
+
+    :param tokens: List of tokens
+    :return: Tuple of tokens
+    """
+    return tuple(tokens)
+
+
+@nltk_requires('punkt')
 def expand_contractions(text: Any):
     """ Expand the contractions within the text (you're -> you are)
 
     :param text: Any string object
     :return: text
     """
-    nltk_dependency_mgt(required=['punkt'])
-
     if type(text) is str:
         return contractions.fix(text)
 
@@ -82,6 +163,7 @@ def expand_contractions(text: Any):
     return expanded
 
 
+@nltk_requires('punkt')
 def censor_username(text: Any, censor: Any = '@user'):
     """ Censor any username within the text with a placeholder
 
@@ -89,8 +171,6 @@ def censor_username(text: Any, censor: Any = '@user'):
     :param censor: Any string object (placeholder)
     :return: text
     """
-    nltk_dependency_mgt(required=['punkt'])
-
     new_text = []
     if type(text) is str:
         for token in text.split():
@@ -104,6 +184,7 @@ def censor_username(text: Any, censor: Any = '@user'):
     return new_text
 
 
+@nltk_requires('punkt')
 def censor_urls(text: Any, censor: Any = 'http'):
     """ Censor any urls within the text with a placeholder
 
@@ -111,8 +192,6 @@ def censor_urls(text: Any, censor: Any = 'http'):
     :param censor: Any string object (placeholder)
     :return: text
     """
-    nltk_dependency_mgt(required=['punkt'])
-
     new_text = []
     if type(text) is str:
         for token in text.split():
@@ -166,6 +245,7 @@ def textblob_sentences(text: Any):
 
 # -- NLTK -- #
 
+@nltk_requires('punkt')
 def nltk_tokenize(text: Any, language: AnyStr = 'english'):
     """ Tokenize text using NLTK word_tokenize
 
@@ -173,8 +253,6 @@ def nltk_tokenize(text: Any, language: AnyStr = 'english'):
     :param language: The language of the text
     :return: List of String
     """
-    nltk_dependency_mgt(required=['punkt'])
-
     if type(text) is str:
         return nltk.word_tokenize(
             text, language=language
@@ -182,42 +260,39 @@ def nltk_tokenize(text: Any, language: AnyStr = 'english'):
     return text
 
 
+@nltk_requires('punkt')
 def nltk_porter_stem(text: Any):
     """ Stem the words from text using Porter method
 
     :param text: Any string object
     :return: text
     """
-    nltk_dependency_mgt(required=['punkt'])
-
     stemmer = PorterStemmer()
     if type(text) is str:
         return ' '.join([stemmer.stem(x) for x in nltk.word_tokenize(text)])
     return [stemmer.stem(x) for x in text]
 
 
+@nltk_requires('punkt')
 def nltk_lancaster_stem(text: Any):
     """ Stem the words from text using Lancaster method
 
     :param text: Any string object
     :return: text
     """
-    nltk_dependency_mgt(required=['punkt'])
-
     stemmer = LancasterStemmer()
     if type(text) is str:
         return ' '.join([stemmer.stem(x) for x in nltk.word_tokenize(text)])
     return [stemmer.stem(x) for x in text]
 
 
+@nltk_requires('punkt', 'wordnet', 'averaged_perceptron_tagger')
 def nltk_wordnet_lemma(text: Any):
     """ Lemmatize the words from text using WordNet
 
     :param text: Any string object
     :return: text
     """
-    nltk_dependency_mgt(required=['punkt', 'wordnet', 'averaged_perceptron_tagger'])
-
     lemma = WordNetLemmatizer()
     if type(text) is str:
         return ' '.join([
@@ -242,18 +317,36 @@ def _lemma_penn2morphy(penn_tag: AnyStr):
 
 # -- Transformers -- #
 
+def _transformers_tokenize_batch(
+        series: pd.Series,
+        tokenizer: Any = AutoTokenizer,
+        model_name: AnyStr = 'bert-base-uncased',
+        returns: AnyStr = 'pt'):
+    if returns != 'ids':
+        return series.apply(transformers_tokenize, tokenizer=tokenizer, model_name=model_name, returns=returns)
+
+    tokenizer = load_pretrained(tokenizer, model_name)
+    ids = TokenArray.from_ids(tokenizer(series.tolist())['input_ids'])
+    return pd.Series(ids, index=series.index, name=series.name)
+
+
+@batch(_transformers_tokenize_batch)
 def transformers_tokenize(
         text: Any,
         tokenizer: Any = AutoTokenizer,
         model_name: AnyStr = 'bert-base-uncased',
         returns: AnyStr = 'pt'):
-    """ Tokenize text using transformers module
+    """ Tokenize text using transformers module. The tokenizer is loaded once per process (see ModelRegistry).
+    With returns='ids', a column of text is tokenized in a single call into a compact TokenArray (one flat
+    np.int32 buffer of the token ids and the row offsets), its rows read as tuples of token ids.
 
     :param text: Any string object
     :param tokenizer: The tokenizer model (from transformers)
     :param model_name: The pretrained model name
-    :param returns: The return value (pt: PyTorch, tf: Tensorflow)
+    :param returns: The return value (pt: PyTorch, tf: Tensorflow, ids: Tuple of token ids)
     :return: Tokenized Object
     """
-    tokenizer = tokenizer.from_pretrained(model_name)
+    tokenizer = load_pretrained(tokenizer, model_name)
+    if returns == 'ids':
+        return tuple(tokenizer(text)['input_ids'])
     return tokenizer(text, return_tensors=returns)
@@ -0,0 +1,146 @@
+import os
+import pathlib
+import tempfile
+from typing import Any, AnyStr, Optional
+
+BACKEND_TORCH = 'torch'
+BACKEND_TORCH_INT8 = 'torch-int8'
+BACKEND_ONNX = 'onnx'
+BACKENDS = (BACKEND_TORCH, BACKEND_TORCH_INT8, BACKEND_ONNX)
+
+BACKEND_CACHE = os.environ.get('REBYU_BACKEND_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'rebyu'))
+
+ORT_TASKS = {
+    'sentiment-analysis': 'ORTModelForSequenceClassification',
+    'text-classification': 'ORTModelForSequenceClassification',
+    'token-classification': 'ORTModelForTokenClassification',
+    'ner': 'ORTModelForTokenClassification',
+    'question-answering': 'ORTModelForQuestionAnswering',
+    'feature-extraction': 'ORTModelForFeatureExtraction',
+}
+
+# Arguments of transformers.pipeline that also apply to loading its model
+PIPELINE_MODEL_KWARGS = ('revision', 'trust_remote_code', 'token', 'use_auth_token')
+
+
+def check_backend(backend: AnyStr):
+    """ Check that a backend is supported.
+
+    :param backend: 'torch', 'torch-int8' (dynamic int8 quantization) or 'onnx' (ONNX Runtime)
+    :return:
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown backend {backend}, expected one of {BACKENDS}')
+
+
+def quantize_model(model: Any) -> Any:
+    """ Quantize the linear layers of a PyTorch model to int8 (dynamic quantization, for CPU inference).
+
+    :param model: torch.nn.Module
+    :return: torch.nn.Module
+    """
+    import torch
+
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def int8_model(cls: Any,
+               model_name: AnyStr,
+               cache_dir: Optional[AnyStr] = None,
+               **from_pretrained_kwargs) -> Any:
+    """ Load a PyTorch model with its linear layers quantized to int8 (see quantize_model). The model is quantized
+    on first use and the quantized model is kept in `cache_dir` for later loads (one per revision and torch
+    version), so other processes load it instead of quantizing it again.
+
+    :param cls: The transformers model class (e.g. AutoModelForSequenceClassification)
+    :param model_name: The pretrained model name
+    :param cache_dir: (Optional) Directory of the quantized models (defaults to BACKEND_CACHE)
+    :param from_pretrained_kwargs: Additional arguments to from_pretrained (e.g. revision, trust_remote_code)
+    :return: torch.nn.Module
+    """
+    import torch
+
+    path = _cache_path(BACKEND_TORCH_INT8, getattr(cls, '__name__', str(cls)), model_name, cache_dir,
+                       from_pretrained_kwargs.get('revision'))
+    weights = path / f'model-torch{torch.__version__}.pt'
+    if weights.exists():
+        # the whole (quantized) module is saved, its packed int8 weights load without quantizing again
+        return torch.load(weights, weights_only=False)
+
+    model = quantize_model(cls.from_pretrained(model_name, **from_pretrained_kwargs))
+    path.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        torch.save(model, f)
+    os.replace(tmp, weights)
+    return model
+
+
+def onnx_model(ort_class: AnyStr,
+               model_name: AnyStr,
+               cache_dir: Optional[AnyStr] = None,
+               **from_pretrained_kwargs) -> Any:
+    """ Load a model with ONNX Runtime (optimum). The model is exported to ONNX on first use and the export is
+    kept in `cache_dir` for later loads (one export per revision).
+
+    :param ort_class: Name of the optimum.onnxruntime class (e.g. ORTModelForSequenceClassification)
+    :param model_name: The pretrained model name
+    :param cache_dir: (Optional) Directory of the exported models (defaults to BACKEND_CACHE)
+    :param from_pretrained_kwargs: Additional arguments to from_pretrained (e.g. revision, trust_remote_code)
+    :return: optimum.onnxruntime.ORTModel
+    """
+    try:
+        import optimum.onnxruntime
+    except ImportError as e:
+        raise ImportError("The 'onnx' backend requires optimum with ONNX Runtime (pip install optimum[onnxruntime])") \
+            from e
+
+    cls = getattr(optimum.onnxruntime, ort_class)
+    path = _cache_path(BACKEND_ONNX, ort_class, model_name, cache_dir, from_pretrained_kwargs.get('revision'))
+    if (path / 'config.json').exists():
+        return cls.from_pretrained(path, **{k: v for k, v in from_pretrained_kwargs.items() if k != 'revision'})
+
+    model = cls.from_pretrained(model_name, export=True, **from_pretrained_kwargs)
+    model.save_pretrained(path)
+    return model
+
+
+def _cache_path(backend: AnyStr,
+                class_name: AnyStr,
+                model_name: AnyStr,
+                cache_dir: Optional[AnyStr] = None,
+                revision: Optional[AnyStr] = None) -> pathlib.Path:
+    # <cache_dir>/<backend>/<class>/<org--model>[@<revision>]
+    name = model_name.replace('/', '--') + (f'@{revision}' if revision else '')
+    return pathlib.Path(cache_dir or BACKEND_CACHE) / backend / class_name / name
+
+
+def pipeline_model_class(task: AnyStr) -> Optional[Any]:
+    """ Get the PyTorch model class transformers uses for a pipeline task (e.g. AutoModelForSequenceClassification
+    for sentiment-analysis).
+
+    :param task: The name of the task
+    :return: The transformers model class, None when unknown
+    """
+    from transformers.pipelines import check_task
+
+    try:
+        _, targeted, _ = check_task(task)
+    except KeyError:
+        return None
+    classes = targeted.get('pt') or ()
+    return classes[0] if classes else None
+
+
+def ort_class_of(cls: Any) -> AnyStr:
+    """ Get the optimum.onnxruntime class name matching a transformers Auto class (AutoModel for feature
+    extraction, AutoModelFor* for the matching ORTModelFor*).
+
+    :param cls: The transformers model class
+    :return: str
+    """
+    name = getattr(cls, '__name__', str(cls))
+    if name == 'AutoModel':
+        return ORT_TASKS['feature-extraction']
+    return f'ORT{name[len("Auto"):] if name.startswith("Auto") else name}'
@@ -0,0 +1,111 @@
+from typing import Any, Callable
+
+import pandas as pd
+
+from rebyu.util.tokens import is_token_series
+
+
+def is_str_series(series: Any) -> bool:
+    """ Check whether a series only holds (non-missing) strings.
+
+    :param series: Any series of data
+    :return: bool
+    """
+    if not isinstance(series, pd.Series) or len(series) == 0:
+        return False
+    if isinstance(series.dtype, pd.StringDtype):
+        return not series.hasnans
+    if isinstance(series.dtype, pd.ArrowDtype):
+        # e.g. large_string, whose .str methods do not take compiled patterns
+        return False
+    return pd.api.types.infer_dtype(series, skipna=False) == 'string'
+
+
+def is_list_series(series: Any) -> bool:
+    """ Check whether a series only holds lists (or tuples), e.g. a column of tokens (compact token columns,
+    see TokenArray, included).
+
+    :param series: Any series of data
+    :return: bool
+    """
+    if not isinstance(series, pd.Series) or len(series) == 0:
+        return False
+    if is_token_series(series):
+        return not series.hasnans
+    return all(isinstance(x, (list, tuple)) for x in series)
+
+
+def is_arrow_string_series(series: Any) -> bool:
+    """ Check whether a series is an Arrow-backed string column (string[pyarrow]).
+
+    :param series: Any series of data
+    :return: bool
+    """
+    return isinstance(series, pd.Series) and isinstance(series.dtype, pd.StringDtype) \
+        and series.dtype.storage == 'pyarrow'
+
+
+def keep_string_dtype(result: Any, source: pd.Series) -> Any:
+    """ Cast the output of a row-wise function back to the string dtype of its source column (e.g. string[pyarrow]),
+    when the output still only holds strings.
+
+    :param result: Output series
+    :param source: The source column
+    :return: Output series
+    """
+    if not isinstance(source.dtype, pd.StringDtype) or not isinstance(result, pd.Series) or result.dtype != object:
+        return result
+    if pd.api.types.infer_dtype(result, skipna=True) != 'string':
+        return result
+    return result.astype(source.dtype)
+
+
+def is_series(series: Any) -> bool:
+    """ Check whether the data is a series (of any values).
+
+    :param series: Any series of data
+    :return: bool
+    """
+    return isinstance(series, pd.Series)
+
+
+class Batch(object):
+    """
+    Batch
+
+    A contract that lets a row-wise (PREPROCESS) function run over a whole series at once, e.g. with the
+    vectorized pandas string methods. The batch function must give the same result as applying the row-wise
+    function to every row of a series it accepts.
+
+    - func(series, **func_args): the output series.
+    - accepts(series): whether the batch function can be used for the series (defaults to is_str_series).
+    """
+
+    def __init__(self, func: Callable, accepts: Callable[[Any], bool] = is_str_series):
+        self.func = func
+        self.accepts = accepts
+
+    def __call__(self, series: pd.Series, **func_args) -> pd.Series:
+        return self.func(series, **func_args)
+
+
+def batch(func: Callable, accepts: Callable[[Any], bool] = is_str_series):
+    """ Declare a batch (whole series) version of a row-wise function (see Batch).
+
+    :param func: Batch function
+    :param accepts: (Optional) Whether the batch function can be used for a series
+    :return: Decorator
+    """
+    def decorator(row_func: Callable):
+        row_func.batch = Batch(func=func, accepts=accepts)
+        return row_func
+    return decorator
+
+
+def get_batch(func: Any):
+    """ Get the batch contract of a row-wise function, if it has one.
+
+    :param func: Any function
+    :return: Batch | None
+    """
+    return getattr(func, 'batch', None)
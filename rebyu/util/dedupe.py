@@ -0,0 +1,103 @@
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _key(value: Any) -> Any:
+    # Hashable key of a cell, including its type (1, 1.0 and True, or None and NaN, are distinct values)
+    if isinstance(value, (list, tuple)):
+        return type(value), tuple(_key(x) for x in value)
+    if isinstance(value, np.ndarray):
+        return np.ndarray, value.dtype.str, value.shape, value.tobytes()
+    if isinstance(value, float) and np.isnan(value):
+        return type(value), 'nan'
+    return type(value), value
+
+
+def factorize(series: pd.Series) -> Tuple[np.ndarray, pd.Series]:
+    """ Factorize a column into the codes of its rows and its distinct values (in order of first occurrence).
+    Missing values are kept as distinct values (None and NaN apart), cells of an object column are compared by
+    type and content (e.g. 1, 1.0 and True are distinct, lists of tokens are compared by content).
+
+    :param series: pd.Series
+    :return: (codes, uniques), where series[i] == uniques[codes[i]]
+    :raises TypeError: The column holds unhashable values
+    """
+    keys = series
+    if series.dtype == object and pd.api.types.infer_dtype(series, skipna=False) not in ('string', 'bytes'):
+        keys = pd.Series([_key(x) for x in series], dtype=object)
+    codes, _ = pd.factorize(keys, use_na_sentinel=False)
+
+    _, first = np.unique(codes, return_index=True)
+    return codes, series.iloc[first].reset_index(drop=True)
+
+
+def _unshare(values: Any, codes: np.ndarray) -> List[Any]:
+    # Rows of the same distinct value get their own (shallow) copy of mutable values (lists, dicts, sets)
+    seen = np.zeros(len(values), dtype=bool)
+    out = []
+    for code in codes.tolist():
+        value = values[code]
+        if seen[code] and isinstance(value, (list, dict, set)):
+            value = type(value)(value)
+        seen[code] = True
+        out.append(value)
+    return out
+
+
+def broadcast(result: Any, codes: np.ndarray, index: Optional[pd.Index] = None) -> Any:
+    """ Broadcast a row-aligned output computed on the distinct values back to every row. Mutable values
+    (lists, dicts, sets) of a list or an object series are shallow-copied for every row, so rows never share
+    the containers (their items, e.g. strings, are shared).
+
+    :param result: Output for the distinct values (pd.Series, pd.DataFrame, np.ndarray, list or tuple)
+    :param codes: The codes of the rows (see factorize)
+    :param index: (Optional) Index of the output series
+    :return: Output for every row
+    """
+    if isinstance(result, pd.Series) and result.dtype == object:
+        out = pd.Series(_unshare(result.tolist(), codes), dtype=object, name=result.name)
+    elif isinstance(result, (pd.Series, pd.DataFrame)):
+        out = result.take(codes)
+    elif isinstance(result, np.ndarray):
+        return result[codes]
+    else:
+        return _unshare(result, codes)
+
+    if index is None:
+        return out.reset_index(drop=True)
+    out.index = index
+    return out
+
+
+def row_aligned(result: Any, length: int) -> bool:
+    """ Check whether an output holds one value per row.
+
+    :param result: Any output
+    :param length: Number of rows
+    :return: bool
+    """
+    if isinstance(result, np.ndarray) and result.ndim == 0:
+        return False
+    return isinstance(result, (list, tuple, pd.Series, pd.DataFrame, np.ndarray)) and len(result) == length
+
+
+def weighted(func: Callable):
+    """ Declare that a COMPOSE function accepts `weights`, the number of rows each (distinct) row of its series
+    stands for, so it can run on the distinct values of a column only.
+
+    :param func: COMPOSE function with a `weights` argument
+    :return: func
+    """
+    func.weighted = True
+    return func
+
+
+def is_weighted(func: Any) -> bool:
+    """ Check whether a function accepts multiplicity weights (see weighted).
+
+    :param func: Any function
+    :return: bool
+    """
+    return getattr(func, 'weighted', False)
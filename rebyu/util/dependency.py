@@ -1,30 +1,76 @@
-from typing import List
+import functools
+from typing import Any, Iterable, List
 
 import nltk
 
+NLTK_LOOKUP = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+    'words': 'corpora/words',
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger',
+    'vader_lexicon': 'sentiment/vader_lexicon',
+    'maxent_ne_chunker': 'chunkers/maxent_ne_chunker'
+}
+
+_NLTK_SATISFIED = set()
+
 
 def nltk_dependency_mgt(required: List[str] = None):
-    """ Check and Fulfill required dependencies for NLTK
+    """ Check and Fulfill required dependencies for NLTK. A resource is only looked up (or downloaded) once
+    per process, later checks of it are free. A failed download is retried on the next check.
 
     :param required: List of String (packages)
     :return:
     """
-    nltk_lookup = {
-        'punkt': 'tokenizers/punkt',
-        'stopwords': 'corpora/stopwords',
-        'wordnet': 'corpora/wordnet',
-        'words': 'corpora/words',
-        'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger',
-        'vader_lexicon': 'sentiment/vader_lexicon',
-        'maxent_ne_chunker': 'chunkers/maxent_ne_chunker'
-    }
-
     if required is None:
         return
 
     for resource in required:
+        if resource in _NLTK_SATISFIED:
+            continue
         try:
-            nltk.data.find(nltk_lookup.get(resource, f'corpora/{resource}'))
+            nltk.data.find(NLTK_LOOKUP.get(resource, f'corpora/{resource}'))
         except LookupError:
-            nltk.download(resource)
+            # nltk.download returns False (instead of raising) when it fails
+            if not nltk.download(resource):
+                continue
+        _NLTK_SATISFIED.add(resource)
     return
+
+
+def nltk_requires(*resources: str):
+    """ Declare the NLTK resources a function needs, so a pipeline can check them once before it runs
+    (see BasePipeline.prepare). The function checks them itself when called directly, only on its first call
+    in a process (later calls only look them up in the satisfied resources).
+
+    :param resources: String (packages)
+    :return: Decorator
+    """
+    required = list(resources)
+
+    def decorator(func: Any):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _NLTK_SATISFIED.issuperset(required):
+                nltk_dependency_mgt(required=required)
+            return func(*args, **kwargs)
+
+        wrapper.nltk_resources = tuple(resources)
+        return wrapper
+    return decorator
+
+
+def get_nltk_resources(func: Any) -> List[str]:
+    """ Get the NLTK resources declared by a function (or by the functions of a fused function).
+
+    :param func: Any function
+    :return: List of String (packages)
+    """
+    if hasattr(func, 'funcs'):
+        return _unique(resource for f, _ in func.funcs for resource in get_nltk_resources(f))
+    return list(getattr(func, 'nltk_resources', ()))
+
+
+def _unique(items: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(items))
@@ -0,0 +1,140 @@
+from collections import Counter
+from functools import reduce
+from typing import Any, Callable, Dict, AnyStr, List, Iterable
+
+import numpy as np
+import pandas as pd
+
+
+class MapReduce(object):
+    """
+    MapReduce
+
+    A contract that lets a COMPOSE or ANALYZE function be computed over chunks of a series and merged back.
+
+    - partial(series, **func_args): the partial result of a single chunk (defaults to the function itself).
+    - combine(a, b): merge two partial results in row order. It may update `a` in place and return it.
+    - finalize(result, **func_args): turn the merged partial into the final output (defaults to identity).
+      It must not modify its input nor return objects sharing state with it, so merged partials can be kept and
+      combined again (in place) later.
+    """
+
+    def __init__(self,
+                 combine: Callable[[Any, Any], Any],
+                 finalize: Callable = None,
+                 partial: Callable = None):
+        self.combine = combine
+        self.finalize = finalize
+        self.partial = partial
+
+    def map(self, func: Callable, series: Any, func_args: Dict[AnyStr, Any]) -> Any:
+        """ Compute the partial result of a chunk.
+
+        :param func: The decorated function
+        :param series: Any series of data (chunk)
+        :param func_args: Function arguments (Dict)
+        :return: Partial result
+        """
+        return (self.partial or func)(series, **func_args)
+
+    def merge(self, partials: Iterable[Any]) -> Any:
+        """ Combine partial results (in row order) into a single partial result.
+
+        :param partials: Iterable of partial results
+        :return: Partial result
+        """
+        return reduce(self.combine, partials)
+
+    def reduce(self, partials: Iterable[Any], func_args: Dict[AnyStr, Any]) -> Any:
+        """ Combine and finalize partial results into the final output.
+
+        :param partials: Iterable of partial results
+        :param func_args: Function arguments (Dict)
+        :return: Final result
+        """
+        return self.output(self.merge(partials), func_args)
+
+    def output(self, merged: Any, func_args: Dict[AnyStr, Any]) -> Any:
+        """ Finalize a merged partial result.
+
+        :param merged: Partial result
+        :param func_args: Function arguments (Dict)
+        :return: Final result
+        """
+        if self.finalize is None:
+            return merged
+        return self.finalize(merged, **func_args)
+
+
+def mapreduce(combine: Callable[[Any, Any], Any], finalize: Callable = None, partial: Callable = None):
+    """ Declare a COMPOSE or ANALYZE function as map/reduce capable (see MapReduce).
+
+    :param combine: Merge two partial results
+    :param finalize: (Optional) Turn the merged partial into the final output
+    :param partial: (Optional) Compute the partial result of a chunk
+    :return: Decorator
+    """
+    def decorator(func: Callable):
+        func.mapreduce = MapReduce(combine=combine, finalize=finalize, partial=partial)
+        return func
+    return decorator
+
+
+def get_mapreduce(func: Any):
+    """ Get the map/reduce contract of a function, if it has one.
+
+    :param func: Any function
+    :return: MapReduce | None
+    """
+    return getattr(func, 'mapreduce', None)
+
+
+def combine_list(a: List, b: List) -> List:
+    """ Concatenate two partial lists. """
+    a.extend(b)
+    return a
+
+
+def combine_rows(a: Any, b: Any) -> Any:
+    """ Concatenate two partial lists, arrays (along the first axis) or DataFrames (keeping typed columns). """
+    if isinstance(a, np.ndarray):
+        return np.concatenate([a, b])
+    if isinstance(a, pd.DataFrame):
+        return combine_frames(a, b)
+    return combine_list(a, b)
+
+
+def combine_frames(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    """ Concatenate two partial DataFrames, categorical columns keep a categorical dtype (the union of both
+    categories). Numeric columns missing from one of them (e.g. the score of a label a chunk never predicted) are
+    0 for its rows, in the dtype of the other (e.g. np.float32). """
+    a = a.assign(**_zero_columns(b, a))
+    b = b.assign(**_zero_columns(a, b))
+    for col in a.columns:
+        if isinstance(a[col].dtype, pd.CategoricalDtype) and col in b.columns and a[col].dtype != b[col].dtype:
+            categories = pd.api.types.union_categoricals([a[col], b[col]]).categories
+            a = a.assign(**{col: a[col].cat.set_categories(categories)})
+            b = b.assign(**{col: b[col].cat.set_categories(categories)})
+    return pd.concat([a, b], ignore_index=True)
+
+
+def _zero_columns(source: pd.DataFrame, target: pd.DataFrame) -> Dict[Any, pd.Series]:
+    # Zero columns (for the rows of target) for the numeric columns of source the target does not have
+    types = pd.api.types
+    return {
+        col: pd.Series(0, index=target.index, dtype=source[col].dtype) for col in source.columns
+        if col not in target.columns and types.is_numeric_dtype(source[col].dtype)
+        and not types.is_bool_dtype(source[col].dtype) and not isinstance(source[col].dtype, pd.CategoricalDtype)
+    }
+
+
+def combine_counter(a: Counter, b: Counter) -> Counter:
+    """ Add the counts of two partial Counters. """
+    a.update(b)
+    return a
+
+
+def combine_set(a: set, b: set) -> set:
+    """ Union two partial sets. """
+    a.update(b)
+    return a
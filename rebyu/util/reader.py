@@ -0,0 +1,261 @@
+import pathlib
+from typing import Any, AnyStr, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+FORMAT_CSV = 'csv'
+FORMAT_JSON = 'json'
+FORMAT_JSONL = 'jsonl'
+FORMAT_PARQUET = 'parquet'
+FORMAT_FEATHER = 'feather'
+FORMAT_ARROW = 'arrow'
+
+FORMATS = {
+    '.csv': FORMAT_CSV,
+    '.json': FORMAT_JSON,
+    '.jsonl': FORMAT_JSONL,
+    '.ndjson': FORMAT_JSONL,
+    '.parquet': FORMAT_PARQUET,
+    '.pq': FORMAT_PARQUET,
+    '.feather': FORMAT_FEATHER,
+    '.arrow': FORMAT_ARROW,
+    '.ipc': FORMAT_ARROW,
+}
+
+COMPRESSIONS = {
+    '.gz': 'gzip',
+    '.zst': 'zstd',
+}
+
+# Rows of a JSON Lines file parsed at once when only some of its columns are read
+JSON_CHUNK_ROWS = 65536
+
+
+def file_format(path: AnyStr) -> Tuple[AnyStr, Optional[AnyStr]]:
+    """ Get the format and the compression of a file from its suffixes (e.g. reviews.jsonl.gz).
+
+    :param path: Path to a file
+    :return: (format, compression), compression is None for uncompressed files
+    """
+    suffixes = [suffix.lower() for suffix in pathlib.Path(path).suffixes]
+    compression = COMPRESSIONS.get(suffixes[-1]) if suffixes else None
+    if compression is not None:
+        suffixes = suffixes[:-1]
+
+    fmt = FORMATS.get(suffixes[-1]) if suffixes else None
+    if fmt is None or (compression is not None and fmt in (FORMAT_PARQUET, FORMAT_FEATHER, FORMAT_ARROW)):
+        raise ValueError(f'Unsupported file: {path}')
+    return fmt, compression
+
+
+def _project(data: pd.DataFrame,
+             columns: Optional[List[AnyStr]] = None,
+             dtype: Optional[Dict] = None,
+             copy: bool = True):
+    if columns is not None:
+        data = data[list(columns)].copy() if copy else _select(data, columns)
+    if dtype:
+        data = data.astype({col: value for col, value in dtype.items() if col in data.columns})
+    return data
+
+
+def _arrow_type(arrow_type: Any) -> Any:
+    import pyarrow as pa
+
+    if pa.types.is_string(arrow_type):
+        return pd.StringDtype('pyarrow')
+    if pa.types.is_large_string(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def _narrow_strings(table: Any) -> Any:
+    # large_string columns (e.g. written by Polars) are cast to string (only their offsets are rebuilt, the
+    # character data is shared) so that they become string[pyarrow]; chunks over 2 GB stay large_string
+    import pyarrow as pa
+
+    if not isinstance(table, pa.Table):
+        table = pa.Table.from_batches([table])
+    for idx, field in enumerate(table.schema):
+        if pa.types.is_large_string(field.type):
+            try:
+                table = table.set_column(idx, field.name, table.column(idx).cast(pa.string()))
+            except (pa.ArrowInvalid, pa.ArrowCapacityError):
+                pass
+    return table
+
+
+def is_arrow_table(data: Any) -> bool:
+    """ Check whether the data is a pyarrow.Table (without importing pyarrow).
+
+    :param data: Any data
+    :return: bool
+    """
+    return type(data).__name__ == 'Table' and type(data).__module__.startswith('pyarrow')
+
+
+def arrow_to_frame(table: Any, columns: Optional[List[AnyStr]] = None, dtype: Optional[Dict] = None) -> pd.DataFrame:
+    """ Convert a pyarrow.Table (or RecordBatch) into a DataFrame without copying its string columns: they are
+    wrapped as read-only string[pyarrow] columns over the Arrow buffers (e.g. of a memory-mapped file).
+
+    :param table: pyarrow.Table or pyarrow.RecordBatch
+    :param columns: (Optional) Only keep these columns
+    :param dtype: (Optional) Dtypes of columns (Dict of column -> dtype)
+    :return: pd.DataFrame
+    """
+    if columns is not None:
+        table = table.select(list(columns))
+    table = _narrow_strings(table)
+    return _project(table.to_pandas(types_mapper=_arrow_type, split_blocks=True), dtype=dtype)
+
+
+def read_arrow(path: AnyStr, columns: Optional[List[AnyStr]] = None, memory_map: bool = True) -> Any:
+    """ Read an Arrow IPC (file or stream format) or Feather file as a pyarrow.Table. With memory_map, the table
+    points into the mapped file instead of a copy in memory (uncompressed files only are zero-copy).
+
+    :param path: Path to an Arrow IPC or Feather file
+    :param columns: (Optional) Only read these columns
+    :param memory_map: Determines whether the file is memory-mapped
+    :return: pyarrow.Table
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    if file_format(path)[0] == FORMAT_FEATHER:
+        return feather.read_table(path, columns=columns, memory_map=memory_map)
+
+    source = pa.memory_map(path, 'r') if memory_map else pa.OSFile(path, 'r')
+    try:
+        table = pa.ipc.open_file(source).read_all()
+    except pa.ArrowInvalid:
+        source.seek(0)
+        table = pa.ipc.open_stream(source).read_all()
+    return table.select(list(columns)) if columns is not None else table
+
+
+def _select(data: pd.DataFrame, columns: List[AnyStr]) -> pd.DataFrame:
+    missing = [col for col in columns if col not in data.columns]
+    if missing:
+        raise KeyError(f'{missing} not in the columns')
+
+    # A new frame over the columns of data (in the requested order, like data[columns]), not copying them
+    return pd.DataFrame({col: data[col] for col in columns}, index=data.index, copy=False)
+
+
+def read_data(path: AnyStr,
+              columns: Optional[List[AnyStr]] = None,
+              dtype: Optional[Dict] = None,
+              memory_map: bool = True) -> pd.DataFrame:
+    """ Read a CSV, JSON, JSON Lines, Parquet, Feather or Arrow IPC file (CSV and JSON Lines may be gzip or
+    zstd compressed). Feather and Arrow IPC files are memory-mapped, their string columns are not copied
+    (see arrow_to_frame).
+
+    Columns are projected while parsing: CSV, Parquet, Feather and Arrow skip parsing the other columns, JSON
+    Lines files are parsed in chunks of JSON_CHUNK_ROWS rows, each projected before they are concatenated. A
+    (plain) JSON file is parsed whole, with every column, and projected afterwards.
+
+    :param path: Path to a file
+    :param columns: (Optional) Only read these columns
+    :param dtype: (Optional) Dtypes of columns (Dict of column -> dtype)
+    :param memory_map: Determines whether Feather and Arrow IPC files are memory-mapped
+    :return: pd.DataFrame
+    """
+    fmt, compression = file_format(path)
+
+    if fmt == FORMAT_CSV:
+        return pd.read_csv(path, usecols=columns, dtype=dtype, compression=compression)
+    if fmt == FORMAT_JSONL and columns is not None:
+        chunks = list(_read_json_chunks(path, JSON_CHUNK_ROWS, columns=columns, dtype=dtype, compression=compression))
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=list(columns))
+    if fmt in (FORMAT_JSON, FORMAT_JSONL):
+        data = pd.read_json(path, lines=fmt == FORMAT_JSONL, dtype=dtype or True, compression=compression)
+        return _project(data, columns)
+    if fmt == FORMAT_PARQUET:
+        return _project(pd.read_parquet(path, columns=columns), dtype=dtype)
+    return arrow_to_frame(read_arrow(path, columns=columns, memory_map=memory_map), dtype=dtype)
+
+
+def _read_json_chunks(path: AnyStr, chunksize: int, columns: Optional[List[AnyStr]] = None,
+                      dtype: Optional[Dict] = None, compression: Optional[AnyStr] = None) -> Iterator[pd.DataFrame]:
+    with pd.read_json(path, lines=True, chunksize=chunksize, dtype=dtype or True, compression=compression) as reader:
+        for chunk in reader:
+            yield _project(chunk, columns)
+
+
+def _read_parquet_chunks(path: AnyStr, chunksize: int, columns: Optional[List[AnyStr]] = None,
+                         dtype: Optional[Dict] = None) -> Iterator[pd.DataFrame]:
+    import pyarrow.parquet as pq
+
+    start = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+        chunk = _project(batch.to_pandas(), dtype=dtype)
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+
+def _read_arrow_chunks(path: AnyStr, chunksize: int, columns: Optional[List[AnyStr]] = None,
+                       dtype: Optional[Dict] = None) -> Iterator[pd.DataFrame]:
+    start = 0
+    for batch in read_arrow(path, columns=columns).to_batches(max_chunksize=chunksize):
+        chunk = arrow_to_frame(batch, dtype=dtype)
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+
+def read_chunks(path: AnyStr, chunksize: int, columns: Optional[List[AnyStr]] = None,
+                dtype: Optional[Dict] = None) -> Iterator[pd.DataFrame]:
+    """ Read a CSV, JSON Lines, Parquet, Feather or Arrow IPC file chunk by chunk (CSV and JSON Lines may be gzip
+    or zstd compressed, JSON files are read as JSON Lines, Feather and Arrow IPC files are memory-mapped).
+
+    :param path: Path to a file
+    :param chunksize: Number of rows per chunk
+    :param columns: (Optional) Only read these columns
+    :param dtype: (Optional) Dtypes of columns (Dict of column -> dtype)
+    :return: Iterator of pd.DataFrame
+    """
+    fmt, compression = file_format(path)
+
+    if fmt == FORMAT_CSV:
+        return pd.read_csv(path, chunksize=chunksize, usecols=columns, dtype=dtype, compression=compression)
+    if fmt in (FORMAT_JSON, FORMAT_JSONL):
+        return _read_json_chunks(path, chunksize, columns=columns, dtype=dtype, compression=compression)
+    if fmt == FORMAT_PARQUET:
+        return _read_parquet_chunks(path, chunksize, columns=columns, dtype=dtype)
+    return _read_arrow_chunks(path, chunksize, columns=columns, dtype=dtype)
+
+
+def load_data(data: Any,
+              columns: Optional[List[AnyStr]] = None,
+              dtype: Optional[Dict] = None,
+              copy: bool = True) -> Any:
+    """ Load the input data of Rebyu as a new DataFrame (the caller's data is never modified).
+
+    Without copy, a DataFrame (or Series) is not copied but wrapped in a new frame sharing its columns
+    (a copy-on-write view with pandas copy-on-write enabled). Storing a column in the new frame replaces the
+    column instead of writing into it, so only the columns the steps write are materialised and the
+    caller's frame stays unchanged. The columns are projected in the requested order, as with copy.
+
+    :param data: pd.DataFrame, pd.Series, pyarrow.Table (see arrow_to_frame) or path to a file (see read_data)
+    :param columns: (Optional) Only keep these columns
+    :param dtype: (Optional) Dtypes of columns (Dict of column -> dtype)
+    :param copy: Determines whether a DataFrame (or Series) is deep-copied
+    :return: pd.DataFrame
+    """
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+
+    if isinstance(data, pd.DataFrame):
+        projected = _project(data, columns, dtype, copy=copy)
+        if projected is data:
+            return data.copy(deep=copy)
+        return projected
+
+    if is_arrow_table(data):
+        return arrow_to_frame(data, columns=columns, dtype=dtype)
+
+    if isinstance(data, (str, pathlib.Path)):
+        return read_data(str(data), columns=columns, dtype=dtype)
+
+    return data
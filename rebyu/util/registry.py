@@ -0,0 +1,206 @@
+import threading
+from collections import OrderedDict
+from typing import Any, AnyStr, Callable, Optional, Tuple
+
+from rebyu.util.backend import BACKEND_TORCH, BACKEND_TORCH_INT8, BACKEND_ONNX, ORT_TASKS, PIPELINE_MODEL_KWARGS
+from rebyu.util.backend import check_backend, quantize_model, int8_model, onnx_model, ort_class_of
+from rebyu.util.backend import pipeline_model_class
+from rebyu.util.logger import Logger
+
+
+def model_nbytes(obj: Any) -> int:
+    """ Estimate the memory held by a loaded model (parameters and buffers), a pipeline (its model) or 0 for
+    objects without parameters (e.g. tokenizers).
+
+    :param obj: Any loaded object
+    :return: int
+    """
+    if hasattr(obj, 'model') and not hasattr(obj, 'parameters'):
+        obj = obj.model
+
+    nbytes = 0
+    for attr in ('parameters', 'buffers'):
+        tensors = getattr(obj, attr, None)
+        if callable(tensors):
+            nbytes += sum(t.numel() * t.element_size() for t in tensors())
+    return nbytes
+
+
+class ModelRegistry(object):
+    """
+    Model Registry
+
+    A process-wide store of loaded models, tokenizers and pipelines. An object is loaded once per
+    (loader, name, arguments) and shared by every step, pipeline and Rebyu instance of the process. Objects are
+    evicted least-recently-used first once the registry holds more than `max_items` objects or more than
+    `max_bytes` of model parameters.
+    """
+
+    def __init__(self, max_items: Optional[int] = 8, max_bytes: Optional[int] = None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+        self.registry_logger = Logger(self.__class__.__name__)
+
+    @staticmethod
+    def key(loader: Callable, name: Any, **kwargs) -> Tuple:
+        """ Get the registry key of a loader call.
+
+        :param loader: The loading function (e.g. AutoTokenizer.from_pretrained)
+        :param name: The pretrained model name
+        :param kwargs: Additional arguments to the loader
+        :return: Tuple
+        """
+        loader_id = f'{getattr(loader, "__module__", "")}.{getattr(loader, "__qualname__", repr(loader))}'
+        owner = getattr(loader, '__self__', None)
+        if isinstance(owner, type):
+            # Inherited classmethods (e.g. AutoModel.from_pretrained) share their qualified name
+            loader_id = f'{owner.__module__}.{owner.__qualname__}:{loader_id}'
+        return loader_id, name, repr(sorted(kwargs.items()))
+
+    def get(self, loader: Callable, name: Any, **kwargs) -> Any:
+        """ Get a loaded object, loading (and registering) it on the first call.
+
+        :param loader: The loading function (e.g. AutoTokenizer.from_pretrained)
+        :param name: The pretrained model name
+        :param kwargs: Additional arguments to the loader
+        :return: Any
+        """
+        key = self.key(loader, name, **kwargs)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+
+            obj = loader(name, **kwargs)
+            self._entries[key] = (obj, model_nbytes(obj))
+            self.evict()
+            return obj
+
+    def nbytes(self) -> int:
+        """ Get the total (estimated) size of the registered objects in bytes.
+
+        :return: int
+        """
+        with self._lock:
+            return sum(nbytes for _, nbytes in self._entries.values())
+
+    def evict(self):
+        """ Evict least-recently-used objects until the registry fits its budget. The most recent object is
+        always kept.
+
+        :return:
+        """
+        with self._lock:
+            while len(self._entries) > 1 and self._over_budget():
+                (_, name, _), _ = self._entries.popitem(last=False)
+                self.registry_logger.info(f'Evicted {name} from the model registry')
+
+    def _over_budget(self) -> bool:
+        if self.max_items is not None and len(self._entries) > self.max_items:
+            return True
+        return self.max_bytes is not None and self.nbytes() > self.max_bytes
+
+    def configure(self, max_items: Optional[int] = 8, max_bytes: Optional[int] = None):
+        """ Set the budget of the registry (evicting objects if needed).
+
+        :param max_items: (Optional) Maximum number of registered objects
+        :param max_bytes: (Optional) Maximum size of the registered models in bytes
+        :return:
+        """
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.evict()
+
+    def clear(self):
+        """ Remove every registered object.
+
+        :return:
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: Tuple):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f'ModelRegistry(items={len(self)}, max_items={self.max_items}, max_bytes={self.max_bytes})'
+
+
+REGISTRY = ModelRegistry()
+"""The process-wide model registry"""
+
+
+def load_pretrained(cls: Any, model_name: AnyStr, backend: AnyStr = BACKEND_TORCH, **kwargs) -> Any:
+    """ Load a pretrained model or tokenizer (`cls.from_pretrained`) through the model registry.
+
+    :param cls: The transformers class (e.g. AutoTokenizer, AutoModel)
+    :param model_name: The pretrained model name
+    :param backend: The model backend, 'torch', 'torch-int8' (dynamic int8 quantization) or 'onnx' (ONNX Runtime)
+    :param kwargs: Additional arguments to from_pretrained
+    :return: Any
+    """
+    check_backend(backend)
+    if backend == BACKEND_TORCH:
+        return REGISTRY.get(cls.from_pretrained, model_name, **kwargs)
+    return REGISTRY.get(_build_model, (cls, model_name, backend), **kwargs)
+
+
+def load_pipeline(task: AnyStr, model: AnyStr = None, backend: AnyStr = BACKEND_TORCH, **kwargs) -> Any:
+    """ Load a transformers pipeline through the model registry.
+
+    :param task: The name of the task for the pretrained model
+    :param model: The pretrained model name
+    :param backend: The model backend, 'torch', 'torch-int8' (dynamic int8 quantization) or 'onnx' (ONNX Runtime)
+    :param kwargs: Additional arguments to the pipeline
+    :return: transformers.Pipeline
+    """
+    check_backend(backend)
+    if backend == BACKEND_TORCH:
+        return REGISTRY.get(_build_pipeline, (task, model), **kwargs)
+    return REGISTRY.get(_build_pipeline, (task, model, backend), **kwargs)
+
+
+def _build_model(name: Tuple, **kwargs) -> Any:
+    cls, model_name, backend = name
+    if backend == BACKEND_ONNX:
+        return onnx_model(ort_class_of(cls), model_name, **kwargs)
+    return int8_model(cls, model_name, **kwargs)
+
+
+def _build_pipeline(name: Tuple, **kwargs) -> Any:
+    from transformers import pipeline
+
+    task, model, backend = name if len(name) == 3 else (*name, BACKEND_TORCH)
+    if backend == BACKEND_ONNX:
+        if model is None or task not in ORT_TASKS:
+            raise ValueError(f"The 'onnx' backend needs a model name and one of the tasks {tuple(ORT_TASKS)}")
+        kwargs.setdefault('tokenizer', model)
+        model_kwargs = _pipeline_model_kwargs(kwargs)
+        return pipeline(task=task, model=onnx_model(ORT_TASKS[task], model, **model_kwargs), **kwargs)
+
+    model_class = pipeline_model_class(task) if backend == BACKEND_TORCH_INT8 and model is not None else None
+    if model_class is not None:
+        # the quantized model is cached (see int8_model)
+        kwargs.setdefault('tokenizer', model)
+        model_kwargs = _pipeline_model_kwargs(kwargs)
+        return pipeline(task=task, model=int8_model(model_class, model, **model_kwargs), **kwargs)
+
+    pipe = pipeline(task=task, model=model, **kwargs)
+    if backend == BACKEND_TORCH_INT8:
+        pipe.model = quantize_model(pipe.model)
+    return pipe
+
+
+def _pipeline_model_kwargs(kwargs: dict) -> dict:
+    # Arguments of the model of a pipeline (model_kwargs is popped from the pipeline arguments)
+    model_kwargs = dict(kwargs.pop('model_kwargs', None) or {})
+    for key in PIPELINE_MODEL_KWARGS:
+        if key in kwargs:
+            model_kwargs.setdefault(key, kwargs[key])
+    return model_kwargs
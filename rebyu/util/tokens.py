@@ -0,0 +1,349 @@
+import itertools
+import sys
+from typing import Any, AnyStr, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import ExtensionArray, ExtensionDtype, register_extension_dtype, take
+from pandas.api.indexers import check_array_indexer
+
+
+@register_extension_dtype
+class TokenDtype(ExtensionDtype):
+    """
+    Token Dtype
+
+    The pandas dtype of a compact token column (see TokenArray), named 'tokens'.
+    """
+
+    name = 'tokens'
+    type = tuple
+    kind = 'O'
+    na_value = np.nan
+
+    @classmethod
+    def construct_array_type(cls):
+        return TokenArray
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+def _is_row(value: Any) -> bool:
+    # A single row of tokens (or a missing row), as opposed to a sequence of rows
+    if _is_missing(value):
+        return True
+    return isinstance(value, (list, tuple)) and all(isinstance(token, str) for token in value)
+
+
+class TokenArray(ExtensionArray):
+    """
+    Token Array
+
+    A compact column of tokenized rows. Instead of a Python list of Python strings per row, the tokens of every
+    row are kept in one flat buffer of token ids (np.int32) with the row boundaries in an offsets array
+    (the tokens of row i are `ids[offsets[i]:offsets[i + 1]]`), and every distinct token string is kept once
+    in `vocab`. Rows read (and iterate) as tuples of tokens, so functions iterating a column of tokens work
+    unchanged. Setting rows rebuilds the buffers. Series.explode gives one token per row from pandas 2.2 on
+    (older versions leave the column unchanged, explode `series.astype(object)` there).
+    """
+
+    def __init__(self,
+                 ids: np.ndarray,
+                 offsets: np.ndarray,
+                 vocab: Sequence[AnyStr],
+                 mask: Optional[np.ndarray] = None):
+        self._ids = np.asarray(ids, dtype=np.int32)
+        self._offsets = np.asarray(offsets, dtype=np.int64)
+        self._vocab = tuple(vocab)
+        self._mask = np.zeros(len(self._offsets) - 1, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+
+    @classmethod
+    def from_tokens(cls, rows: Iterable[Any], vocab: Optional[Sequence[AnyStr]] = None) -> 'TokenArray':
+        """ Create a TokenArray from rows of tokens (missing rows stay missing).
+
+        :param rows: Any iterable of lists of tokens
+        :param vocab: (Optional) Tokens with already assigned ids (new tokens get the next ids)
+        :return: TokenArray
+        """
+        vocab = list(vocab or ())
+        index: Dict[AnyStr, int] = {token: idx for idx, token in enumerate(vocab)}
+
+        def intern(token: AnyStr) -> int:
+            idx = index.get(token)
+            if idx is None:
+                idx = index[token] = len(vocab)
+                vocab.append(token)
+            return idx
+
+        ids, lengths, mask = [], [], []
+        for row in rows:
+            missing = _is_missing(row)
+            mask.append(missing)
+            if missing:
+                lengths.append(0)
+                continue
+            start = len(ids)
+            ids.extend(intern(token) for token in row)
+            lengths.append(len(ids) - start)
+
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(np.asarray(ids, dtype=np.int32), offsets, vocab, np.asarray(mask, dtype=bool))
+
+    @classmethod
+    def from_ids(cls, rows: Sequence[Sequence[int]]) -> 'TokenArray':
+        """ Create a TokenArray from rows of integer token ids (e.g. the input ids of a transformers tokenizer).
+        The ids are copied into the buffer as they are and the vocab maps every id to itself, so rows read as
+        tuples of ids.
+
+        :param rows: Sequence of sequences of token ids
+        :return: TokenArray
+        """
+        lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        ids = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int32, count=int(offsets[-1]))
+        return cls(ids, offsets, range(int(ids.max()) + 1 if len(ids) else 0))
+
+    # -- ExtensionArray -- #
+
+    @classmethod
+    def _from_sequence(cls, scalars: Any, *, dtype: Any = None, copy: bool = False):
+        if isinstance(scalars, TokenArray):
+            return scalars.copy() if copy else scalars
+        return cls.from_tokens(scalars)
+
+    @classmethod
+    def _from_factorized(cls, values: np.ndarray, original: 'TokenArray'):
+        return cls.from_tokens(values, vocab=original.vocab)
+
+    @classmethod
+    def _concat_same_type(cls, to_concat: Sequence['TokenArray']):
+        to_concat = list(to_concat)
+        if not to_concat:
+            return cls(np.zeros(0, dtype=np.int32), np.zeros(1, dtype=np.int64), ())
+
+        vocab = list(to_concat[0].vocab)
+        index = {token: idx for idx, token in enumerate(vocab)}
+        ids, lengths = [], []
+        for arr in to_concat:
+            if arr.vocab is to_concat[0].vocab:
+                ids.append(arr._ids[arr._offsets[0]:arr._offsets[-1]])
+            else:
+                remap = np.empty(len(arr.vocab), dtype=np.int32)
+                for idx, token in enumerate(arr.vocab):
+                    if token not in index:
+                        index[token] = len(vocab)
+                        vocab.append(token)
+                    remap[idx] = index[token]
+                ids.append(remap[arr._ids[arr._offsets[0]:arr._offsets[-1]]])
+            lengths.append(arr.lengths())
+
+        lengths = np.concatenate(lengths)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        mask = np.concatenate([arr._mask for arr in to_concat])
+        return cls(np.concatenate(ids), offsets, vocab, mask)
+
+    @property
+    def dtype(self) -> TokenDtype:
+        return TokenDtype()
+
+    @property
+    def nbytes(self) -> int:
+        vocab = sys.getsizeof(self._vocab) + sum(sys.getsizeof(token) for token in self._vocab)
+        return self._ids.nbytes + self._offsets.nbytes + self._mask.nbytes + vocab
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _row(self, idx: int) -> Any:
+        if self._mask[idx]:
+            return self.dtype.na_value
+        vocab = self._vocab
+        return tuple(vocab[token] for token in self._ids[self._offsets[idx]:self._offsets[idx + 1]].tolist())
+
+    def __getitem__(self, item: Any) -> Any:
+        if isinstance(item, (int, np.integer)):
+            return self._row(item if item >= 0 else len(self) + item)
+        if isinstance(item, slice) and item.step in (None, 1):
+            start, stop, _ = item.indices(len(self))
+            stop = max(start, stop)
+            return TokenArray(self._ids, self._offsets[start:stop + 1], self._vocab, self._mask[start:stop])
+
+        item = check_array_indexer(self, item)
+        return self.take(np.arange(len(self))[item])
+
+    def __setitem__(self, key: Any, value: Any):
+        # Rows are variable-length slices of one buffer, so the buffers are rebuilt with the new rows
+        key = check_array_indexer(self, key)
+        positions = np.atleast_1d(np.arange(len(self))[key]).tolist()
+        rows = [value] * len(positions) if _is_row(value) else list(value)
+        if len(rows) != len(positions):
+            raise ValueError(f'Cannot set {len(rows)} rows into {len(positions)} positions')
+
+        values = self.astype(object)
+        for pos, row in zip(positions, rows):
+            values[pos] = row
+        array = TokenArray.from_tokens(values, vocab=self._vocab)
+        self._ids, self._offsets, self._vocab, self._mask = array._ids, array._offsets, array._vocab, array._mask
+
+    def __iter__(self) -> Iterator[Any]:
+        vocab, ids, na = self._vocab, self._ids, self.dtype.na_value
+        bounds = self._offsets.tolist()
+        for idx, missing in enumerate(self._mask.tolist()):
+            if missing:
+                yield na
+            else:
+                yield tuple(vocab[token] for token in ids[bounds[idx]:bounds[idx + 1]].tolist())
+
+    def __eq__(self, other: Any) -> np.ndarray:
+        values = self.astype(object)
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return NotImplemented
+        if isinstance(other, (TokenArray, np.ndarray, list)) and len(other) == len(self):
+            return np.array([a == tuple(b) if isinstance(b, (list, tuple)) else False for a, b in zip(values, other)])
+        other = tuple(other) if isinstance(other, list) else other
+        return np.array([a == other for a in values])
+
+    def __array__(self, dtype: Any = None) -> np.ndarray:
+        return self.astype(object)
+
+    def isna(self) -> np.ndarray:
+        return self._mask.copy()
+
+    def take(self, indices: Any, allow_fill: bool = False, fill_value: Any = None) -> 'TokenArray':
+        indices = np.asarray(indices, dtype=np.int64)
+        if allow_fill:
+            if not _is_missing(fill_value):
+                values = take(self.astype(object), indices, allow_fill=True, fill_value=fill_value)
+                return TokenArray.from_tokens(values, vocab=self._vocab)
+            missing = indices == -1
+            if (indices < -1).any():
+                raise ValueError('Invalid value in indices, must be all >= -1 with allow_fill=True')
+            indices = np.where(missing, 0, indices)
+        else:
+            missing = None
+
+        if len(self) == 0:
+            if len(indices) and (missing is None or not missing.all()):
+                raise IndexError('Cannot take from an empty TokenArray')
+            return TokenArray(np.zeros(0, dtype=np.int32), np.zeros(len(indices) + 1, dtype=np.int64), self._vocab,
+                              np.ones(len(indices), dtype=bool))
+
+        indices = np.where(indices < 0, indices + len(self), indices)
+        if ((indices < 0) | (indices >= len(self))).any():
+            raise IndexError('Index out of bounds for TokenArray')
+
+        mask = self._mask[indices]
+        if missing is not None:
+            mask = mask | missing
+        starts = self._offsets[indices]
+        lengths = np.where(mask, 0, self._offsets[indices + 1] - starts)
+
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return TokenArray(self._ids[positions], offsets, self._vocab, mask)
+
+    def copy(self) -> 'TokenArray':
+        start, stop = self._offsets[0], self._offsets[-1]
+        return TokenArray(self._ids[start:stop].copy(), self._offsets - start, self._vocab, self._mask.copy())
+
+    def astype(self, dtype: Any, copy: bool = True) -> Any:
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if isinstance(dtype, TokenDtype):
+            return self.copy() if copy else self
+        if dtype == np.dtype(object):
+            values = np.empty(len(self), dtype=object)
+            for idx, row in enumerate(self):
+                values[idx] = row
+            return values
+        if isinstance(dtype, pd.StringDtype):
+            return pd.array([None if missing else str(row) for row, missing in zip(self, self._mask)], dtype=dtype)
+        if dtype.kind in 'US':
+            # the string form of every row (an object array, as pandas keeps strings)
+            values = np.empty(len(self), dtype=object)
+            values[:] = [str(row) for row in self]
+            return values
+        return super().astype(dtype, copy=copy)
+
+    def _values_for_factorize(self) -> Tuple[np.ndarray, Any]:
+        values = self.astype(object)
+        values[self._mask] = None
+        return values, None
+
+    def _explode(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Series.explode (pandas >= 2.1): one token per row, missing and empty rows give a single NaN
+        lengths = self.lengths()
+        counts = np.where(lengths == 0, 1, lengths)
+        values = np.full(int(counts.sum()), np.nan, dtype=object)
+        tokens = np.empty(len(self._vocab), dtype=object)
+        tokens[:] = self._vocab
+        values[np.repeat(lengths > 0, counts)] = tokens[self._ids[self._offsets[0]:self._offsets[-1]]]
+        return values, counts
+
+    def value_counts(self, dropna: bool = True) -> pd.Series:
+        """ Count the distinct rows.
+
+        :param dropna: Determines whether missing rows are left out
+        :return: pd.Series (rows -> count)
+        """
+        values = self.astype(object)
+        codes, uniques = pd.factorize(values, use_na_sentinel=dropna)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        return pd.Series(counts, index=pd.Index(uniques, dtype=object, tupleize_cols=False), name='count')
+
+    # -- Tokens -- #
+
+    @property
+    def vocab(self) -> Tuple[AnyStr, ...]:
+        """ Distinct tokens, indexed by token id.
+
+        :return: Tuple of Strings
+        """
+        return self._vocab
+
+    def lengths(self) -> np.ndarray:
+        """ Number of tokens of every row.
+
+        :return: np.ndarray (int64)
+        """
+        return np.diff(self._offsets)
+
+    def row_ids(self, idx: int) -> np.ndarray:
+        """ Token ids of a row.
+
+        :param idx: Row index
+        :return: np.ndarray (int32)
+        """
+        return self._ids[self._offsets[idx]:self._offsets[idx + 1]]
+
+    def select(self, keep: np.ndarray) -> 'TokenArray':
+        """ Keep only the tokens whose vocabulary entry is flagged, in every row.
+
+        :param keep: Boolean np.ndarray, indexed by token id
+        :return: TokenArray
+        """
+        start, stop = self._offsets[0], self._offsets[-1]
+        ids = self._ids[start:stop]
+        kept = np.asarray(keep, dtype=bool)[ids]
+        rows = np.repeat(np.arange(len(self), dtype=np.int64), self.lengths())
+
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows[kept], minlength=len(self)), out=offsets[1:])
+        return TokenArray(ids[kept], offsets, self._vocab, self._mask.copy())
+
+    def tolist(self) -> List[Any]:
+        return list(self)
+
+
+def is_token_series(series: Any) -> bool:
+    """ Check whether a series is a compact token column (see TokenArray).
+
+    :param series: Any series of data
+    :return: bool
+    """
+    return isinstance(series, pd.Series) and isinstance(series.dtype, TokenDtype)
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+from typing import Any
+
+from rebyu.analysis.misc import length_buckets
+from rebyu.analysis.misc import pad_ids
+from rebyu.analysis.misc import transformers_pipeline
+from rebyu.analysis.misc import to_columnar
+from rebyu.util.mapreduce import get_mapreduce
+
+
+class FakeTokenizer(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts: Any):
+        self.calls += 1
+        return {'input_ids': [text.split() for text in texts]}
+
+
+class FakePipeline(object):
+
+    def __init__(self):
+        self.tokenizer = FakeTokenizer()
+        self.calls = []
+
+    def __call__(self, data: Any, batch_size: int = 1):
+        if isinstance(data, str):
+            return [{'label': data.upper(), 'score': 1.0}]
+        self.calls.append(list(data))
+        return [[{'label': text.upper(), 'score': 1.0}] for text in data]
+
+
+@pytest.mark.parametrize('lengths,batch_size,max_tokens,expected', [
+    ([3, 1, 2, 1], None, None, [[1, 3, 2, 0]]),
+    ([3, 1, 2, 1], 2, None, [[1, 3], [2, 0]]),
+    ([3, 1, 2, 1], None, 4, [[1, 3], [2], [0]]),
+    ([3, 1, 2, 1], 3, 6, [[1, 3, 2], [0]]),
+    ([10], 2, 4, [[0]]),
+    ([], 2, 4, []),
+])
+def test_length_buckets(lengths: Any, batch_size: Any, max_tokens: Any, expected: Any):
+    assert length_buckets(lengths, batch_size=batch_size, max_tokens=max_tokens) == expected
+
+
+def test_transformers_pipeline_batched(monkeypatch):
+    pipe = FakePipeline()
+    monkeypatch.setattr('rebyu.analysis.misc.load_pipeline', lambda **kwargs: pipe)
+
+    series = ['a very long review here', 'short', 'two words', 'a b c']
+    unbatched = transformers_pipeline(series)
+    batched = transformers_pipeline(series, batch_size=2)
+
+    assert batched == unbatched
+    assert [x['label'] for x in batched] == [x.upper() for x in series]
+    assert pipe.calls == [['short', 'two words'], ['a b c', 'a very long review here']]
+    assert pipe.tokenizer.calls == 0
+
+
+def test_pad_ids():
+    ids = [np.array([1, 2, 3], dtype=np.int32), np.array([4], dtype=np.int32), np.array([], dtype=np.int32)]
+    input_ids, attention_mask = pad_ids(ids, pad_id=9)
+
+    assert input_ids.tolist() == [[1, 2, 3], [4, 9, 9], [9, 9, 9]]
+    assert attention_mask.tolist() == [[1, 1, 1], [1, 0, 0], [0, 0, 0]]
+    assert input_ids.dtype == np.int64
+
+
+@pytest.mark.parametrize('outputs,labels,expected', [
+    ([{'label': 'positive', 'score': 0.9}, {'label': 'negative', 'score': 0.6}], None,
+     {'label': ['positive', 'negative'], 'score': [0.9, 0.6]}),
+    ([{'label': 'neutral', 'score': 0.5}], ['negative', 'neutral', 'positive'],
+     {'label': ['neutral'], 'score': [0.5]}),
+    ([[{'label': 'joy', 'score': 0.7}, {'label': 'anger', 'score': 0.2}], [{'label': 'anger', 'score': 0.9}]],
+     ['anger', 'fear', 'joy'], {'anger': [0.2, 0.9], 'fear': [0.0, 0.0], 'joy': [0.7, 0.0]}),
+])
+def test_to_columnar(outputs: Any, labels: Any, expected: Any):
+    result = to_columnar(outputs, labels=labels)
+
+    assert list(result.columns) == list(expected)
+    for col, values in expected.items():
+        if col == 'label':
+            assert isinstance(result[col].dtype, pd.CategoricalDtype)
+            assert result[col].tolist() == values
+            assert list(result[col].cat.categories) == (labels or list(dict.fromkeys(values)))
+        else:
+            assert result[col].dtype == np.float32
+            assert np.allclose(result[col].to_numpy(), values)
+
+
+def test_transformers_pipeline_columnar(monkeypatch):
+    class FakePipeline(object):
+        model = type('Model', (), {'config': type('Config', (), {'id2label': {1: 'positive', 0: 'negative'}})})
+
+        def __call__(self, text: Any):
+            return [{'label': 'positive' if 'good' in text else 'negative', 'score': 0.5}]
+
+    monkeypatch.setattr('rebyu.analysis.misc.load_pipeline', lambda **kwargs: FakePipeline())
+
+    result = transformers_pipeline(['good', 'bad', 'good'], columnar=True)
+    assert result['label'].tolist() == ['positive', 'negative', 'positive']
+    assert list(result['label'].cat.categories) == ['negative', 'positive']
+    assert result['label'].cat.codes.tolist() == [1, 0, 1]
+    assert result['score'].dtype == np.float32
+
+
+def test_to_columnar_combine():
+    a = to_columnar([{'label': 'joy', 'score': 0.5}])
+    b = to_columnar([{'label': 'anger', 'score': 0.25}, {'label': 'joy', 'score': 1.0}])
+
+    result = get_mapreduce(transformers_pipeline).combine(a, b)
+    assert isinstance(result['label'].dtype, pd.CategoricalDtype)
+    assert result['label'].tolist() == ['joy', 'anger', 'joy']
+    assert result['score'].dtype == np.float32
+
+
+def test_to_columnar_combine_labels():
+    a = to_columnar([[{'label': 'joy', 'score': 0.5}, {'label': 'anger', 'score': 0.25}]])
+    b = to_columnar([[{'label': 'fear', 'score': 1.0}]], labels=['fear'])
+
+    result = get_mapreduce(transformers_pipeline).combine(a, b)
+    assert list(result.columns) == ['joy', 'anger', 'fear']
+    assert (result.dtypes == np.float32).all()
+    assert result.to_numpy().tolist() == [[0.5, 0.25, 0.0], [0.0, 0.0, 1.0]]
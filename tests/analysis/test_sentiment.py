@@ -1,8 +1,10 @@
+import numpy as np
 import pytest
 from typing import Any
 
 from rebyu.analysis.sentiment import textblob_polarity
 from rebyu.analysis.sentiment import vader_polarity
+from rebyu.analysis.sentiment import VADER_SCORES
 
 from textblob import TextBlob
 
@@ -43,3 +45,29 @@ def test_textblob_polarity(series: Any):
     assert all(-1 <= x['neu'] <= 1 for x in result)
     assert all(-1 <= x['pos'] <= 1 for x in result)
     assert all(-1 <= x['compound'] <= 1 for x in result)
+
+
+@pytest.fixture
+def no_nltk_data(monkeypatch):
+    class FakeAnalyzer(object):
+
+        def polarity_scores(self, text: Any):
+            score = 0.5 if 'best' in text else 0.0
+            return {'neg': 0.0, 'neu': 1.0 - score, 'pos': score, 'compound': score}
+
+    monkeypatch.setattr('rebyu.analysis.sentiment.nltk_dependency_mgt', lambda required=None: None)
+    monkeypatch.setattr('rebyu.analysis.sentiment.SentimentIntensityAnalyzer', FakeAnalyzer)
+
+
+def test_polarity_columnar(no_nltk_data: Any):
+    series = ['i just had the best coffee', TextBlob('i just had the worst coffee'), '']
+
+    result = textblob_polarity(series, columnar=True)
+    assert result.dtype == np.float32
+    assert np.allclose(result, textblob_polarity(series))
+
+    result = vader_polarity(series, columnar=True)
+    assert list(result.columns) == list(VADER_SCORES)
+    assert all(result[col].dtype == np.float32 for col in VADER_SCORES)
+    assert result.to_dict('records') == vader_polarity(series)
+    assert vader_polarity([], columnar=True).shape == (0, len(VADER_SCORES))
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from typing import Any
+
+from rebyu.compose import idvocab
+from rebyu.compose.dtm import doc_term_matrix
+from rebyu.compose.vocab import counter_vocab
+
+from rebyu.util.mapreduce import get_mapreduce
+
+
+@pytest.fixture
+def series():
+    return [
+        'good good product'.split(), 'bad product'.split(), [], 'good price'.split(), 'product price price'.split()
+    ]
+
+
+def dense_counts(series: Any, tokens: Any):
+    return np.array([[row.count(token) for token in tokens] for row in series])
+
+
+@pytest.mark.parametrize('cutoff', [0, 1, 2, 3])
+def test_doc_term_matrix(series: Any, cutoff: int):
+    result = doc_term_matrix(series, cutoff)
+
+    assert result.shape == (len(series), len(counter_vocab(series, cutoff)))
+    assert set(result.vocab.tokens) == set(counter_vocab(series, cutoff))
+    assert result.toarray().tolist() == dense_counts(series, result.vocab.tokens).tolist()
+    assert result.nnz == np.count_nonzero(result.toarray())
+
+
+def test_doc_term_matrix_weighting(series: Any):
+    counts = doc_term_matrix(series, 1).toarray()
+    tf = doc_term_matrix(series, 1, weighting='tf').toarray()
+    tfidf = doc_term_matrix(series, 1, weighting='tfidf').toarray()
+
+    totals = counts.sum(axis=1, keepdims=True)
+    expected_tf = np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0)
+    idf = np.log((1 + len(series)) / (1 + (counts > 0).sum(axis=0))) + 1
+    assert np.allclose(tf, expected_tf)
+    assert np.allclose(tfidf, expected_tf * idf)
+
+    with pytest.raises(ValueError):
+        doc_term_matrix(series, 1, weighting='bm25')
+
+
+@pytest.mark.parametrize('chunksize', [1, 2, 3])
+def test_doc_term_matrix_mapreduce(series: Any, chunksize: int):
+    contract = get_mapreduce(doc_term_matrix)
+    args = {'cutoff': 2, 'weighting': 'tfidf'}
+
+    partials = [contract.map(doc_term_matrix, series[i:i + chunksize], args) for i in range(0, len(series), chunksize)]
+    merged = contract.merge(partials)
+    result = contract.output(merged, args)
+    expected = doc_term_matrix(series, **args)
+
+    assert result.vocab.tokens == expected.vocab.tokens
+    assert result.indptr.tolist() == expected.indptr.tolist()
+    assert np.allclose(result.toarray(), expected.toarray())
+    assert contract.output(merged, args).nnz == result.nnz
+
+
+@pytest.mark.parametrize('block_rows', [1, 2, 4])
+def test_doc_term_matrix_blocks(monkeypatch, series: Any, block_rows: int):
+    expected = doc_term_matrix(series, 1)
+    monkeypatch.setattr(idvocab, 'BLOCK_ROWS', block_rows)
+    result = doc_term_matrix(series, 1)
+
+    assert result.vocab.tokens == expected.vocab.tokens
+    assert result.indptr.tolist() == expected.indptr.tolist()
+    assert result.toarray().tolist() == expected.toarray().tolist()
+    assert doc_term_matrix([], 1).shape == (0, 0)
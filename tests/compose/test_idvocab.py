@@ -0,0 +1,84 @@
+from collections import Counter
+import numpy as np
+import pytest
+from typing import Any
+
+from rebyu.compose.idvocab import IdVocabulary, UNK_ID
+from rebyu.compose.idvocab import id_vocab
+from rebyu.compose.vocab import counter_vocab
+
+from rebyu.util.mapreduce import get_mapreduce
+
+
+@pytest.mark.parametrize('series,cutoff', [
+    (['i am eating a burger'.split()], 2),
+    (['i i i i'.split(), 'i i i i'.split()], 2),
+    (['i a i a b c'.split()], 2),
+    (['bbb ccc ddd'.split()], 1),
+    ([[], []], 1),
+])
+def test_id_vocab(series: Any, cutoff: Any):
+    result = id_vocab(series, cutoff)
+    assert isinstance(result, IdVocabulary)
+    assert result.frozen
+    assert result.to_counter() == counter_vocab(series, cutoff)
+
+    for idx, token in enumerate(result.tokens):
+        assert result.lookup(token) == idx
+        assert result.token(idx) == token
+
+
+def test_id_vocab_lookup():
+    vocab = id_vocab(['good good product'.split(), 'bad product'.split()], cutoff=1)
+
+    assert vocab.tokens == ['good', 'product', 'bad']
+    assert vocab.counts.tolist() == [2, 2, 1]
+    assert vocab['good'] == 2 and vocab['missing'] == 0
+    assert vocab.lookup_ids(['bad', 'missing', 'good']).tolist() == [2, UNK_ID, 0]
+    with pytest.raises(ValueError):
+        vocab.update([['more']])
+
+
+def test_id_vocab_mapreduce():
+    series = ['a b c a'.split(), 'b d'.split(), 'a e'.split(), 'e e d'.split()]
+    contract = get_mapreduce(id_vocab)
+
+    partials = [contract.map(id_vocab, series[i:i + 2], {'cutoff': 2}) for i in range(0, len(series), 2)]
+    result = contract.reduce(partials, {'cutoff': 2})
+    assert result.to_counter() == counter_vocab(series, 2)
+
+
+def test_id_vocab_weights():
+    weighted = id_vocab(['a b'.split(), 'b c'.split()], cutoff=1, weights=np.array([3, 2]))
+    assert weighted.to_counter() == id_vocab(['a b'.split()] * 3 + ['b c'.split()] * 2, cutoff=1).to_counter()
+
+
+def test_id_vocab_grow():
+    vocab = IdVocabulary(capacity=1).update([[str(i) for i in range(100)], ['0']])
+    assert len(vocab) == 100
+    assert vocab['0'] == 2 and vocab['99'] == 1
+
+
+@pytest.mark.parametrize('frozen', [True, False])
+def test_id_vocab_save_load(tmp_path, frozen: bool):
+    vocab = IdVocabulary().update(['naïve café 🙂 café'.split(), ['', 'a']])
+    if frozen:
+        vocab.freeze()
+    vocab.save(tmp_path / 'vocab.npz')
+
+    loaded = IdVocabulary.load(tmp_path / 'vocab.npz')
+    assert loaded.tokens == vocab.tokens
+    assert loaded.counts.tolist() == vocab.counts.tolist()
+    assert loaded.frozen == frozen
+
+
+def test_id_vocab_encode_blocks():
+    series = ['good good product'.split(), [], 'bad product'.split(), 'good price'.split()]
+
+    vocab = IdVocabulary()
+    blocks = list(vocab.encode(series, weights=[1, 2, 3, 2], block_rows=3))
+
+    assert [len(lengths) for _, lengths in blocks] == [3, 1]
+    assert np.concatenate([ids for ids, _ in blocks]).tolist() == [0, 0, 1, 2, 1, 0, 3]
+    assert vocab.to_counter() == IdVocabulary().update(series, weights=[1, 2, 3, 2]).to_counter()
+    assert vocab.to_counter() == Counter({'good': 4, 'product': 4, 'bad': 3, 'price': 2})
@@ -1,10 +1,14 @@
 import pytest
 from typing import Any
 
+from rebyu.compose import vocab
 from rebyu.compose.vocab import counter_vocab
 from rebyu.compose.vocab import counter_character_vocab
 from rebyu.compose.vocab import set_character_vocab
 from rebyu.compose.vocab import nltk_vocab
+from rebyu.compose.vocab import multi_vocab
+
+from rebyu.util.mapreduce import get_mapreduce
 
 from collections import Counter
 from nltk.lm import Vocabulary
@@ -56,3 +60,55 @@ def test_nltk_vocab(series: Any, cutoff: Any, expected: Any):
     result = nltk_vocab(series, cutoff)
     assert isinstance(result, Vocabulary)
     assert result.counts == expected.counts
+
+
+@pytest.mark.parametrize('func,series,cutoff', [
+    (counter_vocab, ['i a i a b c'.split(), 'a b d'.split(), 'e'.split()], 2),
+    (counter_character_vocab, ['i am eating a burger'.split(), 'a bc'.split()], 2),
+    (nltk_vocab, ['i i i i'.split(), 'i b b'.split(), 'c'.split()], 2),
+])
+def test_vocab_mapreduce(func: Any, series: Any, cutoff: Any):
+    contract = get_mapreduce(func)
+    partials = [contract.map(func, [data], {'cutoff': cutoff}) for data in series]
+
+    result = contract.reduce(partials, {'cutoff': cutoff})
+    expected = func(series, cutoff)
+    if isinstance(expected, Vocabulary):
+        assert result.counts == expected.counts
+        assert len(result) == len(expected)
+    else:
+        assert result == expected
+
+
+@pytest.mark.parametrize('series', [
+    ['i am eating a burger'.split(), 'naïve café 🙂'.split()],
+    ['i i i i'.split(), [], 'i a i a b c'.split()],
+    [[''], ['bbb', 'ccc', 'ddd']],
+])
+def test_multi_vocab(series: Any):
+    result = multi_vocab(series, cutoff=1, char_cutoff=2)
+
+    assert result['word_count'] == [len(x) for x in series]
+    assert result['vocab'] == counter_vocab(series, 1)
+    assert result['char_vocab'] == counter_character_vocab(series, 2)
+    assert result['char_set'] == set_character_vocab(series)
+
+    contract = get_mapreduce(multi_vocab)
+    partials = [contract.map(multi_vocab, series[i:i + 1], {'cutoff': 1, 'char_cutoff': 2}) for i in range(len(series))]
+    assert contract.reduce(partials, {'cutoff': 1, 'char_cutoff': 2}) == result
+
+
+def test_counter_character_vocab_weights():
+    series = ['ab ba'.split(), ['cc']]
+    result = counter_character_vocab(series, 0, weights=[2, 3])
+    assert result == counter_character_vocab(series[:1] * 2 + series[1:] * 3, 0)
+
+
+@pytest.mark.parametrize('weights', [None, [1, 2, 3, 1]])
+def test_counter_character_vocab_blocks(monkeypatch, weights: Any):
+    series = ['héllo wörld'.split(), [], ['😀', 'ab'], 'hello again'.split()]
+    expected = counter_character_vocab(series, 0, weights=weights)
+
+    monkeypatch.setattr(vocab, 'BLOCK_ROWS', 1)
+    assert counter_character_vocab(series, 0, weights=weights) == expected
+    assert multi_vocab(series, cutoff=1, char_cutoff=0)['char_vocab'] == counter_character_vocab(series, 0)
@@ -1,9 +1,13 @@
 import pandas as pd
 import pytest
 from typing import Any, List
+from unittest.mock import Mock
 
 from rebyu.pipeline.base import BaseStep
 from rebyu.pipeline.base import BasePipeline
+from rebyu.pipeline.base import FusedStep
+from rebyu.util.dependency import nltk_dependency_mgt, nltk_requires
+from rebyu.util.mapreduce import mapreduce, combine_rows
 
 
 def func_a(a: int, b: int = 0, c: int = 0):
@@ -120,6 +124,31 @@ def test_base_step_run_analysis(step_object):
     assert inp == exp
 
 
+def test_base_step_compute_deduped_analysis():
+    calls = []
+
+    def total(series: Any):
+        calls.append(len(series))
+        return sum(series)
+
+    @mapreduce(combine=combine_rows)
+    def doubled(series: Any):
+        calls.append(len(series))
+        return [x * 2 for x in series]
+
+    series = pd.Series([1, 2, 1, 2, 1])
+    step = BaseStep(sid='total', stype=BaseStep.STEP_ANALYZE, source='num', target='total', func=total)
+    assert not step.row_wise()
+    assert step.compute(series, dedupe=True) == 7
+    assert calls == [5]
+
+    calls.clear()
+    step = BaseStep(sid='doubled', stype=BaseStep.STEP_ANALYZE, source='num', target='doubled', func=doubled)
+    assert step.row_wise()
+    assert step.compute(series, dedupe=True) == [2, 4, 2, 4, 2]
+    assert calls == [2]
+
+
 def test_base_step_copy(step_object):
     copy_obj = step_object.copy()
     assert step_object.sid == copy_obj.sid
@@ -338,3 +367,151 @@ def test_base_pipeline_run(pipeline_object):
     assert analysis == exp_analysis
 
 
+
+
+def func_d(a: int, b: int = 0):
+    return a * 2 + b
+
+
+@pytest.fixture
+def fusable_pipeline_object():
+    return BasePipeline(
+        pid='fuse-pipeline',
+        steps=[
+            BaseStep(sid='abc', stype=BaseStep.STEP_PREPROCESS, source='num', target='num',
+                     func=func_a, func_args={'b': 1}),
+            BaseStep(sid='def', stype=BaseStep.STEP_PREPROCESS, source='num', target='num',
+                     func=func_d, func_args={'b': 3}),
+            BaseStep(sid='ghi', stype=BaseStep.STEP_PREPROCESS, source='num', target='num',
+                     func=func_b, func_args={'c': 2}),
+            BaseStep(sid='jkl', stype=BaseStep.STEP_PREPROCESS, source='num', target='double',
+                     func=func_d),
+            BaseStep(sid='mno', stype=BaseStep.STEP_COMPOSE, source='double', target='sum',
+                     func=func_c)
+        ]
+    )
+
+
+def test_base_pipeline_plan_fused(fusable_pipeline_object):
+    units = fusable_pipeline_object.plan()
+
+    assert len(units) == 3
+    assert isinstance(units[0], FusedStep)
+    assert [step.sid for step in units[0].steps] == ['abc', 'def', 'ghi']
+    assert units[1].sid == 'jkl'
+    assert units[2].sid == 'mno'
+
+
+def test_base_pipeline_plan_unfused(fusable_pipeline_object):
+    units = fusable_pipeline_object.plan(fuse=False)
+
+    assert len(units) == 5
+    assert not any(isinstance(unit, FusedStep) for unit in units)
+
+
+def test_base_pipeline_run_fused_equals_unfused(fusable_pipeline_object):
+    fused_data = pd.DataFrame([1, 2, 3], columns=['num'])
+    fused_comp = {}
+    fusable_pipeline_object.run(fused_data, fused_comp, {}, fuse=True)
+
+    assert fusable_pipeline_object.state() == (5, None)
+
+    fusable_pipeline_object.reset()
+
+    data = pd.DataFrame([1, 2, 3], columns=['num'])
+    comp = {}
+    fusable_pipeline_object.run(data, comp, {}, fuse=False)
+
+    assert fused_data.equals(data)
+    assert fused_comp == comp
+
+
+def func_e(text: str, suffix: str = ''):
+    return text + suffix
+
+
+def test_fused_step_batch():
+    from rebyu.preprocess.remove import remove_numbers, remove_whitespaces
+    from rebyu.preprocess.transform import cast_nan_str, cast_case
+
+    steps = [
+        BaseStep(sid='nan', stype=BaseStep.STEP_PREPROCESS, source='text', target='text', func=cast_nan_str),
+        BaseStep(sid='case', stype=BaseStep.STEP_PREPROCESS, source='text', target='text', func=cast_case),
+        BaseStep(sid='plus', stype=BaseStep.STEP_PREPROCESS, source='text', target='text', func=func_e,
+                 func_args={'suffix': '!'}),
+        BaseStep(sid='numbers', stype=BaseStep.STEP_PREPROCESS, source='text', target='text', func=remove_numbers),
+        BaseStep(sid='spaces', stype=BaseStep.STEP_PREPROCESS, source='text', target='text', func=remove_whitespaces),
+    ]
+    series = pd.Series(['Hello 123 ', None, ' 4 Wor1d'])
+
+    fused = FusedStep(steps)
+    assert fused.func.batch is not None
+    assert fused.compute(series).equals(series.apply(fused.func))
+
+
+@nltk_requires('punkt', 'stopwords')
+def func_f(a: int):
+    return a
+
+
+@nltk_requires('punkt', 'wordnet')
+def func_g(a: int):
+    return a
+
+
+def test_base_pipeline_prepare(monkeypatch):
+    lookups = []
+    monkeypatch.setattr('rebyu.util.dependency._NLTK_SATISFIED', set())
+    monkeypatch.setattr('rebyu.util.dependency.nltk.data.find', lambda path: lookups.append(path))
+
+    pipeline = BasePipeline(pid='test', steps=[
+        BaseStep(sid='f', stype=BaseStep.STEP_PREPROCESS, source='num', target='num', func=func_f),
+        BaseStep(sid='g', stype=BaseStep.STEP_PREPROCESS, source='num', target='num', func=func_g),
+        BaseStep(sid='a', stype=BaseStep.STEP_PREPROCESS, source='num', target='num', func=func_a),
+    ])
+    assert FusedStep(pipeline.steps_info()).resources() == ['punkt', 'stopwords', 'wordnet']
+    assert pipeline.prepare() == ['punkt', 'stopwords', 'wordnet']
+    assert len(lookups) == 3
+
+    data = pd.DataFrame({'num': [1, 2, 3]})
+    pipeline.run(data=data, composition={}, analysis={})
+    pipeline.prepare()
+    assert len(lookups) == 3
+
+
+@pytest.mark.parametrize('downloaded', [False, True])
+def test_nltk_dependency_mgt_download(monkeypatch, downloaded: bool):
+    downloads = []
+    monkeypatch.setattr('rebyu.util.dependency._NLTK_SATISFIED', set())
+    monkeypatch.setattr('rebyu.util.dependency.nltk.data.find', Mock(side_effect=LookupError))
+    monkeypatch.setattr('rebyu.util.dependency.nltk.download', lambda name: downloads.append(name) or downloaded)
+
+    nltk_dependency_mgt(required=['punkt'])
+    nltk_dependency_mgt(required=['punkt'])
+    assert downloads == ['punkt'] * (1 if downloaded else 2)
+
+
+def test_nltk_requires_direct_call(monkeypatch):
+    lookups = []
+    monkeypatch.setattr('rebyu.util.dependency._NLTK_SATISFIED', set())
+    monkeypatch.setattr('rebyu.util.dependency.nltk.data.find', lambda path: lookups.append(path))
+
+    @nltk_requires('punkt', 'stopwords')
+    def func_h(a: int):
+        """ Docstring """
+        return a + 1
+
+    assert [func_h(x) for x in range(3)] == [1, 2, 3]
+    assert lookups == ['tokenizers/punkt', 'corpora/stopwords']
+    assert func_h.nltk_resources == ('punkt', 'stopwords') and func_h.__doc__ == ' Docstring '
+
+
+def test_base_pipeline_input_columns():
+    pipeline = BasePipeline(pid='test', steps=[
+        BaseStep(sid='a', stype=BaseStep.STEP_PREPROCESS, source='text', target='text', func=func_a),
+        BaseStep(sid='b', stype=BaseStep.STEP_PREPROCESS, source='text', target='tokens', func=func_a),
+        BaseStep(sid='c', stype=BaseStep.STEP_COMPOSE, source='tokens', target='vocab', func=func_a),
+        BaseStep(sid='d', stype=BaseStep.STEP_ANALYZE, source='title', target='title', func=func_a),
+    ])
+    assert pipeline.input_columns() == ['text', 'title']
+    assert BasePipeline(pid='empty', steps=[]).input_columns() == []
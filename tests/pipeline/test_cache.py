@@ -0,0 +1,163 @@
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+from typing import Any
+
+from rebyu.pipeline.base import BaseStep
+from rebyu.pipeline.base import BasePipeline
+from rebyu.pipeline.cache import StepCache, series_fingerprint, step_fingerprint
+from rebyu.preprocess.transform import sub_replace
+from rebyu.util.mapreduce import mapreduce, combine_list
+
+CALLS = []
+
+
+def func_a(a: int, b: int = 0):
+    CALLS.append(a)
+    return a + b
+
+
+def func_split(text: Any):
+    return text.split()
+
+
+def func_c(series: Any, **kwargs):
+    CALLS.append(len(series))
+    return sum(len(x) for x in series) + sum(kwargs.values())
+
+
+@pytest.fixture
+def cache(tmp_path):
+    CALLS.clear()
+    return StepCache(path=str(tmp_path / 'cache'))
+
+
+@pytest.fixture
+def step_object():
+    return BaseStep(sid='abc', stype=BaseStep.STEP_PREPROCESS, source='num', target='num', func=func_a,
+                    func_args={'b': 10})
+
+
+def test_step_cache_hit(cache, step_object):
+    data = pd.DataFrame([1, 2, 3], columns=['num'])
+    step_object.run(data.copy(), {}, {}, cache=cache)
+    assert len(CALLS) == 3
+
+    result = step_object.run(data.copy(), {}, {}, cache=cache)[0]
+    assert len(CALLS) == 3
+    assert result['num'].tolist() == [11, 12, 13]
+
+
+@pytest.mark.parametrize('change', [
+    {'num': [1, 2, 4]},
+    {'func_args': {'b': 11}},
+    {'sid': 'xyz'},
+])
+def test_step_cache_miss(cache, step_object, change: Any):
+    step_object.run(pd.DataFrame([1, 2, 3], columns=['num']), {}, {}, cache=cache)
+
+    step_object.add_args(**change.get('func_args', {}))
+    step_object.set_sid(change.get('sid', step_object.sid))
+    step_object.run(pd.DataFrame(change.get('num', [1, 2, 3]), columns=['num']), {}, {}, cache=cache)
+    assert len(CALLS) == 6
+
+
+def test_step_cache_unhashable_column(cache):
+    step = BaseStep(sid='def', stype=BaseStep.STEP_COMPOSE, source='tokens', target='total', func=func_c)
+    data = pd.DataFrame({'tokens': [['a', 'b'], ['c']]})
+
+    comp = {}
+    step.run(data, comp, {}, cache=cache)
+    step.run(data, comp, {}, cache=cache)
+    assert CALLS == [2]
+    assert comp == {'total': 3}
+
+
+def test_step_cache_invalidate(cache, step_object):
+    data = pd.DataFrame([1, 2, 3], columns=['num'])
+    step_object.run(data.copy(), {}, {}, cache=cache)
+    cache.invalidate(step_object)
+    step_object.run(data.copy(), {}, {}, cache=cache)
+    assert len(CALLS) == 6
+
+    cache.invalidate()
+    assert cache.size() == 0
+
+
+def test_step_cache_evict(cache, step_object):
+    cache.max_bytes = 0
+    step_object.run(pd.DataFrame([1, 2, 3], columns=['num']), {}, {}, cache=cache)
+    assert cache.size() == 0
+
+
+def test_base_pipeline_run_cached(cache):
+    pipeline = BasePipeline(
+        pid='cache-pipeline',
+        steps=[
+            BaseStep(sid='split', stype=BaseStep.STEP_PREPROCESS, source='text', target='tokens', func=func_split),
+            BaseStep(sid='total', stype=BaseStep.STEP_ANALYZE, source='tokens', target='total', func=func_c),
+        ]
+    )
+
+    def run():
+        analysis = {}
+        pipeline.reset()
+        pipeline.run(pd.DataFrame({'text': ['a b', 'c d e']}), {}, analysis, cache=cache)
+        return analysis
+
+    assert run() == {'total': 5}
+    assert run() == {'total': 5}
+    assert CALLS == [2]
+
+    pipeline.tail.add_args(b=5)
+    assert run() == {'total': 10}
+    assert CALLS == [2, 2]
+
+
+@pytest.mark.parametrize('func_args', [{'sub': 'a', 'rep': 'b'}, {'sub': {'x', 'y', 'z', 'w'}, 'rep': ''}])
+def test_step_fingerprint_stable_across_processes(func_args: Any):
+    step = BaseStep(sid='sub', stype=BaseStep.STEP_PREPROCESS, source='tokens', target='tokens', func=sub_replace,
+                    func_args=func_args)
+    script = ('from rebyu.pipeline.base import BaseStep\n'
+              'from rebyu.pipeline.cache import step_fingerprint\n'
+              'from rebyu.preprocess.transform import sub_replace\n'
+              "step = BaseStep(sid='sub', stype=BaseStep.STEP_PREPROCESS, source='tokens', target='tokens', "
+              f"func=sub_replace, func_args={func_args!r})\n"
+              'print(step_fingerprint(step))\n')
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+
+    assert output.strip().splitlines()[-1] == step_fingerprint(step)
+
+
+def test_step_fingerprint_mapreduce():
+    def total(series: Any):
+        return sum(series)
+
+    step = BaseStep(sid='total', stype=BaseStep.STEP_ANALYZE, source='num', target='total', func=total)
+    fingerprints = [step_fingerprint(step)]
+    mapreduce(combine=combine_list)(total)
+    fingerprints.append(step_fingerprint(step))
+    mapreduce(combine=combine_list, finalize=sum)(total)
+    fingerprints.append(step_fingerprint(step))
+
+    assert len(set(fingerprints)) == 3
+
+
+@pytest.mark.parametrize('payload', [b'cdoes_not_exist\nThing\n.', b'crebyu.version\nMissing\n.'])
+def test_step_cache_load_stale(cache, step_object, payload: bytes):
+    series = pd.Series([1, 2, 3], name='num')
+    entry = cache.entry(step_object, series)
+    entry.parent.mkdir(parents=True)
+    entry.write_bytes(payload)
+
+    assert cache.load(step_object, series) == (False, None)
+    assert not entry.exists()
+
+
+def test_series_fingerprint_unhashable():
+    series = pd.Series([['a', 'b'], [{'c': 1}], None])
+
+    assert series_fingerprint(series) == series_fingerprint(series.copy())
+    assert series_fingerprint(series) != series_fingerprint(pd.Series([['a', 'c'], [{'c': 1}], None]))
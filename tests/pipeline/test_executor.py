@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+from typing import Any
+
+from rebyu.pipeline.base import BaseStep
+from rebyu.pipeline.base import BasePipeline
+from rebyu.pipeline.executor import ParallelExecutor, apply_series
+from rebyu.util.mapreduce import mapreduce, combine_list
+
+
+def func_a(a: int, b: int = 0):
+    return a + b
+
+
+@mapreduce(combine=combine_list)
+def func_double(series: Any):
+    return [x * 2 for x in series]
+
+
+@pytest.fixture
+def executor():
+    with ParallelExecutor(workers=2, chunksize=3) as ex:
+        yield ex
+
+
+def test_parallel_executor_chunks(executor):
+    chunks = executor.chunks(pd.Series(range(10)))
+    assert [len(x) for x in chunks] == [3, 3, 3, 1]
+
+
+def test_parallel_executor_apply(executor):
+    series = pd.Series(range(10), index=range(10, 0, -1))
+    result = executor.apply(series, func_a, {'b': 5})
+    assert result.equals(series.apply(func_a, b=5))
+
+
+def test_parallel_executor_apply_unpicklable(executor):
+    series = pd.Series(range(10))
+    result = executor.apply(series, lambda x: x + 1, {})
+    assert result.tolist() == list(range(1, 11))
+
+
+def test_parallel_executor_map_reduce(executor):
+    series = pd.Series(range(10))
+    assert executor.map_reduce(series, func_double, {}) == [x * 2 for x in range(10)]
+
+
+def test_base_pipeline_run_workers():
+    pipeline = BasePipeline(
+        pid='parallel-pipeline',
+        steps=[
+            BaseStep(sid='abc', stype=BaseStep.STEP_PREPROCESS, source='num', target='num',
+                     func=func_a, func_args={'b': 1}),
+            BaseStep(sid='def', stype=BaseStep.STEP_ANALYZE, source='num', target='double',
+                     func=func_double),
+        ]
+    )
+
+    data = pd.DataFrame(list(range(20)), columns=['num'])
+    analysis = {}
+    pipeline.run(data, {}, analysis, workers=2, chunksize=4)
+
+    assert data['num'].tolist() == list(range(1, 21))
+    assert analysis['double'] == [x * 2 for x in range(1, 21)]
+
+
+def test_apply_series_string_dtype():
+    series = pd.Series(['Great', 'good', pd.NA], dtype='string')
+
+    result = apply_series(series, lambda x: x if x is pd.NA else x.lower(), {})
+    assert result.dtype == series.dtype
+    assert result.tolist()[:2] == ['great', 'good']
+    assert apply_series(series.dropna(), len, {}).tolist() == [5, 4]
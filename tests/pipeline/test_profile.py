@@ -0,0 +1,81 @@
+import sys
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+from typing import Any
+
+from rebyu.pipeline.base import BaseStep
+from rebyu.pipeline.base import BasePipeline
+from rebyu.pipeline.profile import StepProfiler, PROFILE_COLUMNS, sizeof
+
+
+def func_a(a: int, b: int = 0):
+    return a + b
+
+
+def func_c(series: Any):
+    return [x * 2 for x in series]
+
+
+@pytest.fixture
+def pipeline_object():
+    return BasePipeline(
+        pid='profile-pipeline',
+        steps=[
+            BaseStep(sid='abc', stype=BaseStep.STEP_PREPROCESS, source='num', target='num', func=func_a),
+            BaseStep(sid='def', stype=BaseStep.STEP_PREPROCESS, source='num', target='other', func=func_a),
+            BaseStep(sid='ghi', stype=BaseStep.STEP_ANALYZE, source='num', target='double', func=func_c),
+        ]
+    )
+
+
+@pytest.mark.parametrize('value,expected', [
+    (np.zeros(10, dtype=np.float32), 40),
+    (pd.Series([1, 2, 3], dtype=np.int64), pd.Series([1, 2, 3], dtype=np.int64).memory_usage(deep=True)),
+])
+def test_sizeof(value: Any, expected: Any):
+    assert sizeof(value) == expected
+
+
+@pytest.mark.parametrize('value', [[1, 2, 3], ('a', 'b'), {'a', 'b'}, {'a': 1}, Counter({'a': 2, 'b': 1})])
+def test_sizeof_container(value: Any):
+    assert sizeof(value) > sys.getsizeof(value)
+
+
+def test_sizeof_vocabulary():
+    nltk_lm = pytest.importorskip('nltk.lm')
+    counts = Counter({'good': 3, 'bad': 2})
+    assert sizeof(nltk_lm.Vocabulary(counts)) > sizeof(counts)
+
+
+def test_sizeof_unknown():
+    assert np.isnan(sizeof(object()))
+
+
+@pytest.mark.parametrize('schedule', [None, 'thread', 'process'])
+@pytest.mark.parametrize('trace_memory', [False, True])
+def test_step_profiler_run(pipeline_object, schedule: Any, trace_memory: bool):
+    profiler = StepProfiler(trace_memory=trace_memory)
+    data = pd.DataFrame(list(range(100)), columns=['num'])
+    pipeline_object.run(data, {}, {}, profiler=profiler, schedule=schedule)
+
+    profile = profiler.to_frame().set_index('sid').sort_index()
+    assert list(profiler.to_frame().columns) == PROFILE_COLUMNS
+    assert profile.index.tolist() == ['abc', 'def', 'ghi']
+    assert (profile['rows'] == 100).all()
+    assert (profile['wall_time'] >= 0).all()
+    assert (profile['peak_memory'] >= 0).all()
+    assert (profile['output_size'] > 0).all()
+
+
+def test_step_profiler_unfused():
+    pipeline = BasePipeline(pid='profile-fused', steps=[
+        BaseStep(sid='a', stype=BaseStep.STEP_PREPROCESS, source='num', target='num', func=func_a),
+        BaseStep(sid='b', stype=BaseStep.STEP_PREPROCESS, source='num', target='num', func=func_a),
+    ])
+    profiler = StepProfiler()
+    pipeline.run(pd.DataFrame({'num': [1, 2, 3]}), {}, {}, profiler=profiler)
+
+    assert profiler.to_frame()['sid'].tolist() == ['a', 'b']
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+from typing import Any
+
+from rebyu.pipeline.base import BaseStep
+from rebyu.pipeline.base import BasePipeline
+from rebyu.pipeline.scheduler import DAGScheduler
+
+
+def func_a(a: int, b: int = 0):
+    return a + b
+
+
+def func_c(series: Any, **kwargs):
+    return sum(series) + sum(kwargs.values())
+
+
+@pytest.fixture
+def dag_steps():
+    return [
+        BaseStep(sid='prep', stype=BaseStep.STEP_PREPROCESS, source='num', target='num', func=func_a,
+                 func_args={'b': 1}),
+        BaseStep(sid='left', stype=BaseStep.STEP_ANALYZE, source='num', target='left', func=func_c),
+        BaseStep(sid='right', stype=BaseStep.STEP_ANALYZE, source='num', target='right', func=func_c,
+                 func_args={'b': 10}),
+        BaseStep(sid='copy', stype=BaseStep.STEP_PREPROCESS, source='num', target='other', func=func_a),
+        BaseStep(sid='compose', stype=BaseStep.STEP_COMPOSE, source='other', target='sum', func=func_c),
+        BaseStep(sid='overwrite', stype=BaseStep.STEP_PREPROCESS, source='other', target='num', func=func_a),
+    ]
+
+
+def test_dag_scheduler_graph(dag_steps):
+    dependencies = DAGScheduler.graph(dag_steps)
+
+    assert dependencies[0] == set()
+    assert dependencies[1] == {0}
+    assert dependencies[2] == {0}
+    assert dependencies[3] == {0}
+    assert dependencies[4] == {3}
+    assert dependencies[5] == {0, 1, 2, 3}
+
+
+def test_dag_scheduler_levels(dag_steps):
+    scheduler = DAGScheduler(dag_steps)
+    assert scheduler.levels() == [[0], [1, 2, 3], [4, 5]]
+
+
+def test_dag_scheduler_mode(dag_steps):
+    with pytest.raises(ValueError):
+        DAGScheduler(dag_steps, mode='gpu')
+
+
+@pytest.mark.parametrize('schedule', ['thread', 'process'])
+def test_base_pipeline_run_scheduled(dag_steps, schedule: Any):
+    pipeline = BasePipeline(pid='dag-pipeline', steps=dag_steps)
+
+    data, comp, analysis = pd.DataFrame([1, 2, 3], columns=['num']), {}, {}
+    pipeline.run(data, comp, analysis, schedule=schedule, max_workers=2)
+
+    pipeline.reset()
+    exp_data, exp_comp, exp_analysis = pd.DataFrame([1, 2, 3], columns=['num']), {}, {}
+    pipeline.run(exp_data, exp_comp, exp_analysis)
+
+    assert pipeline.state() == (6, None)
+    assert data[exp_data.columns].equals(exp_data)
+    assert comp == exp_comp
+    assert analysis == exp_analysis
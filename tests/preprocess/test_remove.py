@@ -1,4 +1,9 @@
+import re
+import warnings
+
+import pandas as pd
 import pytest
+from pandas.errors import PerformanceWarning
 from typing import Any
 
 from rebyu.preprocess.remove import trim_text
@@ -9,6 +14,12 @@ from rebyu.preprocess.remove import remove_whitespaces
 from rebyu.preprocess.remove import remove_specifics
 from rebyu.preprocess.remove import remove_emojis
 from rebyu.preprocess.remove import remove_stopwords
+from rebyu.preprocess.remove import remove_patterns
+from rebyu.preprocess.remove import remove_multi_patterns, compile_multi_pattern
+from rebyu.preprocess.remove import filter_stopwords, stopword_set
+from rebyu.preprocess.remove import MULTI_PATTERNS, NUMBERS_REGEX, arrow_pattern
+from rebyu.util.batch import get_batch, is_str_series, is_list_series
+from rebyu.util.tokens import TokenArray, TokenDtype
 
 
 @pytest.mark.parametrize('text,length,expected', [
@@ -100,3 +111,144 @@ def test_remove_emojis(text: Any, expected: Any):
 def test_remove_stopwords(text: Any, extra: Any, expected: Any):
     result = remove_stopwords(text, extra)
     assert result == expected
+
+
+@pytest.mark.parametrize('func,kwargs', [
+    (remove_numbers, {}),
+    (remove_urls, {}),
+    (remove_emojis, {}),
+    (remove_punctuations, {}),
+    (remove_whitespaces, {}),
+    (remove_specifics, {'sub': 'gonna'}),
+    (remove_specifics, {'sub': None}),
+    (remove_patterns, {'pattern': r'\s+'}),
+    (trim_text, {'length': 10}),
+    (trim_text, {'length': 10, 'pos': 'RIGHT'}),
+])
+def test_remove_batch(func: Any, kwargs: Any):
+    series = pd.Series([
+        'I was born in 1989', 'Did you go to www.google.com', '❤️❤️❤️❤️love', 'I\'d like to call you. Please!',
+        ' Never  gonna let you down    ', ''
+    ])
+    assert is_str_series(series)
+
+    result = get_batch(func)(series, **kwargs)
+    assert result.equals(series.apply(func, **kwargs))
+
+
+@pytest.mark.parametrize('func,kwargs,native', [
+    (remove_numbers, {}, True),
+    (remove_urls, {}, True),
+    (remove_emojis, {}, True),
+    (remove_punctuations, {}, True),
+    (remove_multi_patterns, {}, True),
+    (remove_multi_patterns, {'specifics': ['gonna', '.']}, True),
+    (remove_patterns, {'pattern': r'\s+'}, False),
+    (remove_patterns, {'pattern': r'(?<=o)n'}, False),
+])
+def test_remove_batch_arrow(func: Any, kwargs: Any, native: bool):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        pytest.skip('pyarrow is not available')
+
+    series = pd.Series([
+        'I was born in 1989 (١٩٨٩)', 'Did you go to www.google.com', '❤️❤️❤️❤️love', 'I\'d like to call you. Please!',
+        ' Never  gonna let you down    ', ''
+    ])
+    arrow = series.astype(pd.StringDtype('pyarrow'))
+
+    with warnings.catch_warnings():
+        if native:
+            warnings.simplefilter('error', PerformanceWarning)
+        result = get_batch(func)(arrow, **kwargs)
+    assert result.dtype == pd.StringDtype('pyarrow')
+    assert result.tolist() == series.apply(func, **kwargs).tolist()
+
+
+@pytest.mark.parametrize('pattern,expected', [
+    (NUMBERS_REGEX, r'\p{Nd}+'),
+    (r'[\d.]\\d', r'[\p{Nd}.]\\d'),
+    (r'\w+', None),
+    (r'end$', None),
+    (re.compile('a', flags=re.IGNORECASE), None),
+    ('(?i:a)|b', None),
+    (r'\(?i:a)', r'\(?i:a)'),
+])
+def test_arrow_pattern(pattern: Any, expected: Any):
+    assert arrow_pattern(pattern) == expected
+
+
+@pytest.mark.parametrize('text,patterns,specifics,expected', [
+    ('Did you go to www.google.com in 1989', MULTI_PATTERNS, None, 'Did you go to  in '),
+    ('good👍👍job 100%', MULTI_PATTERNS, None, 'goodjob %'),
+    ('Joseph Schwartz 42', [NUMBERS_REGEX], ['Joseph', 'z'], ' Schwart '),
+    ('a.b*c', [], ['.', '*'], 'abc'),
+    (None, MULTI_PATTERNS, None, None),
+])
+def test_remove_multi_patterns(text: Any, patterns: Any, specifics: Any, expected: Any):
+    result = remove_multi_patterns(text, patterns, specifics)
+    assert result == expected
+
+    series = pd.Series(['Did you go to www.google.com in 1989', 'good👍👍job 100%', 'Joseph Schwartz 42'])
+    batch_result = get_batch(remove_multi_patterns)(series, patterns=patterns, specifics=specifics)
+    assert batch_result.equals(series.apply(remove_multi_patterns, patterns=patterns, specifics=specifics))
+
+
+def test_compile_multi_pattern_scoped_flags():
+    patterns = (re.compile('abc', flags=re.IGNORECASE), 'xyz', re.compile(r'q  # letter q', flags=re.VERBOSE))
+    compiled = compile_multi_pattern(patterns)
+
+    assert compiled.flags == re.UNICODE
+    assert compiled.sub('', 'ABC abc XYZ xyz q') == '  XYZ  '
+    assert remove_multi_patterns('ABC abc XYZ xyz q', list(patterns)) == '  XYZ  '
+
+    series = pd.Series(['ABC abc XYZ xyz q'], dtype='string')
+    assert get_batch(remove_multi_patterns)(series, patterns=list(patterns)).tolist() == ['  XYZ  ']
+
+
+@pytest.fixture
+def fake_stopwords(monkeypatch):
+    calls = []
+
+    def words(language):
+        calls.append(language)
+        return ['a', 'is', 'the', 'this']
+
+    monkeypatch.setattr('rebyu.preprocess.remove.stopwords', type('Stopwords', (), {'words': staticmethod(words)}))
+    monkeypatch.setattr('rebyu.preprocess.remove.nltk_dependency_mgt', lambda required=None: None)
+    stopword_set.cache_clear()
+    yield calls
+    stopword_set.cache_clear()
+
+
+@pytest.mark.parametrize('tokens,extra,expected', [
+    (['This', 'is', 'a', 'Spatula'], None, ['Spatula']),
+    (['This', 'is', 'a', 'spatula'], ['spatula'], []),
+    (('Enraged', 'Monster'), None, ['Enraged', 'Monster']),
+    ('This is a text', None, 'This is a text'),
+    (None, None, None),
+])
+def test_filter_stopwords(fake_stopwords: Any, tokens: Any, extra: Any, expected: Any):
+    result = filter_stopwords(tokens, extra)
+    assert result == expected
+
+
+def test_filter_stopwords_batch(fake_stopwords: Any):
+    series = pd.Series([['This', 'is', 'a', 'Spatula'], ['The', 'Monster'], []])
+    assert is_list_series(series)
+
+    result = get_batch(filter_stopwords)(series)
+    assert result.equals(series.apply(filter_stopwords))
+    assert result.tolist() == [['Spatula'], ['Monster'], []]
+    assert fake_stopwords == ['english']
+
+
+def test_filter_stopwords_batch_compact(fake_stopwords: Any):
+    rows = [['This', 'is', 'a', 'Spatula'], ['The', 'Monster'], []]
+    series = pd.Series(TokenArray.from_tokens(rows))
+    assert is_list_series(series)
+
+    result = get_batch(filter_stopwords)(series)
+    assert isinstance(result.dtype, TokenDtype)
+    assert result.tolist() == [('Spatula',), ('Monster',), ()]
@@ -1,3 +1,5 @@
+import numpy as np
+import pandas as pd
 import pytest
 from typing import Any
 
@@ -14,6 +16,13 @@ from rebyu.preprocess.transform import nltk_tokenize
 from rebyu.preprocess.transform import nltk_porter_stem
 from rebyu.preprocess.transform import nltk_lancaster_stem
 from rebyu.preprocess.transform import nltk_wordnet_lemma
+from rebyu.preprocess.transform import transformers_tokenize
+from rebyu.preprocess.transform import compact_tokens
+from rebyu.preprocess.transform import word_count
+from rebyu.preprocess.transform import sentence_length
+
+from rebyu.util.batch import get_batch, is_str_series
+from rebyu.util.tokens import TokenDtype
 
 from textblob import TextBlob
 
@@ -201,3 +210,61 @@ def test_nltk_lancaster_stem(text: Any, expected: Any):
 def test_nltk_wordnet_lemma(text: Any, expected: Any):
     result = nltk_wordnet_lemma(text)
     assert result == expected
+
+
+@pytest.mark.parametrize('func,kwargs', [
+    (cast_nan_str, {}),
+    (cast_case, {'case': 'LOWER'}),
+    (cast_case, {'case': 'upper'}),
+    (cast_case, {'case': 'TITLE'}),
+    (sub_replace, {'sub': 'a', 'rep': 'b'}),
+    (sub_replace, {'sub': None, 'rep': None}),
+    (sentence_length, {}),
+])
+def test_transform_batch(func: Any, kwargs: Any):
+    series = pd.Series(['I JUST ATE A SANDWICH', 'i just ate a sandwich', 'Bicycle', ''])
+    assert is_str_series(series)
+
+    result = get_batch(func)(series, **kwargs)
+    assert result.equals(series.apply(func, **kwargs))
+
+
+class FakeTokenizer(object):
+
+    @classmethod
+    def from_pretrained(cls, model_name: Any):
+        return cls()
+
+    def __call__(self, text: Any, return_tensors: Any = None):
+        if isinstance(text, str):
+            return {'input_ids': [101] + [len(x) for x in text.split()] + [102]}
+        return {'input_ids': [self(x)['input_ids'] for x in text]}
+
+
+def test_transformers_tokenize_ids():
+    series = pd.Series(['a short review', 'hello', ''])
+    result = get_batch(transformers_tokenize)(series, tokenizer=FakeTokenizer, returns='ids')
+    expected = series.apply(transformers_tokenize, tokenizer=FakeTokenizer, returns='ids')
+
+    assert isinstance(result.dtype, TokenDtype) and result.array._ids.dtype == np.int32
+    assert result.tolist() == expected.tolist()
+    assert result[0] == (101, 1, 5, 6, 102) and result[2] == (101, 102)
+
+
+def test_compact_tokens():
+    series = pd.Series([['good', 'product'], [], ['good', 'good']], index=[3, 1, 2], name='tokens')
+
+    result = get_batch(compact_tokens)(series)
+    assert isinstance(result.dtype, TokenDtype)
+    assert result.index.tolist() == [3, 1, 2]
+    assert result.tolist() == [('good', 'product'), (), ('good', 'good')]
+    assert result.array.vocab == ('good', 'product')
+    assert compact_tokens(['good', 'product']) == ('good', 'product')
+
+    counts = get_batch(word_count)
+    assert counts.accepts(result) and not counts.accepts(series)
+    assert counts(result).equals(series.apply(word_count))
+
+    compact = get_batch(compact_tokens)
+    assert compact.accepts(result) and compact.accepts(pd.Series([['good'], None]))
+    assert not compact.accepts(pd.Series(['good', 'product']))
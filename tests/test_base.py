@@ -0,0 +1,310 @@
+import numpy as np
+import pandas as pd
+import pytest
+from typing import Any, AnyStr
+
+from rebyu.base import BaseRebyu
+from rebyu.pipeline.base import BaseStep
+from rebyu.pipeline.pipeline import RebyuPipeline
+from rebyu.pipeline.step import (
+    PREP_CAST_NAN,
+    PREP_CAST_CASE,
+    PREP_REMOVE_PUNCTUATIONS,
+    COMPOSE_COUNTER_VOCAB,
+    COMPOSE_SET_CHARVOCAB
+)
+
+from rebyu.util.mapreduce import mapreduce, combine_list, combine_rows
+
+
+def split_tokens(text: Any):
+    return text.split()
+
+
+@mapreduce(combine=combine_list)
+def token_lengths(series: Any):
+    return [len(x) for x in series]
+
+
+@mapreduce(combine=combine_rows)
+def token_stats(series: Any):
+    lengths = np.array([len(x) for x in series], dtype=np.int32)
+    return pd.DataFrame({
+        'length': lengths,
+        'size': pd.Categorical(np.where(lengths > 1, 'long', 'short'), categories=['short', 'long'])
+    })
+
+
+@pytest.fixture
+def reviews():
+    return pd.DataFrame({
+        'text': [
+            'Great product!', 'Good', None, 'great, GREAT product', 'not good at all',
+            'Good good good', 'Would buy again.', 'product is great', '', 'Good product'
+        ],
+        'rating': [5, 4, 1, 5, 1, 5, 4, 4, 3, 4]
+    })
+
+
+@pytest.fixture
+def stream_pipeline():
+    return RebyuPipeline(
+        pid='stream-pipeline',
+        steps=[
+            PREP_CAST_NAN,
+            PREP_CAST_CASE,
+            PREP_REMOVE_PUNCTUATIONS,
+            BaseStep(sid='split', stype=BaseStep.STEP_PREPROCESS, source='text', target='tokens',
+                     func=split_tokens),
+            COMPOSE_COUNTER_VOCAB,
+            COMPOSE_SET_CHARVOCAB,
+            BaseStep(sid='lengths', stype=BaseStep.STEP_ANALYZE, source='tokens', target='lengths',
+                     func=token_lengths)
+        ]
+    )
+
+
+@pytest.mark.parametrize('suffix', ['.csv', '.jsonl'])
+def test_base_rebyu_stream(tmp_path, reviews, stream_pipeline, suffix: Any):
+    path = tmp_path / f'reviews{suffix}'
+    output = tmp_path / f'output{suffix}'
+    if suffix == '.csv':
+        reviews.to_csv(path, index=False)
+    else:
+        reviews.to_json(path, orient='records', lines=True)
+
+    expected = BaseRebyu(reviews, stream_pipeline)
+    expected.run()
+
+    result = BaseRebyu.stream(str(path), stream_pipeline, chunksize=3, output=str(output))
+
+    assert result.composition('vocab') == expected.composition('vocab')
+    assert result.composition('char_vocab') == expected.composition('char_vocab')
+    assert result.analysis('lengths') is None
+    assert list(result.data.columns) == ['text', 'rating', 'tokens', 'lengths']
+    assert len(result.data) == 0
+
+    written = pd.read_csv(output) if suffix == '.csv' else pd.read_json(output, lines=True)
+    assert len(written) == len(reviews)
+    assert written['lengths'].tolist() == expected.analysis('lengths')
+
+
+def test_base_rebyu_stream_in_memory_analysis(tmp_path, reviews, stream_pipeline):
+    path = tmp_path / 'reviews.csv'
+    reviews.to_csv(path, index=False)
+
+    expected = BaseRebyu(reviews, stream_pipeline)
+    expected.run()
+
+    result = BaseRebyu.stream(str(path), stream_pipeline, chunksize=4)
+    assert result.analysis('lengths') == expected.analysis('lengths')
+
+
+def test_base_rebyu_stream_unmergeable(tmp_path, reviews):
+    path = tmp_path / 'reviews.csv'
+    reviews.to_csv(path, index=False)
+
+    pipeline = RebyuPipeline(
+        pid='unmergeable',
+        steps=[BaseStep(sid='count', stype=BaseStep.STEP_COMPOSE, source='rating', target='count', func=len)]
+    )
+    with pytest.raises(ValueError):
+        BaseRebyu.stream(str(path), pipeline, chunksize=3)
+
+
+def count_rows(series: Any):
+    return len(series)
+
+
+@pytest.mark.parametrize('keep_partials', [False, True])
+def test_base_rebyu_append(reviews, stream_pipeline, keep_partials: bool):
+    stream_pipeline.add(
+        BaseStep(sid='rows', stype=BaseStep.STEP_COMPOSE, source='rating', target='rows', func=count_rows)
+    )
+
+    expected = BaseRebyu(reviews, stream_pipeline)
+    expected.run()
+    assert not expected._partials
+
+    result = BaseRebyu(reviews.iloc[:4], stream_pipeline)
+    result.run(keep_partials=keep_partials)
+    assert result.composition('rows') == 4
+    assert bool(result._partials) == keep_partials
+
+    char_vocab = result.composition('char_vocab')
+    snapshot = set(char_vocab)
+    result.append(reviews.iloc[4:7])
+    assert char_vocab == snapshot
+    result.append(reviews.iloc[7:])
+
+    assert result.data.equals(expected.data)
+    assert result.composition('vocab') == expected.composition('vocab')
+    assert result.composition('char_vocab') == expected.composition('char_vocab')
+    assert result.composition('rows') == 10
+    assert result.analysis('lengths') == expected.analysis('lengths')
+
+
+def test_base_rebyu_append_new_rows_only(reviews, stream_pipeline):
+    seen = []
+
+    def seen_ratings(series: Any):
+        seen.append(series.tolist())
+        return series.tolist()
+
+    stream_pipeline.add(BaseStep(sid='seen', stype=BaseStep.STEP_COMPOSE, source='rating', target='ratings',
+                                 func=mapreduce(combine=combine_list)(seen_ratings)))
+
+    result = BaseRebyu(reviews.iloc[:6], stream_pipeline)
+    result.run(keep_partials=True)
+    kept, lengths = result._partials[('composition', 'ratings')], result._partials[('analysis', 'lengths')]
+    ratings = result.composition('ratings')
+
+    seen.clear()
+    result.append(reviews.iloc[6:8])
+    result.append(reviews.iloc[8:])
+
+    assert seen == [reviews['rating'].iloc[6:8].tolist(), reviews['rating'].iloc[8:].tolist()]
+    assert result._partials[('composition', 'ratings')] is kept
+    assert result._partials[('analysis', 'lengths')] is lengths
+    assert ratings == reviews['rating'].iloc[:6].tolist()
+    assert result.composition('ratings') == reviews['rating'].tolist()
+    assert len(result._appended) == 2
+    assert len(result.data) == len(reviews) and not result._appended
+
+
+def test_base_rebyu_profile(reviews, stream_pipeline):
+    rb = BaseRebyu(reviews, stream_pipeline)
+    assert rb.profile().empty
+
+    rb.run(profile=True)
+    profile = rb.profile()
+
+    assert profile['sid'].tolist() == [
+        'rb-cast_nan', 'rb-cast_case', 'rb-remove_punctuations', 'split', 'rb-counter_vocab', 'rb-set_charvocab',
+        'lengths'
+    ]
+    assert (profile['rows'] == len(reviews)).all()
+    assert (profile['peak_memory'] >= 0).all()
+    assert (profile['output_size'] > 0).all()
+
+    rb.run(profile='memory')
+    assert (rb.profile()['peak_memory'] >= 0).all()
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'schedule': 'thread'}, {'fuse': False}])
+def test_base_rebyu_run_dedupe(reviews, stream_pipeline, kwargs: Any):
+    data = pd.concat([reviews] * 3, ignore_index=True)
+
+    expected = BaseRebyu(data, stream_pipeline)
+    expected.run(**kwargs)
+
+    calls = []
+    stream_pipeline.add(BaseStep(
+        sid='count', stype=BaseStep.STEP_PREPROCESS, source='text', target='counted', func=calls.append
+    ))
+    result = BaseRebyu(data, stream_pipeline)
+    result.run(dedupe=True, **kwargs)
+
+    assert result.data.drop(columns='counted').equals(expected.data)
+    assert result.composition('vocab') == expected.composition('vocab')
+    assert result.composition('char_vocab') == expected.composition('char_vocab')
+    assert result.analysis('lengths') == expected.analysis('lengths')
+    assert len(calls) == expected.data['text'].nunique(dropna=False)
+
+
+def _storage(storage: AnyStr):
+    if storage != 'pyarrow':
+        return storage
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return pytest.param(storage, marks=pytest.mark.skip(reason='pyarrow is not available'))
+    return storage
+
+
+@pytest.mark.parametrize('storage', [_storage('python'), _storage('pyarrow')])
+def test_base_rebyu_string_storage(reviews, stream_pipeline, storage: Any):
+    reviews = reviews.dropna()
+    expected = BaseRebyu(reviews, stream_pipeline)
+    expected.run()
+
+    result = BaseRebyu(reviews, stream_pipeline, string_storage=storage)
+    assert result.data['text'].dtype == pd.StringDtype(storage)
+    assert result.data['rating'].dtype == reviews['rating'].dtype
+    assert reviews['text'].dtype == object
+
+    result.run()
+    assert result.data['text'].dtype == pd.StringDtype(storage)
+    assert result.data['text'].tolist() == expected.data['text'].tolist()
+    assert result.data['tokens'].tolist() == expected.data['tokens'].tolist()
+    assert result.composition('vocab') == expected.composition('vocab')
+
+
+@pytest.mark.parametrize('suffix', ['.csv', '.csv.gz', '.jsonl.gz'])
+def test_base_rebyu_columns(tmp_path, reviews, stream_pipeline, suffix: Any):
+    path = tmp_path / f'reviews{suffix}'
+    wide = reviews.assign(user=range(len(reviews)), store='x')
+    if '.csv' in suffix:
+        wide.to_csv(path, index=False)
+    else:
+        wide.to_json(path, orient='records', lines=True)
+
+    expected = BaseRebyu(reviews, stream_pipeline)
+    expected.run()
+
+    result = BaseRebyu(str(path), stream_pipeline, columns='pipeline', dtype={'text': str})
+    assert list(result.data.columns) == ['text']
+    result.run()
+    assert result.composition('vocab') == expected.composition('vocab')
+
+    streamed = BaseRebyu.stream(str(path), stream_pipeline, chunksize=3, columns=['text', 'rating'])
+    assert list(streamed.data.columns) == ['text', 'rating', 'tokens']
+    assert streamed.composition('vocab') == expected.composition('vocab')
+
+
+@pytest.mark.parametrize('columns', [None, 'pipeline'])
+def test_base_rebyu_no_copy(reviews, stream_pipeline, columns: Any):
+    reviews = reviews.assign(title='x')
+    original = reviews.copy()
+
+    expected = BaseRebyu(reviews, stream_pipeline, columns=columns)
+    expected.run()
+
+    result = BaseRebyu(reviews, stream_pipeline, columns=columns, copy=False)
+    if columns is None:
+        assert np.shares_memory(result.data['rating'].values, reviews['rating'].values)
+    assert np.shares_memory(result.data['text'].values, reviews['text'].values)
+
+    result.run()
+    assert result.data.equals(expected.data)
+    assert result.composition('vocab') == expected.composition('vocab')
+    assert reviews.equals(original)
+    assert list(reviews.columns) == list(original.columns)
+
+    series = BaseRebyu(reviews['text'], stream_pipeline, copy=False)
+    series.run()
+    assert reviews.equals(original)
+
+
+def test_base_rebyu_stream_columnar(tmp_path, reviews, stream_pipeline):
+    path, output = tmp_path / 'reviews.csv', tmp_path / 'output.csv'
+    reviews.to_csv(path, index=False)
+    stream_pipeline.add(BaseStep(sid='stats', stype=BaseStep.STEP_ANALYZE, source='tokens', target='stats',
+                                 func=token_stats))
+
+    expected = BaseRebyu(reviews, stream_pipeline)
+    expected.run()
+    stats = expected.analysis('stats')
+    assert stats['length'].dtype == np.int32 and isinstance(stats['size'].dtype, pd.CategoricalDtype)
+
+    result = BaseRebyu.stream(str(path), stream_pipeline, chunksize=4)
+    assert result.analysis('stats').equals(stats)
+
+    BaseRebyu.stream(str(path), stream_pipeline, chunksize=4, output=str(output))
+    written = pd.read_csv(output)
+    assert written['stats_length'].tolist() == stats['length'].tolist()
+    assert written['stats_size'].tolist() == stats['size'].tolist()
+
+    deduped = BaseRebyu(pd.concat([reviews] * 2, ignore_index=True), stream_pipeline)
+    deduped.run(dedupe=True)
+    assert deduped.analysis('stats').equals(pd.concat([stats] * 2, ignore_index=True))
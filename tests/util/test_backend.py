@@ -0,0 +1,122 @@
+import pickle
+import sys
+from types import SimpleNamespace
+
+import pytest
+from typing import Any
+
+from transformers import AutoModel, AutoModelForSequenceClassification, AutoModelForTokenClassification
+
+from rebyu.util import backend, registry
+from rebyu.util.backend import check_backend, onnx_model, ort_class_of
+from rebyu.util.registry import REGISTRY, load_pipeline, load_pretrained
+
+
+@pytest.mark.parametrize('backend', ['torch', 'torch-int8', 'onnx'])
+def test_check_backend(backend: Any):
+    check_backend(backend)
+
+
+def test_check_backend_unknown():
+    with pytest.raises(ValueError):
+        check_backend('tensorrt')
+    with pytest.raises(ValueError):
+        load_pipeline(task='text-classification', model='model', backend='tensorrt')
+    with pytest.raises(ValueError):
+        load_pretrained(AutoModel, 'model', backend='tensorrt')
+
+
+@pytest.mark.parametrize('cls,expected', [
+    (AutoModel, 'ORTModelForFeatureExtraction'),
+    (AutoModelForSequenceClassification, 'ORTModelForSequenceClassification'),
+    (AutoModelForTokenClassification, 'ORTModelForTokenClassification'),
+])
+def test_ort_class_of(cls: Any, expected: Any):
+    assert ort_class_of(cls) == expected
+
+
+def test_onnx_model_missing_optimum(monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, 'optimum.onnxruntime', None)
+    with pytest.raises(ImportError, match='optimum'):
+        onnx_model('ORTModelForSequenceClassification', 'model', cache_dir=tmp_path)
+
+
+class FakeModel(object):
+    calls = []
+
+    @classmethod
+    def from_pretrained(cls, name: Any, **kwargs):
+        cls.calls.append((str(name), kwargs))
+        return cls()
+
+    def save_pretrained(self, path: Any):
+        path.mkdir(parents=True)
+        (path / 'config.json').write_text('{}')
+
+
+class AutoModelForFake(FakeModel):
+    pass
+
+
+@pytest.fixture
+def fake_loaders(monkeypatch, tmp_path):
+    FakeModel.calls = []
+    onnxruntime = SimpleNamespace(ORTModelForFake=FakeModel, ORTModelForSequenceClassification=FakeModel)
+    monkeypatch.setitem(sys.modules, 'optimum', SimpleNamespace(onnxruntime=onnxruntime))
+    monkeypatch.setitem(sys.modules, 'optimum.onnxruntime', onnxruntime)
+    monkeypatch.setitem(sys.modules, 'torch', SimpleNamespace(
+        __version__='2.0', save=pickle.dump, load=lambda path, weights_only=True: pickle.loads(path.read_bytes())
+    ))
+    monkeypatch.setattr(backend, 'BACKEND_CACHE', str(tmp_path))
+    monkeypatch.setattr(backend, 'quantize_model', lambda model: ('quantized', model))
+    monkeypatch.setattr(registry, 'quantize_model', lambda model: ('quantized', model))
+    monkeypatch.setattr(registry, 'pipeline_model_class', lambda task: AutoModelForFake)
+    REGISTRY.clear()
+    yield FakeModel.calls
+    REGISTRY.clear()
+
+
+def test_load_pretrained_int8(fake_loaders, tmp_path):
+    result = load_pretrained(AutoModelForFake, 'org/model', backend='torch-int8', revision='v1')
+
+    assert result[0] == 'quantized' and isinstance(result[1], AutoModelForFake)
+    assert fake_loaders == [('org/model', {'revision': 'v1'})]
+    assert (tmp_path / 'torch-int8' / 'AutoModelForFake' / 'org--model@v1' / 'model-torch2.0.pt').exists()
+
+    REGISTRY.clear()
+    result = load_pretrained(AutoModelForFake, 'org/model', backend='torch-int8', revision='v1')
+    assert result[0] == 'quantized' and isinstance(result[1], AutoModelForFake)
+    assert len(fake_loaders) == 1
+
+
+def test_load_pipeline_int8(monkeypatch, fake_loaders):
+    import transformers
+
+    monkeypatch.setattr(transformers, 'pipeline', lambda **kwargs: kwargs)
+    for _ in range(2):
+        REGISTRY.clear()
+        result = load_pipeline('sentiment-analysis', 'org/model', backend='torch-int8', revision='v1')
+
+    assert fake_loaders == [('org/model', {'revision': 'v1'})]
+    assert result['model'][0] == 'quantized' and result['tokenizer'] == 'org/model'
+
+
+def test_load_pretrained_onnx(fake_loaders, tmp_path):
+    load_pretrained(AutoModelForFake, 'org/model', backend='onnx', revision='v1', trust_remote_code=True)
+    assert fake_loaders == [('org/model', {'export': True, 'revision': 'v1', 'trust_remote_code': True})]
+
+    onnx_model('ORTModelForFake', 'org/model', revision='v1', trust_remote_code=True)
+    path = tmp_path / 'onnx' / 'ORTModelForFake' / 'org--model@v1'
+    assert fake_loaders[-1] == (str(path), {'trust_remote_code': True})
+
+
+def test_load_pipeline_onnx(monkeypatch, fake_loaders):
+    import transformers
+
+    monkeypatch.setattr(transformers, 'pipeline', lambda **kwargs: kwargs)
+    result = load_pipeline('sentiment-analysis', 'org/model', backend='onnx', revision='v1',
+                           model_kwargs={'trust_remote_code': True})
+
+    assert fake_loaders == [('org/model', {'export': True, 'trust_remote_code': True, 'revision': 'v1'})]
+    assert isinstance(result['model'], FakeModel)
+    assert result['tokenizer'] == 'org/model' and result['revision'] == 'v1' and 'model_kwargs' not in result
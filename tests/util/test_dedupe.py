@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from typing import Any
+
+from rebyu.util.dedupe import factorize, broadcast, row_aligned
+
+
+@pytest.mark.parametrize('values', [
+    ['good', 'bad', 'good', None, '', None, 'bad'],
+    [['a', 'b'], ['c'], ['a', 'b'], [], []],
+    [np.array([1, 2], dtype=np.int32), np.array([3], dtype=np.int32), np.array([1, 2], dtype=np.int32)],
+    [1, 2, 2, 1, np.nan, np.nan],
+])
+def test_factorize(values: Any):
+    series = pd.Series(values, index=range(10, 10 + len(values)))
+    codes, uniques = factorize(series)
+
+    assert len(codes) == len(series)
+    assert len(uniques) < len(series)
+    restored = broadcast(uniques, codes, index=series.index)
+    assert restored.index.equals(series.index)
+    assert repr(restored.tolist()) == repr(series.tolist())
+
+
+def test_factorize_types():
+    series = pd.Series([1, 1.0, True, None, np.nan, 1, ['a'], ('a',), None], dtype=object)
+    codes, uniques = factorize(series)
+
+    assert codes.tolist() == [0, 1, 2, 3, 4, 0, 5, 6, 3]
+    assert repr(broadcast(uniques, codes).tolist()) == repr(series.tolist())
+
+
+def test_broadcast_copies():
+    codes = np.array([0, 1, 0])
+    rows = broadcast([['a'], {'b': 1}], np.array([0, 1, 0, 1]))
+    rows[0].append('z')
+    rows[1]['c'] = 2
+    assert rows[2] == ['a'] and rows[3] == {'b': 1}
+    assert rows[0] is not rows[2]
+
+    rows = broadcast([[{'entity': 'a'}], ['b']], codes)
+    assert rows[0] is not rows[2] and rows[0][0] is rows[2][0]
+
+    column = broadcast(pd.Series([['a'], ['b']]), codes)
+    column[0].append('c')
+    assert column.tolist() == [['a', 'c'], ['b'], ['a']]
+
+
+def test_broadcast():
+    codes = np.array([0, 1, 0, 2])
+    assert broadcast(['a', 'b', 'c'], codes) == ['a', 'b', 'a', 'c']
+    assert broadcast(np.array([[1, 2], [3, 4], [5, 6]]), codes).tolist() == [[1, 2], [3, 4], [1, 2], [5, 6]]
+    assert broadcast(pd.Series([1, 2, 3]), codes).tolist() == [1, 2, 1, 3]
+
+    frame = broadcast(pd.DataFrame({'label': pd.Categorical(['x', 'y', 'x']), 'score': [1, 2, 3]}), codes)
+    assert frame.index.tolist() == [0, 1, 2, 3]
+    assert frame['label'].dtype == 'category' and frame['score'].tolist() == [1, 2, 1, 3]
+
+
+@pytest.mark.parametrize('result,length,expected', [
+    ([1, 2, 3], 3, True),
+    (np.zeros((3, 2)), 3, True),
+    (np.float32(1.0), 1, False),
+    (pd.DataFrame({'a': [1, 2, 3], 'b': [4, 5, 6]}), 3, True),
+    ({'a': 1}, 1, False),
+    ([1, 2], 3, False),
+])
+def test_row_aligned(result: Any, length: int, expected: bool):
+    assert row_aligned(result, length) == expected
@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+import pytest
+from typing import Any
+
+from rebyu.preprocess.remove import remove_multi_patterns, remove_numbers, remove_punctuations
+from rebyu.util.batch import is_str_series
+from rebyu.util.reader import file_format, load_data, read_chunks, read_data
+
+
+def _requires(module: str, *values: Any):
+    try:
+        __import__(module)
+    except ImportError:
+        return pytest.param(*values, marks=pytest.mark.skip(reason=f'{module} is not available'))
+    return values if len(values) > 1 else values[0]
+
+
+@pytest.fixture
+def reviews():
+    return pd.DataFrame({
+        'text': ['Great product!', 'Good', 'not good at all', 'Would buy again.', 'product is great'],
+        'rating': [5, 4, 1, 4, 4],
+        'user': ['a', 'b', 'c', 'd', 'e'],
+        'store': ['x', 'x', 'y', 'y', 'z'],
+    })
+
+
+def write(data: pd.DataFrame, path: Any):
+    fmt, compression = file_format(path)
+    if fmt == 'csv':
+        data.to_csv(path, index=False, compression=compression)
+    elif fmt in ('json', 'jsonl'):
+        data.to_json(path, orient='records', lines=fmt == 'jsonl', compression=compression)
+    elif fmt == 'parquet':
+        data.to_parquet(path)
+    elif fmt == 'feather':
+        data.to_feather(path, compression='uncompressed')
+    else:
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        with pa.ipc.new_file(str(path), table.schema) as writer:
+            writer.write_table(table, max_chunksize=2)
+
+
+@pytest.mark.parametrize('name,expected', [
+    ('reviews.csv', ('csv', None)),
+    ('reviews.CSV.gz', ('csv', 'gzip')),
+    ('reviews.v2.jsonl.zst', ('jsonl', 'zstd')),
+    ('reviews.json', ('json', None)),
+    ('reviews.parquet', ('parquet', None)),
+    ('reviews.feather', ('feather', None)),
+    ('reviews.arrow', ('arrow', None)),
+])
+def test_file_format(name: str, expected: Any):
+    assert file_format(name) == expected
+
+
+@pytest.mark.parametrize('name', ['reviews.txt', 'reviews', 'reviews.parquet.gz', 'reviews.arrow.zst', 'reviews.gz'])
+def test_file_format_unsupported(name: str):
+    with pytest.raises(ValueError):
+        file_format(name)
+
+
+FILES = [
+    'reviews.csv', 'reviews.csv.gz', 'reviews.json', 'reviews.jsonl', 'reviews.jsonl.gz',
+    _requires('zstandard', 'reviews.csv.zst'), _requires('pyarrow', 'reviews.parquet'),
+    _requires('pyarrow', 'reviews.feather'), _requires('pyarrow', 'reviews.arrow'),
+]
+
+
+@pytest.mark.parametrize('name', FILES)
+def test_read_data(tmp_path, reviews, name: str):
+    path = tmp_path / name
+    write(reviews, path)
+
+    pd.testing.assert_frame_equal(read_data(str(path)), reviews, check_dtype=False)
+
+    result = read_data(str(path), columns=['text', 'rating'], dtype={'rating': 'float32'})
+    assert sorted(result.columns) == ['rating', 'text']
+    assert result['rating'].dtype == 'float32'
+    assert result['text'].tolist() == reviews['text'].tolist()
+
+
+@pytest.mark.parametrize('name', ['reviews.jsonl', 'reviews.jsonl.gz'])
+def test_read_data_jsonl_chunked(monkeypatch, tmp_path, reviews, name: str):
+    path = tmp_path / name
+    write(reviews, path)
+
+    monkeypatch.setattr('rebyu.util.reader.JSON_CHUNK_ROWS', 2)
+    result = read_data(str(path), columns=['user', 'text'])
+    pd.testing.assert_frame_equal(result, reviews[['user', 'text']])
+
+
+def test_read_data_jsonl_empty(tmp_path):
+    path = tmp_path / 'reviews.jsonl'
+    path.write_text('')
+    assert list(read_data(str(path), columns=['text']).columns) == ['text']
+
+
+@pytest.mark.parametrize('name', [x for x in FILES if x != 'reviews.json'])
+def test_read_chunks(tmp_path, reviews, name: str):
+    path = tmp_path / name
+    write(reviews, path)
+
+    chunks = list(read_chunks(str(path), 2, columns=['text'], dtype={'text': str}))
+    assert [len(x) for x in chunks] == [2, 2, 1]
+    assert all(list(x.columns) == ['text'] for x in chunks)
+    assert pd.concat(chunks)['text'].tolist() == reviews['text'].tolist()
+
+
+def test_read_data_memory_map(tmp_path, reviews):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        pytest.skip('pyarrow is not available')
+
+    path = tmp_path / 'reviews.arrow'
+    write(reviews, path)
+
+    allocated = pa.total_allocated_bytes()
+    result = read_data(str(path), columns=['text'])
+    assert pa.total_allocated_bytes() == allocated
+    assert result['text'].dtype == pd.StringDtype('pyarrow')
+    assert result['text'].tolist() == reviews['text'].tolist()
+
+    result['length'] = result['text'].str.len()
+    assert read_data(str(path))['text'].tolist() == reviews['text'].tolist()
+    assert load_data(pa.Table.from_pandas(reviews), columns=['text'])['text'].dtype == pd.StringDtype('pyarrow')
+
+
+def test_read_data_large_string(tmp_path, reviews):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        pytest.skip('pyarrow is not available')
+
+    path = tmp_path / 'reviews.arrow'
+    table = pa.Table.from_pandas(reviews, preserve_index=False)
+    table = table.set_column(0, 'text', table.column('text').cast(pa.large_string()))
+    with pa.ipc.new_file(str(path), table.schema) as writer:
+        writer.write_table(table, max_chunksize=2)
+
+    result = read_data(str(path), columns=['text'])
+    assert result['text'].dtype == pd.StringDtype('pyarrow')
+    assert remove_punctuations(result['text']).tolist() == remove_punctuations(reviews['text']).tolist()
+    assert remove_numbers(result['text']).tolist() == reviews['text'].tolist()
+
+    large = pd.Series(reviews['text'].tolist(), dtype=pd.ArrowDtype(pa.large_string()))
+    assert not is_str_series(large)
+    assert remove_multi_patterns(large).tolist() == remove_multi_patterns(reviews['text']).tolist()
+
+
+def test_load_data(reviews):
+    result = load_data(reviews, columns=['text'])
+    result['text'] = ''
+
+    assert list(result.columns) == ['text']
+    assert reviews['text'].iloc[0] == 'Great product!'
+    assert load_data(reviews['rating'], dtype={'rating': 'int8'})['rating'].dtype == 'int8'
+
+
+@pytest.mark.parametrize('columns', [['text', 'rating'], ['rating', 'text'], ['store', 'text', 'user']])
+def test_load_data_column_order(reviews, columns: Any):
+    assert list(load_data(reviews, columns=columns, copy=False).columns) == columns
+    assert list(load_data(reviews, columns=columns, copy=True).columns) == columns
+
+
+def test_load_data_no_copy(reviews):
+    original = reviews.copy()
+    result = load_data(reviews, columns=['rating', 'text'], copy=False)
+
+    assert list(result.columns) == ['rating', 'text']
+    assert np.shares_memory(result['rating'].values, reviews['rating'].values)
+
+    result['text'] = result['text'].str.upper()
+    result['rating'] = 0
+    result['length'] = 1
+    assert reviews.equals(original)
+
+    with pytest.raises(KeyError):
+        load_data(reviews, columns=['missing'], copy=False)
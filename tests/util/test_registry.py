@@ -0,0 +1,80 @@
+import pytest
+from typing import Any
+
+from rebyu.util.registry import ModelRegistry, model_nbytes
+
+
+class FakeTensor(object):
+
+    def __init__(self, n: int):
+        self.n = n
+
+    def numel(self):
+        return self.n
+
+    def element_size(self):
+        return 4
+
+
+class FakeModel(object):
+    loads = []
+
+    def __init__(self, name: Any, size: int = 10):
+        self.name = name
+        self.size = size
+
+    @classmethod
+    def from_pretrained(cls, name: Any, size: int = 10):
+        cls.loads.append(name)
+        return cls(name, size)
+
+    def parameters(self):
+        return [FakeTensor(self.size)]
+
+
+class OtherModel(FakeModel):
+    loads = []
+
+
+@pytest.fixture(autouse=True)
+def reset_loads():
+    FakeModel.loads, OtherModel.loads = [], []
+
+
+def test_model_registry_get():
+    registry = ModelRegistry()
+    model = registry.get(FakeModel.from_pretrained, 'a')
+    assert registry.get(FakeModel.from_pretrained, 'a') is model
+    assert registry.get(FakeModel.from_pretrained, 'a', size=20) is not model
+    assert registry.get(OtherModel.from_pretrained, 'a') is not model
+    assert FakeModel.loads == ['a', 'a']
+    assert OtherModel.loads == ['a']
+    assert len(registry) == 3
+
+
+def test_model_registry_evict_count():
+    registry = ModelRegistry(max_items=2)
+    registry.get(FakeModel.from_pretrained, 'a')
+    registry.get(FakeModel.from_pretrained, 'b')
+    registry.get(FakeModel.from_pretrained, 'a')
+    registry.get(FakeModel.from_pretrained, 'c')
+
+    assert len(registry) == 2
+    assert registry.key(FakeModel.from_pretrained, 'a') in registry
+    assert registry.key(FakeModel.from_pretrained, 'b') not in registry
+
+
+@pytest.mark.parametrize('max_bytes,expected', [
+    (None, 3),
+    (100, 2),
+    (50, 1),
+    (1, 1),
+])
+def test_model_registry_evict_bytes(max_bytes: Any, expected: int):
+    registry = ModelRegistry(max_items=None, max_bytes=max_bytes)
+    for name in ('a', 'b', 'c'):
+        registry.get(FakeModel.from_pretrained, name, size=10)
+
+    assert model_nbytes(FakeModel('x', size=10)) == 40
+    assert len(registry) == expected
+    assert registry.key(FakeModel.from_pretrained, 'c', size=10) in registry
@@ -0,0 +1,132 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from typing import Any
+
+from rebyu.compose.vocab import counter_vocab
+from rebyu.util.dedupe import factorize
+from rebyu.util.tokens import TokenArray, TokenDtype, is_token_series
+
+
+@pytest.fixture
+def rows():
+    return [['good', 'product'], [], None, ['bad', 'good', 'good']]
+
+
+@pytest.fixture
+def series(rows: Any):
+    return pd.Series(TokenArray.from_tokens(rows), name='tokens')
+
+
+def test_token_array(rows: Any, series: pd.Series):
+    arr = series.array
+
+    assert is_token_series(series) and not is_token_series(pd.Series(rows))
+    assert isinstance(series.dtype, TokenDtype) and str(series.dtype) == 'tokens'
+    assert len(arr) == 4
+    assert arr.vocab == ('good', 'product', 'bad')
+    assert arr.lengths().tolist() == [2, 0, 0, 3]
+    assert arr.row_ids(3).tolist() == [2, 0, 0]
+    assert series.isna().tolist() == [False, False, True, False]
+    assert [row for row in series if row is not np.nan] == [('good', 'product'), (), ('bad', 'good', 'good')]
+    assert series[3] == ('bad', 'good', 'good') and series[2] is np.nan
+    assert arr.nbytes > sum(sys.getsizeof(token) for token in arr.vocab)
+    assert series.memory_usage(deep=True, index=False) == arr.nbytes
+
+
+@pytest.mark.parametrize('indexer,expected', [
+    (slice(1, 3), [(), None]),
+    ([3, 0], [('bad', 'good', 'good'), ('good', 'product')]),
+    (np.array([True, False, False, True]), [('good', 'product'), ('bad', 'good', 'good')]),
+])
+def test_token_array_indexing(series: pd.Series, indexer: Any, expected: Any):
+    result = series.iloc[indexer]
+    assert isinstance(result.dtype, TokenDtype)
+    assert [None if row is np.nan else row for row in result.tolist()] == expected
+
+
+def test_token_array_take_concat(series: pd.Series):
+    arr = series.array
+
+    assert arr.take([-1, 0], allow_fill=True).isna().tolist() == [True, False]
+    assert arr.take([-1]).tolist() == [('bad', 'good', 'good')]
+    with pytest.raises(IndexError):
+        arr.take([4])
+
+    other = TokenArray.from_tokens([['awful', 'product']])
+    result = pd.concat([series, pd.Series(other)], ignore_index=True)
+    assert isinstance(result.dtype, TokenDtype)
+    assert result.array.vocab == ('good', 'product', 'bad', 'awful')
+    assert result.tolist()[-1] == ('awful', 'product')
+    assert arr.copy().tolist()[3] == ('bad', 'good', 'good')
+
+
+def test_token_array_from_ids():
+    arr = TokenArray.from_ids([[101, 7, 102], [], [101, 102]])
+    assert arr._ids.dtype == np.int32 and arr.lengths().tolist() == [3, 0, 2]
+    assert arr.tolist() == [(101, 7, 102), (), (101, 102)]
+    assert arr.row_ids(0).tolist() == [101, 7, 102]
+
+    result = pd.concat([pd.Series(arr), pd.Series(TokenArray.from_ids([[5, 200]]))], ignore_index=True)
+    assert result.tolist()[-1] == (5, 200) and len(TokenArray.from_ids([])) == 0
+
+
+def test_token_array_select(series: pd.Series):
+    result = series.array.select(np.array([True, False, True]))
+    assert result.lengths().tolist() == [1, 0, 0, 3]
+    assert result.isna().tolist() == series.isna().tolist()
+
+
+def test_token_array_compose(rows: Any, series: pd.Series):
+    tokens = [row for row in rows if row is not None]
+    compact = series.dropna()
+
+    assert counter_vocab(compact, cutoff=1) == counter_vocab(tokens, cutoff=1)
+
+    codes, uniques = factorize(pd.Series(TokenArray.from_tokens(tokens + [['good', 'product']])))
+    assert codes.tolist() == [0, 1, 2, 0]
+    assert isinstance(uniques.dtype, TokenDtype)
+
+
+def test_token_array_setitem(series: pd.Series):
+    assert series.where([True, False, True, True]).isna().tolist() == [False, True, True, False]
+    assert series.mask(series.isna(), other=np.nan).tolist()[3] == ('bad', 'good', 'good')
+
+    result = series.copy()
+    result.iloc[1] = ['new', 'good']
+    result.iloc[[0, 2]] = [('x',), []]
+    assert isinstance(result.dtype, TokenDtype)
+    assert result.tolist() == [('x',), ('new', 'good'), (), ('bad', 'good', 'good')]
+    assert series.tolist()[1] == ()
+
+    with pytest.raises(ValueError):
+        result.iloc[[0, 1]] = [['a']]
+
+
+def test_token_array_astype(series: pd.Series):
+    assert series.astype(object).tolist()[3] == ('bad', 'good', 'good')
+    assert series.array.astype(str).tolist() == ["('good', 'product')", '()', 'nan', "('bad', 'good', 'good')"]
+    assert series.astype(str).tolist()[1] == '()'
+
+    strings = series.astype('string')
+    assert isinstance(strings.dtype, pd.StringDtype) and strings.isna().tolist() == [False, False, True, False]
+
+
+def test_token_array_explode_value_counts(series: pd.Series):
+    values, counts = series.array._explode()
+    assert counts.tolist() == [2, 1, 1, 3]
+    assert repr(values.tolist()) == repr(['good', 'product', np.nan, np.nan, 'bad', 'good', 'good'])
+
+    repeated = pd.concat([series, series.iloc[[0]]], ignore_index=True)
+    assert repeated.value_counts().to_dict() == {('good', 'product'): 2, (): 1, ('bad', 'good', 'good'): 1}
+    assert repeated.value_counts(dropna=False).sum() == 5
+
+
+@pytest.mark.skipif(tuple(int(x) for x in pd.__version__.split('.')[:2]) < (2, 2),
+                    reason='Series.explode calls ExtensionArray._explode from pandas 2.2 on')
+def test_token_array_series_explode(series: pd.Series):
+    exploded = series.explode()
+    assert exploded.index.tolist() == [0, 0, 1, 2, 3, 3, 3]
+    assert exploded.dropna().tolist() == ['good', 'product', 'bad', 'good', 'good']